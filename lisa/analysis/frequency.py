@@ -29,7 +29,7 @@ import numpy as np
 from lisa.analysis.base import TraceAnalysisBase
 from lisa.utils import memoized
 from lisa.trace import requires_events
-from lisa.datautils import series_integrate, df_refit_index, series_deduplicate
+from lisa.datautils import df_refit_index, series_deduplicate, StepSignal
 
 
 class FrequencyAnalysis(TraceAnalysisBase):
@@ -117,27 +117,22 @@ class FrequencyAnalysis(TraceAnalysisBase):
         # Compute ACTIVE Time
         cluster_active = self.trace.analysis.idle.signal_cluster_active(cpus)
 
-        # In order to compute the active time spent at each frequency we
-        # multiply 2 square waves:
-        # - cluster_active, a square wave of the form:
+        # In order to compute the active time spent at each frequency, we
+        # align the frequency signal with cluster_active, a square wave of the
+        # form:
         #     cluster_active[t] == 1 if at least one CPU is reported to be
         #                            non-idle by CPUFreq at time t
         #     cluster_active[t] == 0 otherwise
-        # - freq_active, square wave of the form:
-        #     freq_active[t] == 1 if at time t the frequency is f
-        #     freq_active[t] == 0 otherwise
-        available_freqs = sorted(cluster_freqs.frequency.unique())
-        cluster_freqs = cluster_freqs.join(
-            cluster_active.to_frame(name='active'), how='outer')
-        cluster_freqs.fillna(method='ffill', inplace=True)
-        nonidle_time = []
-        for freq in available_freqs:
-            freq_active = cluster_freqs.frequency.apply(lambda x: 1 if x == freq else 0)
-            active_t = cluster_freqs.active * freq_active
-            # Compute total time by integrating the square wave
-            nonidle_time.append(series_integrate(active_t))
-
-        time_df["active_time"] = pd.DataFrame(index=available_freqs, data=nonidle_time)
+        # The active time is then the integral of cluster_active, grouped by
+        # frequency.
+        index, (freqs, active) = StepSignal.align([
+            StepSignal.from_series(cluster_freqs['frequency']),
+            StepSignal.from_series(cluster_active),
+        ])
+        active = StepSignal(index, active)
+        active_time = pd.Series(active.values * active.durations()).groupby(freqs).sum()
+
+        time_df["active_time"] = active_time
         return time_df
 
     @_get_frequency_residency.used_events
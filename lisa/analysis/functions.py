@@ -19,8 +19,11 @@
 import json
 import os
 
+import numpy as np
 import pandas as pd
-from lisa.analysis.base import AnalysisHelpers
+from lisa.analysis.base import AnalysisHelpers, TraceAnalysisBase
+from lisa.trace import requires_events
+from lisa.utils import memoized
 
 
 class FunctionsAnalysis(AnalysisHelpers):
@@ -119,4 +122,207 @@ class FunctionsAnalysis(AnalysisHelpers):
             axis.get_xaxis().set_visible(False)
 
 
+class FuncgraphAnalysis(TraceAnalysisBase):
+    """
+    Support for kernel functions analysis based on the ``function_graph``
+    ftrace tracer events.
+
+    :param trace: input Trace object
+    :type trace: :class:`trace.Trace`
+    """
+
+    name = 'funcgraph'
+
+###############################################################################
+# DataFrame Getter Methods
+###############################################################################
+
+    @memoized
+    @requires_events('funcgraph_entry', 'funcgraph_exit')
+    def _df_funcgraph_calls(self):
+        trace = self.trace
+        entry_df = trace.df_events('funcgraph_entry')
+        exit_df = trace.df_events('funcgraph_exit')
+        nr_entry = len(entry_df)
+
+        def concat(col):
+            return np.concatenate((entry_df[col].values, exit_df[col].values))
+
+        is_exit = np.repeat([False, True], [nr_entry, len(exit_df)])
+        line = concat('__line')
+        cpu = concat('__cpu')
+        pid = concat('__pid')
+        depth = concat('depth')
+        func = concat('func')
+
+        # The call depth is tracked per task by the kernel, so entries and
+        # exits are paired per task. Idle tasks all have PID 0, so they are
+        # told apart using the CPU they run on.
+        task = np.where(pid == 0, -1 - cpu, pid)
+
+        # At a given depth, a task can only execute one function at a time,
+        # so each entry is immediately followed by its exit once the events
+        # are sorted by task, depth and then trace order. Entries or exits
+        # that lost their counterpart (e.g. trace start and end, or
+        # overwritten buffers) are simply not paired.
+        order = np.lexsort((line, depth, task))
+        curr = order[:-1]
+        nxt = order[1:]
+        paired = (
+            ~is_exit[curr] & is_exit[nxt]
+            & (task[curr] == task[nxt])
+            & (depth[curr] == depth[nxt])
+            & (func[curr] == func[nxt])
+        )
+        # Sort the calls in trace order of their entry
+        call_order = np.argsort(curr[paired])
+        entry_pos = curr[paired][call_order]
+        exit_pos = nxt[paired][call_order]
+
+        entry_line = line[entry_pos]
+        exit_line = line[exit_pos]
+        call_task = task[entry_pos]
+        call_depth = depth[entry_pos]
+        exit_pos -= nr_entry
+
+        entries = entry_df.iloc[entry_pos]
+        duration = exit_df.index.values[exit_pos] - entries.index.values
+        nr_calls = len(entries)
+        call_id = np.arange(nr_calls)
+
+        # The caller is the last call that started before on the same task one
+        # level up, provided it did not return yet.
+        calls = pd.DataFrame({
+            'line': entry_line,
+            'task': call_task,
+            'depth': call_depth,
+            'caller_depth': call_depth - 1,
+            'exit_line': exit_line,
+            'call_id': call_id,
+        })
+        callers = pd.merge_asof(
+            calls[['line', 'task', 'caller_depth']],
+            calls[['line', 'task', 'depth', 'exit_line', 'call_id']],
+            on='line',
+            left_by=['task', 'caller_depth'],
+            right_by=['task', 'depth'],
+            allow_exact_matches=False,
+        )
+        has_caller = (callers['exit_line'] > callers['line']).values
+        caller_id = np.where(has_caller, callers['call_id'].fillna(-1).values, -1).astype(int)
+
+        children_duration = np.bincount(
+            caller_id[has_caller],
+            weights=duration[has_caller],
+            minlength=nr_calls,
+        )
+
+        df = pd.DataFrame(
+            {
+                'cpu': entries['__cpu'].values,
+                'pid': entries['__pid'].values,
+                'comm': entries['__comm'].values,
+                'depth': call_depth,
+                'func': entries['func'].values,
+                'duration': duration,
+                'self_duration': duration - children_duration,
+                'call_id': call_id,
+                'caller_id': caller_id,
+            },
+            index=entries.index,
+        )
+
+        # Function names are only available if the symbols addresses were
+        # available when the trace was sanitized
+        if 'func_name' in entries.columns:
+            func_name = entries['func_name'].copy()
+            unresolved = func_name.isna()
+            func_name[unresolved] = entries['func'][unresolved].map(hex)
+            df.insert(df.columns.get_loc('func') + 1, 'func_name', func_name.values)
+
+        return df
+
+    @_df_funcgraph_calls.used_events
+    def df_funcgraph_calls(self, functions=None):
+        """
+        Get a DataFrame of kernel function calls, built by pairing
+        ``funcgraph_entry`` and ``funcgraph_exit`` events.
+
+        :param functions: Name or address of a function or list of them to
+            report. By default, all the functions are reported.
+        :type functions: str or int or list(str) or list(int)
+
+        :returns: a :class:`pandas.DataFrame` indexed by the time at which the
+            function was entered, with:
+
+          * ``cpu``, ``pid`` and ``comm`` columns of the task that called the
+            function.
+          * A ``depth`` column (the call depth as reported by the kernel).
+          * A ``func`` column (the address of the function), and a
+            ``func_name`` column if the kernel symbols were available in the
+            platform info (see
+            :meth:`lisa.platforms.platinfo.PlatformInfo.add_target_src`).
+          * A ``duration`` column (the time spent in the function, including
+            its callees).
+          * A ``self_duration`` column (the time spent in the function,
+            excluding its callees).
+          * A ``call_id`` column, uniquely identifying the call.
+          * A ``caller_id`` column, with the ``call_id`` of the calling
+            function or ``-1`` if it is not in the trace. This allows
+            reconstructing the call tree.
+
+        .. note:: Calls for which either the entry or the exit event is
+            missing from the trace are ignored.
+        """
+        df = self._df_funcgraph_calls()
+        if functions is not None:
+            if isinstance(functions, (str, int)):
+                functions = [functions]
+            mask = df['func'].isin(functions)
+            if 'func_name' in df.columns:
+                mask |= df['func_name'].isin(functions)
+            df = df[mask]
+
+        return df
+
+    @df_funcgraph_calls.used_events
+    def df_funcgraph_stats(self, functions=None):
+        """
+        Get a DataFrame of kernel functions aggregated statistics.
+
+        :param functions: Name or address of a function or list of them to
+            report. By default, all the functions are reported.
+        :type functions: str or int or list(str) or list(int)
+
+        :returns: a :class:`pandas.DataFrame` indexed by function name (or
+            address if names are not available), with:
+
+          * A ``hits`` column (the number of calls).
+          * A ``time`` column (the total time spent in the function, including
+            its callees).
+          * A ``self_time`` column (the total time spent in the function,
+            excluding its callees).
+          * An ``avg`` column (the average duration of one call, including its
+            callees).
+          * A ``max`` column (the longest duration of one call, including its
+            callees).
+
+        .. note:: The ``time`` of recursive functions includes the time spent
+            in the recursive calls more than once.
+        """
+        df = self.df_funcgraph_calls(functions)
+        col = 'func_name' if 'func_name' in df.columns else 'func'
+
+        grouped = df.groupby(col, sort=False)
+        stats = pd.DataFrame({
+            'hits': grouped['duration'].size(),
+            'time': grouped['duration'].sum(),
+            'self_time': grouped['self_duration'].sum(),
+            'max': grouped['duration'].max(),
+        })
+        stats['avg'] = stats['time'] / stats['hits']
+        stats.index.name = 'function'
+        return stats.sort_values('time', ascending=False)[['hits', 'time', 'self_time', 'avg', 'max']]
+
+
 # vim :set tabstop=4 shiftwidth=4 expandtab textwidth=80
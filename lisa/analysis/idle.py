@@ -16,14 +16,16 @@
 #
 
 from functools import reduce
+import itertools
 import operator
 
+import numpy as np
 import pandas as pd
 
 from trappy.utils import handle_duplicate_index
 
 from lisa.utils import memoized
-from lisa.datautils import series_integrate
+from lisa.datautils import StepSignal
 from lisa.analysis.base import TraceAnalysisBase
 from lisa.trace import requires_events
 
@@ -44,6 +46,55 @@ class IdleAnalysis(TraceAnalysisBase):
 
     @memoized
     @requires_events('cpu_idle')
+    def _get_cpus_active_signals(self):
+        """
+        Build the :class:`lisa.datautils.StepSignal` of the active state of all
+        the CPUs in one pass over the ``cpu_idle`` events.
+
+        :returns: A dictionary of CPU IDs to signals. CPUs without any
+            ``cpu_idle`` event are not included.
+        """
+        idle_df = self.trace.df_events('cpu_idle')
+        start_time = self.trace.start
+
+        index = idle_df.index.values
+        cpus = idle_df['cpu_id'].values
+        active = (idle_df['state'].values == -1).astype(int)
+
+        # Group the events by CPU with a stable sort, so that the events of a
+        # given CPU are kept in the order they appeared in
+        order = np.argsort(cpus, kind='stable')
+        cpu_ids, starts = np.unique(cpus[order], return_index=True)
+        ends = itertools.chain(starts[1:], [len(order)])
+
+        signals = {}
+        for cpu, start, end in zip(cpu_ids.tolist(), starts, ends):
+            rows = order[start:end]
+            cpu_index = index[rows]
+            cpu_active = active[rows]
+
+            if cpu_index[0] != start_time:
+                cpu_index = np.insert(cpu_index, 0, start_time)
+                cpu_active = np.insert(cpu_active, 0, cpu_active[0] ^ 1)
+
+            # Fix sequences of wakeup/sleep events reported with the same index
+            series = handle_duplicate_index(pd.Series(cpu_active, index=cpu_index))
+            signals[cpu] = StepSignal.from_series(series)
+
+        return signals
+
+    @_get_cpus_active_signals.used_events
+    def _get_cpu_active_signal(self, cpu):
+        """
+        :class:`lisa.datautils.StepSignal` version of :meth:`signal_cpu_active`
+        """
+        try:
+            return self._get_cpus_active_signals()[cpu]
+        except KeyError:
+            return StepSignal([self.trace.start], [0])
+
+    @memoized
+    @_get_cpu_active_signal.used_events
     def signal_cpu_active(self, cpu):
         """
         Build a square wave representing the active (i.e. non-idle) CPU time
@@ -54,25 +105,23 @@ class IdleAnalysis(TraceAnalysisBase):
         :returns: A :class:`pandas.Series` that equals 1 at timestamps where the
           CPU is reported to be non-idle, 0 otherwise
         """
-        idle_df = self.trace.df_events('cpu_idle')
-        cpu_df = idle_df[idle_df.cpu_id == cpu]
+        return self._get_cpu_active_signal(cpu).to_series()
 
-        cpu_active = cpu_df.state.apply(
-            lambda s: 1 if s == -1 else 0
+    @_get_cpu_active_signal.used_events
+    def _get_cluster_active_signal(self, cluster):
+        """
+        :class:`lisa.datautils.StepSignal` version of
+        :meth:`signal_cluster_active`
+        """
+        # Cluster active is the OR between the actives on each CPU
+        # belonging to that specific cluster. The result only starts when all
+        # the CPUs signals have started.
+        return reduce(
+            operator.or_,
+            [self._get_cpu_active_signal(cpu) for cpu in cluster]
         )
 
-        start_time = self.trace.start
-
-        if cpu_active.empty:
-            cpu_active = pd.Series([0], index=[start_time])
-        elif cpu_active.index[0] != start_time:
-            entry_0 = pd.Series(cpu_active.iloc[0] ^ 1, index=[start_time])
-            cpu_active = pd.concat([entry_0, cpu_active])
-
-        # Fix sequences of wakeup/sleep events reported with the same index
-        return handle_duplicate_index(cpu_active)
-
-    @signal_cpu_active.used_events
+    @_get_cluster_active_signal.used_events
     def signal_cluster_active(self, cluster):
         """
         Build a square wave representing the active (i.e. non-idle) cluster time
@@ -83,30 +132,9 @@ class IdleAnalysis(TraceAnalysisBase):
         :returns: A :class:`pandas.Series` that equals 1 at timestamps where at
           least one CPU is reported to be non-idle, 0 otherwise
         """
-        active = self.signal_cpu_active(cluster[0]).to_frame(name=cluster[0])
-        for cpu in cluster[1:]:
-            active = active.join(
-                self.signal_cpu_active(cpu).to_frame(name=cpu),
-                how='outer'
-            )
-
-        active.fillna(method='ffill', inplace=True)
-        # There might be NaNs in the signal where we got data from some CPUs
-        # before others. That will break the .astype(int) below, so drop rows
-        # with NaN in them.
-        active.dropna(inplace=True)
+        return self._get_cluster_active_signal(cluster).to_series()
 
-        # Cluster active is the OR between the actives on each CPU
-        # belonging to that specific cluster
-        cluster_active = reduce(
-            operator.or_,
-            [cpu_active.astype(int) for _, cpu_active in
-             active.items()]
-        )
-
-        return cluster_active
-
-    @requires_events('cpu_idle')
+    @_get_cpus_active_signals.used_events
     def df_cpus_wakeups(self):
         """"
         Get a DataFrame showing when CPUs have woken from idle
@@ -119,16 +147,51 @@ class IdleAnalysis(TraceAnalysisBase):
           * A ``cpu`` column (the CPU that woke up at the row index)
         """
         cpus = list(range(self.trace.cpus_count))
-
-        sr = pd.Series()
-        for cpu in cpus:
-            cpu_sr = self.signal_cpu_active(cpu)
-            cpu_sr = cpu_sr[cpu_sr == 1]
-            cpu_sr = cpu_sr.replace(1, cpu)
-            sr = sr.append(cpu_sr)
+        signals = [self._get_cpu_active_signal(cpu) for cpu in cpus]
+        wakeups = [signal.values == 1 for signal in signals]
+
+        sr = pd.Series(
+            np.concatenate([
+                np.full(is_wakeup.sum(), cpu)
+                for cpu, is_wakeup in zip(cpus, wakeups)
+            ]),
+            index=np.concatenate([
+                signal.index[is_wakeup]
+                for signal, is_wakeup in zip(signals, wakeups)
+            ]),
+        )
 
         return pd.DataFrame({'cpu': sr}).sort_index()
 
+    @staticmethod
+    def _get_idle_state_residency(state, is_idle, available_idles, end=None):
+        """
+        Integrate the ``is_idle`` signal for each idle state.
+
+        :param state: Idle state signal
+        :type state: lisa.datautils.StepSignal
+
+        :param is_idle: Square wave that is 1 when idle
+        :type is_idle: lisa.datautils.StepSignal
+
+        :param available_idles: Idle states to report.
+        :type available_idles: list(int)
+
+        :param end: Forwarded to :meth:`lisa.datautils.StepSignal.durations`.
+        :type end: float or None
+        """
+        index, (state, is_idle) = StepSignal.align([state, is_idle])
+        is_idle = StepSignal(index, is_idle)
+        idle_time = pd.Series(is_idle.values * is_idle.durations(end))
+        idle_time = idle_time.groupby(state).sum()
+
+        idle_time_df = pd.DataFrame(
+            {'time': idle_time.reindex(available_idles, fill_value=0).values},
+            index=available_idles,
+        )
+        idle_time_df.index.name = 'idle_state'
+        return idle_time_df
+
     @requires_events("cpu_idle")
     def df_cpu_idle_state_residency(self, cpu):
         """
@@ -145,38 +208,23 @@ class IdleAnalysis(TraceAnalysisBase):
         idle_df = self.trace.df_events('cpu_idle')
         cpu_idle = idle_df[idle_df.cpu_id == cpu]
 
-        cpu_is_idle = self.signal_cpu_active(cpu) ^ 1
+        # In order to compute the time spent in each idle state, we integrate
+        # the cpu_is_idle square wave for each value of the idle state of the
+        # CPU.
+        cpu_is_idle = self._get_cpu_active_signal(cpu) ^ 1
 
-        # In order to compute the time spent in each idle state we
-        # multiply 2 square waves:
-        # - cpu_idle
-        # - idle_state, square wave of the form:
-        #     idle_state[t] == 1 if at time t CPU is in idle state i
-        #     idle_state[t] == 0 otherwise
         available_idles = sorted(idle_df.state.unique())
         # Remove non-idle state from availables
         available_idles = available_idles[1:]
-        cpu_idle = cpu_idle.join(cpu_is_idle.to_frame(name='is_idle'),
-                                 how='outer')
-        cpu_idle.fillna(method='ffill', inplace=True)
 
         # Extend the last cpu_idle event to the end of the time window under
         # consideration
-        final_entry = pd.DataFrame([cpu_idle.iloc[-1]], index=[self.trace.end])
-        cpu_idle = cpu_idle.append(final_entry)
-
-        idle_time = []
-        for i in available_idles:
-            idle_state = cpu_idle.state.apply(
-                lambda x: 1 if x == i else 0
-            )
-            idle_t = cpu_idle.is_idle * idle_state
-            # Compute total time by integrating the square wave
-            idle_time.append(series_integrate(idle_t))
-
-        idle_time_df = pd.DataFrame({'time': idle_time}, index=available_idles)
-        idle_time_df.index.name = 'idle_state'
-        return idle_time_df
+        return self._get_idle_state_residency(
+            StepSignal.from_series(cpu_idle['state']),
+            cpu_is_idle,
+            available_idles,
+            end=self.trace.end,
+        )
 
     @requires_events('cpu_idle')
     def df_cluster_idle_state_residency(self, cluster):
@@ -195,46 +243,23 @@ class IdleAnalysis(TraceAnalysisBase):
         # Each core in a cluster can be in a different idle state, but the
         # cluster lies in the idle state with lowest ID, that is the shallowest
         # idle state among the idle states of its CPUs
-        cl_idle = idle_df[idle_df.cpu_id == cluster[0]].state.to_frame(
-            name=cluster[0])
-        for cpu in cluster[1:]:
-            cl_idle = cl_idle.join(
-                idle_df[idle_df.cpu_id == cpu].state.to_frame(name=cpu),
-                how='outer'
-            )
-        cl_idle.fillna(method='ffill', inplace=True)
-        cl_idle = pd.DataFrame(cl_idle.min(axis=1), columns=['state'])
+        index, cpus_state = StepSignal.align([
+            StepSignal.from_series(idle_df[idle_df.cpu_id == cpu]['state'])
+            for cpu in cluster
+        ])
+        cl_state = StepSignal(index, np.fmin.reduce(cpus_state))
 
         # Build a square wave of the form:
         #     cl_is_idle[t] == 1 if all CPUs in the cluster are reported
         #                      to be idle by cpufreq at time t
         #     cl_is_idle[t] == 0 otherwise
-        cl_is_idle = self.signal_cluster_active(cluster) ^ 1
-
-        # In order to compute the time spent in each idle state frequency we
-        # multiply 2 square waves:
-        # - cluster_is_idle
-        # - idle_state, square wave of the form:
-        #     idle_state[t] == 1 if at time t cluster is in idle state i
-        #     idle_state[t] == 0 otherwise
+        cl_is_idle = self._get_cluster_active_signal(cluster) ^ 1
+
         available_idles = sorted(idle_df.state.unique())
         # Remove non-idle state from availables
         available_idles = available_idles[1:]
-        cl_idle = cl_idle.join(cl_is_idle.to_frame(name='is_idle'),
-                               how='outer')
-        cl_idle.fillna(method='ffill', inplace=True)
-        idle_time = []
-        for i in available_idles:
-            idle_state = cl_idle.state.apply(
-                lambda x: 1 if x == i else 0
-            )
-            idle_t = cl_idle.is_idle * idle_state
-            # Compute total time by integrating the square wave
-            idle_time.append(series_integrate(idle_t))
-
-        idle_time_df = pd.DataFrame({'time': idle_time}, index=available_idles)
-        idle_time_df.index.name = 'idle_state'
-        return idle_time_df
+
+        return self._get_idle_state_residency(cl_state, cl_is_idle, available_idles)
 
 
 ###############################################################################
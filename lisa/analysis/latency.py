@@ -96,8 +96,7 @@ class LatencyAnalysis(TraceAnalysisBase):
         wkp_df = self.trace.analysis.tasks.df_task_states(task)
         wkp_df = wkp_df[wkp_df.curr_state == TaskState.TASK_WAKING]
 
-        index = wkp_df.index.to_frame()
-        wkp_df['activation_interval'] = (index.shift(-1) - index).shift(1)
+        wkp_df['activation_interval'] = wkp_df.index.to_series().diff()
 
         return wkp_df[["activation_interval"]]
 
@@ -119,41 +118,31 @@ class LatencyAnalysis(TraceAnalysisBase):
         """
         df = self.trace.analysis.tasks.df_task_states(task)
 
-        runtimes = []
-        spurious_wkp = False
-
-        # Using df.apply() is risky for counting (can be called more than once
-        # on the same row), so use a loop instead
-        for index, row in df.iterrows():
-            runtime = runtimes[-1] if len(runtimes) else 0
-
-            if row.curr_state == TaskState.TASK_WAKING:
-                # This is required to capture strange trace sequences where
-                # a switch_in event is followed by a wakeup_event.
-                # This sequence is not expected, but we found it in some traces.
-                # Possible reasons could be:
-                # - misplaced sched_wakeup events
-                # - trace buffer artifacts
-                # TO BE BETTER investigated in kernel space.
-                # For the time being, we account this interval as RUNNING time,
-                # which is what kernelshark does.
-                if spurious_wkp:
-                    runtime += row.delta
-                    spurious_wkp = False
-                else:
-                    # This is a new activation, reset the runtime counter
-                    runtime = 0
-
-            elif row.curr_state == TaskState.TASK_ACTIVE:
-                # This is the spurious wakeup thing mentionned above
-                if row.next_state == TaskState.TASK_WAKING:
-                    spurious_wkp = True
-
-                runtime += row.delta
-
-            runtimes.append(runtime)
-
-        df["running_time"] = runtimes
+        waking = df.curr_state == TaskState.TASK_WAKING
+        active = df.curr_state == TaskState.TASK_ACTIVE
+
+        # A wakeup is spurious if the task was seen switching in right before
+        # it, without having been woken up in between.
+        # This is required to capture strange trace sequences where a
+        # switch_in event is followed by a wakeup_event.
+        # This sequence is not expected, but we found it in some traces.
+        # Possible reasons could be:
+        # - misplaced sched_wakeup events
+        # - trace buffer artifacts
+        # TO BE BETTER investigated in kernel space.
+        # For the time being, we account this interval as RUNNING time,
+        # which is what kernelshark does.
+        spurious_set = active & (df.next_state == TaskState.TASK_WAKING)
+        # Each wakeup is the last row of the group of rows following the
+        # previous wakeup
+        wkp_group = waking.cumsum() - waking
+        spurious_wkp = waking & spurious_set.groupby(wkp_group).transform('any')
+
+        # Every non-spurious wakeup is a new activation, which resets the
+        # runtime counter
+        activation = (waking & ~spurious_wkp).cumsum()
+        runtime = df.delta.where(active | spurious_wkp, 0)
+        df["running_time"] = runtime.groupby(activation).cumsum()
 
         # The runtime column is not entirely correct - at a task's first
         # TASK_ACTIVE occurence, the running_time will be non-zero, even
@@ -22,8 +22,8 @@ import numpy as np
 import pandas as pd
 
 from lisa.analysis.base import TraceAnalysisBase
-from lisa.utils import memoized
-from lisa.datautils import df_filter_task_ids, series_rolling_apply, df_deduplicate
+from lisa.utils import memoized, TASK_COMM_MAX_LEN
+from lisa.datautils import df_filter_task_ids, series_rolling_agg, StepSignal
 from lisa.trace import requires_events
 
 
@@ -163,7 +163,7 @@ class TasksAnalysis(TraceAnalysisBase):
         """
         df = self.trace.df_events('sched_wakeup')
 
-        wakeups = df.groupby('pid').count()["comm"]
+        wakeups = df.groupby('pid')["comm"].count()
         df = pd.DataFrame(wakeups).rename(columns={"comm": "wakeups"})
         df["comm"] = df.index.map(self._get_task_pid_name)
 
@@ -277,7 +277,9 @@ class TasksAnalysis(TraceAnalysisBase):
         all_sw_df['target_cpu'] = -1
 
         df = all_sw_df.append(wk_df, sort=False)
-        df.sort_index(inplace=True)
+        # Use a stable sort, so that events sharing a timestamp stay in a
+        # deterministic order when computing the per-task deltas
+        df.sort_index(inplace=True, kind='mergesort')
         df.rename(columns={'__cpu': 'cpu'}, inplace=True)
 
         # Move the target_cpu column to the 2nd position
@@ -292,36 +294,70 @@ class TasksAnalysis(TraceAnalysisBase):
         ######################################################
 
         # We have duplicate index values (timestamps) in there, so to make
-        # merging easier use an integer indexing instead.
+        # grouping easier use an integer indexing instead.
         df.reset_index(inplace=True)
 
-        # To speed up the sorting, we'll append all of the values sequentially
-        # and just sort them once at the very end
-        index = []
-        deltas = []
-        states = []
-
-        pids = df.pid.unique()
+        # The frame is already sorted by time with a stable sort, so grouping
+        # by PID preserves the chronological order of each task's states. This
+        # keeps the whole computation linear in the number of events, rather
+        # than scanning the frame once per PID.
+        grouped = df.groupby('pid', sort=False)
+        next_time = grouped['Time'].shift(-1)
+        next_state = grouped['curr_state'].shift(-1)
+
+        # The last state of each task lasts until the end of the trace
+        df["delta"] = next_time.fillna(self.trace.end) - df['Time']
+        df["next_state"] = next_state.fillna(df['curr_state']).astype(
+            df['curr_state'].dtype)
+        df.set_index("Time", inplace=True)
 
-        for pid in pids:
-            df_slice = df[df.pid == pid]
-            time = df_slice.Time
-            state = df_slice.curr_state
+        return df
 
-            index += time.index.to_list()
-            deltas += list(time.values[1:] - time.values[:-1]) + \
-                [self.trace.end - time.values[-1]]
-            states += list(state.values[1:]) + [state.values[-1]]
+    @memoized
+    @df_tasks_states.used_events
+    def df_tasks_states_summary(self):
+        """
+        Summary of :meth:`df_tasks_states`, aggregated for each task, CPU and
+        state.
+
+        :returns: a :class:`pandas.DataFrame` indexed by ``pid``, ``comm``,
+          ``cpu`` and ``curr_state``, in order of first occurrence, with:
+
+          * A ``time`` column (the total time spent in that state)
+          * A ``count`` column (the number of times that state was entered)
+          * A ``first_seen`` column (the first time that state was entered)
+          * A ``last_seen`` column (the last time that state was entered)
+
+        This is computed in a single pass over the states of all tasks, so
+        deriving per-task figures from it is much cheaper than going through
+        :meth:`df_task_states` for each task.
+        """
+        df = self.df_tasks_states().reset_index()
+        grouped = df.groupby(['pid', 'comm', 'cpu', 'curr_state'], sort=False)
+        return grouped.agg(
+            time=('delta', 'sum'),
+            count=('delta', 'size'),
+            first_seen=('Time', 'min'),
+            last_seen=('Time', 'max'),
+        )
 
-        merged_df = pd.DataFrame(index=index,
-                                 data={"delta": deltas, "next_state": states})
-        merged_df.sort_index(inplace=True)
+    @memoized
+    @df_tasks_states_summary.used_events
+    def _df_tasks_cpus_runtime(self):
+        """
+        Time spent active on each CPU by each task.
 
-        df["delta"] = merged_df.delta
-        df["next_state"] = merged_df.next_state
-        df.set_index("Time", inplace=True)
+        :returns: a :class:`pandas.DataFrame` indexed by ``pid`` and ``comm``,
+            with one column per CPU.
+        """
+        df = self.df_tasks_states_summary()['time']
+        state = df.index.get_level_values('curr_state')
+        df = df[state == TaskState.TASK_ACTIVE]
+        df = df.groupby(level=['pid', 'comm', 'cpu'], sort=False).sum()
+        df = df.unstack('cpu', fill_value=0.)
 
-        return df
+        cpus = sorted(set(range(self.trace.cpus_count)) | set(df.columns))
+        return df.reindex(columns=cpus, fill_value=0.)
 
     @df_tasks_states.used_events
     def df_task_states(self, task, stringify=False):
@@ -407,24 +443,24 @@ class TasksAnalysis(TraceAnalysisBase):
           * A ``comm`` column (the name of the task)
           * A ``runtime`` column (the time that task spent running)
         """
-        df = self.df_tasks_states()
+        df = self.df_tasks_states_summary()['time']
 
-        runtimes = {}
-        for pid in df.pid.unique():
-            runtimes[pid] = df[
-                (df.pid == pid) &
-                (df.curr_state == TaskState.TASK_ACTIVE)
-            ].delta.sum()
-
-        df = pd.DataFrame.from_dict(runtimes, orient="index", columns=["runtime"])
+        # Tasks that never ran still get a row
+        pids = df.index.get_level_values('pid')
+        runtime = df.where(
+            df.index.get_level_values('curr_state') == TaskState.TASK_ACTIVE,
+            0,
+        )
+        runtime = runtime.groupby(pids, sort=False).sum()
 
+        df = pd.DataFrame({"runtime": runtime})
         df.index.name = "pid"
         df.sort_values(by="runtime", ascending=False, inplace=True)
         df.insert(0, "comm", df.index.map(self._get_task_pid_name))
 
         return df
 
-    @df_task_states.used_events
+    @_df_tasks_cpus_runtime.used_events
     def df_task_total_residency(self, task):
         """
         DataFrame of a task's execution time on each CPU
@@ -437,24 +473,18 @@ class TasksAnalysis(TraceAnalysisBase):
           * CPU IDs as index
           * A ``runtime`` column (the time the task spent being active)
         """
-        cpus = set(range(self.trace.cpus_count))
-
-        df = self.df_task_states(task)
-        df = df[df.curr_state == TaskState.TASK_ACTIVE]
-
-        residency_df = pd.DataFrame(df.groupby("cpu")["delta"].sum())
-        residency_df.rename(columns={"delta": "runtime"}, inplace=True)
-
-        cpus_present = set(residency_df.index.unique())
+        task_id = self.trace.get_task_id(task, update=False)
 
-        for cpu in cpus.difference(cpus_present):
-            residency_df.loc[cpu] = 0.
+        df = self._df_tasks_cpus_runtime()
+        task_ids_df = df.index.to_frame(index=False)
+        df = df.iloc[df_filter_task_ids(task_ids_df, [task_id]).index]
 
-        residency_df.sort_index(inplace=True)
+        residency_df = pd.DataFrame({"runtime": df.sum()})
+        residency_df.index.name = "cpu"
 
         return residency_df
 
-    @df_task_total_residency.used_events
+    @_df_tasks_cpus_runtime.used_events
     def df_tasks_total_residency(self, tasks=None, ascending=False, count=None):
         """
         DataFrame of tasks execution time on each CPU
@@ -471,17 +501,24 @@ class TasksAnalysis(TraceAnalysisBase):
         """
         if tasks is None:
             tasks = list(self.trace.get_tasks().keys())
-        res_df = pd.DataFrame()
 
-        task_ids = itertools.chain.from_iterable(
+        task_ids = list(itertools.chain.from_iterable(
             self.trace.get_task_ids(task)
             for task in tasks
+        ))
+
+        # Tasks that never ran get a row of zeros
+        res_df = self._df_tasks_cpus_runtime().reindex(
+            pd.MultiIndex.from_tuples(
+                [
+                    (task_id.pid, task_id.comm[:TASK_COMM_MAX_LEN])
+                    for task_id in task_ids
+                ],
+                names=['pid', 'comm'],
+            ),
+            fill_value=0.,
         )
-
-        for task_id in task_ids:
-            mapping = {'runtime': str(task_id)}
-            _df = self.trace.analysis.tasks.df_task_total_residency(task_id).T.rename(index=mapping)
-            res_df = res_df.append(_df)
+        res_df.index = [str(task_id) for task_id in task_ids]
 
         res_df['Total'] = res_df.iloc[:, :].sum(axis=1)
         res_df.sort_values(by='Total', ascending=ascending, inplace=True)
@@ -522,33 +559,55 @@ class TasksAnalysis(TraceAnalysisBase):
 
         df = self.df_task_states(task)
 
-        def f(state):
-            if state == TaskState.TASK_ACTIVE:
-                return active_value
-            else:
-                return sleep_value
-
         if cpu is not None:
             df = df[df['cpu'] == cpu]
 
-        df['active'] = df['curr_state'].map(f)
-        df = df[['active', 'cpu']]
+        active = StepSignal(
+            df.index.values,
+            np.where(
+                df['curr_state'] == TaskState.TASK_ACTIVE,
+                active_value,
+                sleep_value,
+            ),
+        )
+        cpus = StepSignal.from_series(df['cpu'])
 
         # Only keep first occurence of each adjacent duplicates, since we get
         # events when the signal changes
-        df = df_deduplicate(df, consecutives=True, keep='first')
+        keep = np.ones(len(active), dtype=bool)
+        keep[1:] = (
+            (active.values[1:] != active.values[:-1]) |
+            (cpus.values[1:] != cpus.values[:-1])
+        )
+        active = StepSignal(active.index[keep], active.values[keep])
+        cpus = StepSignal(cpus.index[keep], cpus.values[keep])
 
-        # Once we removed the duplicates, we can compute the time spent while sleeping or activating
-        df['duration'] = df.index.to_series().diff().shift(-1)
+        # Once we removed the duplicates, we can compute the time spent while
+        # sleeping or activating. The duration of the last step is unknown.
+        duration = active.durations(end=np.nan)
 
-        sleep = df[df['active'] == sleep_value]['duration']
-        active = df[df['active'] == active_value]['duration']
+        is_sleep = active.values == sleep_value
+        is_active = active.values == active_value
+        sleep_index = active.index[is_sleep]
+        sleep = duration[is_sleep]
         # Pair an activation time with it's following sleep time
-        active = active.reindex_like(sleep, method='ffill')
-
-        df['duty_cycle'] = active / (active + sleep)
-        df['duty_cycle'].fillna(inplace=True, method='ffill')
-        df['duty_cycle'] = df['duty_cycle'].shift(-1)
+        activation = StepSignal(active.index[is_active], duration[is_active])
+        activation = activation.at(sleep_index)
+
+        duty_cycle = activation / (activation + sleep)
+        defined = ~np.isnan(duty_cycle)
+        duty_cycle = StepSignal(sleep_index[defined], duty_cycle[defined])
+        duty_cycle = duty_cycle.at(active.index)
+
+        df = pd.DataFrame(
+            {
+                'active': active.values,
+                'cpu': cpus.values,
+                'duration': duration,
+                'duty_cycle': np.append(duty_cycle[1:], np.nan),
+            },
+            index=pd.Index(active.index, name=df.index.name),
+        )
 
         return df
 
@@ -683,9 +742,9 @@ class TasksAnalysis(TraceAnalysisBase):
         if target_cpus:
             df = df[df.target_cpu.isin(target_cpus)]
 
-        series = series_rolling_apply(df["target_cpu"],
-                                      lambda x: x.count() / (window if per_sec else 1),
-                                      window, window_float_index=False, center=True)
+        series = series_rolling_agg(df["target_cpu"], window, 'count', center=True)
+        if per_sec:
+            series /= window
 
         series.plot(ax=axis, legend=False)
 
@@ -748,9 +807,9 @@ class TasksAnalysis(TraceAnalysisBase):
         if target_cpus:
             df = df[df.target_cpu.isin(target_cpus)]
 
-        series = series_rolling_apply(df["target_cpu"],
-                                      lambda x: x.count() / (window if per_sec else 1),
-                                      window, window_float_index=False, center=True)
+        series = series_rolling_agg(df["target_cpu"], window, 'count', center=True)
+        if per_sec:
+            series /= window
 
         series.plot(ax=axis, legend=False)
 
@@ -67,6 +67,106 @@ class DeferredValue:
         return '<lazy value of {}>'.format(self.callback.__qualname__)
 
 
+class FrozenMapping(Mapping):
+    """
+    Read-only view of a mapping, without copying it.
+
+    Nested mappings and lists are also returned as read-only views when
+    accessed.
+
+    :param mapping: Mapping to provide a view of.
+    :type mapping: collections.abc.Mapping
+    """
+
+    __slots__ = ('_mapping',)
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+    def __getitem__(self, key):
+        return _freeze_val(self._mapping[key])
+
+    def __contains__(self, key):
+        return key in self._mapping
+
+    def __iter__(self):
+        return iter(self._mapping)
+
+    def __len__(self):
+        return len(self._mapping)
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenMapping):
+            other = other._mapping
+        return self._mapping == other
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._mapping)
+
+    def thaw(self):
+        """
+        Return a mutable deep copy of the underlying mapping.
+        """
+        return copy.deepcopy(self._mapping)
+
+
+class FrozenSequence(Sequence):
+    """
+    Read-only view of a list, without copying it.
+
+    Nested mappings and lists are also returned as read-only views when
+    accessed.
+
+    :param seq: Sequence to provide a view of.
+    :type seq: collections.abc.Sequence
+    """
+
+    __slots__ = ('_seq',)
+
+    def __init__(self, seq):
+        self._seq = seq
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return FrozenSequence(self._seq[idx])
+        else:
+            return _freeze_val(self._seq[idx])
+
+    def __len__(self):
+        return len(self._seq)
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenSequence):
+            other = other._seq
+        return self._seq == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._seq)
+
+    def thaw(self):
+        """
+        Return a mutable deep copy of the underlying sequence.
+        """
+        return copy.deepcopy(self._seq)
+
+
+def _freeze_val(val):
+    """
+    Wrap mutable containers in a read-only view. Other values are returned
+    as-is.
+    """
+    if isinstance(val, dict):
+        return FrozenMapping(val)
+    elif isinstance(val, list):
+        return FrozenSequence(val)
+    elif isinstance(val, set):
+        return frozenset(val)
+    else:
+        return val
+
+
 class KeyDescBase(abc.ABC):
     """
     Base class for configuration files key descriptor.
@@ -388,9 +488,7 @@ class LevelKeyDesc(KeyDescBase, Mapping):
         for key_desc in self.children:
             key_desc.parent = self
 
-    @property
-    def _key_map(self):
-        return {
+        self._key_map = {
             key_desc.name: key_desc
             for key_desc in self.children
         }
@@ -402,8 +500,12 @@ class LevelKeyDesc(KeyDescBase, Mapping):
         return len(self._key_map)
 
     def __getitem__(self, key):
-        self.check_allowed_key(key)
-        return self._key_map[key]
+        try:
+            return self._key_map[key]
+        # Raise a more helpful exception
+        except KeyError:
+            self.check_allowed_key(key)
+            raise
 
     def check_allowed_key(self, key):
         """
@@ -754,12 +856,22 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
         """
         pass
 
+    serialized_placeholders = {
+        '_resolved_src': {},
+    }
+
     DEFAULT_SRC = {}
     """
     Source added automatically using :meth:`add_src` under the name 'default'
     when instances are built.
     """
 
+    FROZEN_VALUES = False
+    """
+    Default value of the ``frozen`` parameter of :meth:`get_key`, which is
+    also used by the indexing operator ``self[key]``.
+    """
+
     def __init__(self, conf=None, src='user', add_default_src=True):
         self._nested_init(
             structure=self.STRUCTURE,
@@ -790,6 +902,8 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
         "Key/value map of leaf values"
         self._sublevel_map = {}
         "Key/sublevel map of nested configuration objects"
+        self._resolved_src = {}
+        "Cache of the source resolved for each leaf key"
 
         # Build the tree of objects for nested configuration mappings
         for key, key_desc in self._structure.items():
@@ -979,6 +1093,8 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
             else:
                 self._src_prio.insert(0, src)
 
+        self._resolved_src.clear()
+
     def set_default_src(self, src_prio):
         """
         Set the default source priority list.
@@ -992,6 +1108,7 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
 
         # Make a copy of the list to make sure it is not modified behind our back
         self._src_prio = list(src_prio)
+        self._resolved_src.clear()
         for sublevel in self._sublevel_map.values():
             sublevel.set_default_src(src_prio)
 
@@ -1043,6 +1160,8 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
             else:
                 self._src_override[key] = src_prio
 
+            self._resolved_src.pop(key, None)
+
     def _get_nested_src_override(self):
         # Make a copy to avoid modifying it
         override = copy.copy(self._src_override)
@@ -1098,6 +1217,13 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
         """
         Get the source name that will be used to serve the value of ``key``.
         """
+        # Derived keys are never cached, since their source depends on other
+        # levels of the configuration
+        try:
+            return self._resolved_src[key]
+        except KeyError:
+            pass
+
         key_desc = self._structure[key]
 
         if isinstance(key_desc, LevelKeyDesc):
@@ -1110,7 +1236,10 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
         # default prio list
         src_prio = self._resolve_prio(key)
         if src_prio:
-            return src_prio[0]
+            src = src_prio[0]
+            if not isinstance(key_desc, DerivedKeyDesc):
+                self._resolved_src[key] = src
+            return src
         else:
             key = key_desc.qualname
             raise KeyError('Could not find any source for key "{key}"'.format(
@@ -1190,9 +1319,10 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
         kwargs['quiet'] = True
         return self.get_key(*args, **kwargs)
 
-    def get_key(self, key, src=None, eval_deferred=True, quiet=False):
+    def get_key(self, key, src=None, eval_deferred=True, quiet=False, frozen=None):
         """
-        Get the value of the given key. It returns a deepcopy of the value.
+        Get the value of the given key. It returns a deepcopy of the value,
+        unless ``frozen=True``.
 
         :param key: name of the key to lookup
         :type key: str
@@ -1207,6 +1337,15 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
         :param quiet: Avoid logging the access
         :type quiet: bool
 
+        :param frozen: If True, return a read-only view of the stored value
+            instead of a deepcopy, which avoids copying large values.
+            Dictionaries and lists are respectively wrapped in
+            :class:`FrozenMapping` and :class:`FrozenSequence`, which can be
+            turned back into mutable copies using their ``thaw()`` method.
+            Other objects are returned as-is and must not be modified. If
+            ``None``, :attr:`FROZEN_VALUES` is used.
+        :type frozen: bool or None
+
         .. note:: Using the indexing operator ``self[key]`` is preferable in
             most cases , but this method provides more parameters.
         """
@@ -1254,8 +1393,13 @@ class MultiSrcConf(MultiSrcConfABC, Loggable, Mapping):
                 lineno=lineno if lineno else '<unknown>',
             ))
 
+        if frozen is None:
+            frozen = self.FROZEN_VALUES
+
         if isinstance(val, DeferredValue):
             return val
+        elif frozen:
+            return _freeze_val(val)
         else:
             return copy.deepcopy(val)
 
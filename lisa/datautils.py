@@ -18,6 +18,7 @@
 import functools
 import operator
 import math
+from collections.abc import Mapping
 
 import numpy as np
 import pandas as pd
@@ -152,23 +153,64 @@ def df_squash(df, start, end, column='delta'):
         16.2  .6   0
 
     :returns: a new df that fits the above description
+
+    .. seealso:: :func:`df_squash_windows` to squash a lot of windows at once.
     """
     if df.empty:
         return df
 
-    end = min(end, df.index[-1] + df[column].values[-1])
-    res_df = pd.DataFrame(data=[], columns=df.columns)
+    squashed = df_squash_windows(df, [(start, end)], column=column)
+    return squashed.droplevel(0)
 
-    if start > end:
-        return res_df
 
-    # There's a few things to keep in mind here, and it gets confusing
-    # even for the people who wrote the code. Let's write it down.
-    #
+def df_squash_windows(df, windows, column='delta'):
+    """
+    Same as :func:`df_squash` for a batch of windows.
+
+    :param df: Dataframe of deltas, as expected by :func:`df_squash`.
+    :type df: pandas.DataFrame
+
+    :param windows: Windows to squash ``df`` into. If a mapping is given, its
+        keys are used as window IDs, otherwise the position of the window in
+        the sequence is used.
+    :type windows: dict(object, tuple(float, float)) or
+        list(tuple(float, float))
+
+    :param column: Name of the column holding the deltas.
+    :type column: str
+
+    :returns: A :class:`pandas.DataFrame` with a two-level index, the outer
+        level being the window ID (named ``window``) and the inner level being
+        the timestamps. The rows of each window are the ones :func:`df_squash`
+        would return for it.
+
+    .. note:: This runs in ``O(log(len(df)))`` per window plus the size of the
+        output, which makes it suitable to squash a dataframe into e.g. all
+        the phases of an rt-app workload.
+    """
+    if isinstance(windows, Mapping):
+        ids, windows = zip(*windows.items()) if windows else ((), ())
+    else:
+        windows = list(windows)
+        ids = range(len(windows))
+
+    ids = np.array(ids, dtype=object) if ids else np.array([], dtype=object)
+    windows = np.array(windows, dtype='float64').reshape(-1, 2)
+    starts = windows[:, 0]
+
+    index = df.index
+    times = index.values
+    deltas = df[column].values
+    size = len(index)
+
+    if size:
+        # Nothing can happen after the end of the last event
+        ends = np.fmin(windows[:, 1], times[-1] + deltas[-1])
+    else:
+        ends = windows[:, 1]
+
     # It's assumed that the data is continuous, i.e. for any row 'r' within
-    # the trace interval, we will find a new row at (r.index + r.len)
-    # For us this means we'll never end up with an empty dataframe
-    # (if we started with a non empty one)
+    # the trace interval, we will find a new row at (r.index + r.len).
     #
     # What's we're manipulating looks like this:
     # (| = events; [ & ] = start,end slice)
@@ -183,32 +225,59 @@ def df_squash(df, start, end, column='delta'):
     # This takes care of the case where s1 isn't in the interval
     # If s1 is in the interval, we just need to cap its len to
     # s1 - e1.index
+    valid = starts <= ends
+
+    # [first, last) are the positions of the rows inside [start, end]
+    first = times.searchsorted(starts, side='left')
+    last = times.searchsorted(ends, side='right')
+    has_middle = valid & (last > first)
+
+    def at(pos):
+        return times[np.clip(pos, 0, max(size - 1, 0))] if size else pos
+
+    start_in_middle = has_middle & (at(first) == starts)
+    # e0 is pushed at the start of the window if it exists
+    has_init = valid & (first > 0) & ~start_in_middle
+    # e_last and s1 collide, ditch e_last
+    end_in_middle = has_middle & (at(last - 1) == ends)
+    middle_end = np.where(
+        end_in_middle,
+        times.searchsorted(ends, side='left'),
+        last,
+    )
+    middle_len = np.where(has_middle, middle_end - first, 0)
+
+    # Build the positions of all the selected rows in one go
+    counts = has_init + middle_len
+    window_pos = np.repeat(np.arange(len(counts)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    pos = (first - has_init)[window_pos] + offset
+
+    is_init = has_init[window_pos] & (offset == 0)
+    # Only the last middle row of windows which end is not an event needs to
+    # be capped
+    is_last = np.zeros_like(is_init)
+    to_cap = has_middle & ~end_in_middle
+    is_last[np.cumsum(counts)[to_cap] - 1] = True
+
+    new_times = times[pos].copy()
+    new_times[is_init] = starts[window_pos[is_init]]
+
+    new_deltas = deltas[pos].astype('float64')
+    e1 = np.where(has_middle, at(first), ends)
+    new_deltas[is_init] = (np.fmin(e1, ends) - starts)[window_pos[is_init]]
+    new_deltas[is_last] = np.fmin(
+        ends[window_pos[is_last]] - new_times[is_last],
+        new_deltas[is_last],
+    )
 
-    prev_df = df[:start]
-    middle_df = df[start:end]
-
-    # Tweak the closest previous event to include it in the slice
-    if not prev_df.empty and not (start in middle_df.index):
-        res_df = res_df.append(prev_df.tail(1))
-        res_df.index = [start]
-        e1 = end
-
-        if not middle_df.empty:
-            e1 = middle_df.index[0]
-
-        res_df[column] = min(e1 - start, end - start)
-
-    if not middle_df.empty:
-        res_df = res_df.append(middle_df)
-        if end in res_df.index:
-            # e_last and s1 collide, ditch e_last
-            res_df = res_df.drop([end])
-        else:
-            # Fix the delta for the last row
-            delta = min(end - res_df.index[-1], res_df[column].values[-1])
-            res_df.at[res_df.index[-1], column] = delta
-
-    return res_df
+    squashed = df.iloc[pos].copy()
+    squashed[column] = new_deltas
+    squashed.index = pd.MultiIndex.from_arrays(
+        [ids[window_pos], new_times],
+        names=['window', index.name],
+    )
+    return squashed
 
 
 def df_filter(df, filter_columns):
@@ -456,6 +525,329 @@ def series_mean(y, x=None, **kwargs):
     return integral / (x.max() - x.min())
 
 
+def _df_integrate(df, x, by, sign, method, rect_step, window):
+    """
+    Integrate the columns of ``df`` for each group of rows.
+
+    :returns: A tuple ``(area, x, keys)`` where ``area`` is a
+        :class:`pandas.DataFrame` indexed by group key, with one column per
+        integrated column, ``x`` is the array of x values clipped to
+        ``window`` and ``keys`` the array of group keys of each row.
+    """
+    if x is None:
+        x = df.index
+    x = np.asarray(x, dtype=np.float64)
+
+    if by is None:
+        keys = np.zeros(len(df), dtype=int)
+        ys = df
+    else:
+        keys = df[by].values
+        ys = df.drop(columns=by)
+
+    if sign == "+":
+        ys = ys.clip(lower=0)
+    elif sign == "-":
+        ys = ys.clip(upper=0)
+    elif sign is None:
+        pass
+    else:
+        raise ValueError('Unsupported "sign": {}'.format(sign))
+
+    start, end = window if window is not None else (None, None)
+    start = -np.inf if start is None else start
+    end = np.inf if end is None else end
+    x_clipped = np.clip(x, start, end)
+
+    def shift(values, keys, periods):
+        # Shift the values inside each group, using positional indexing
+        return pd.Series(values).groupby(keys, sort=False).shift(periods).values
+
+    if method == 'rect':
+        if rect_step == 'post':
+            dx = shift(x_clipped, keys, -1) - x_clipped
+        elif rect_step == 'pre':
+            dx = x_clipped - shift(x_clipped, keys, 1)
+        else:
+            raise ValueError('Unsupported "rect_step": {}'.format(rect_step))
+
+        # The first or last row of each group has no width
+        dx = np.nan_to_num(dx)
+        area = pd.DataFrame(ys.values * dx[:, None], columns=ys.columns)
+        area = area.groupby(keys).sum()
+
+    elif method == 'trapz':
+        area = {}
+        for col in ys.columns:
+            # Rows with NaN are ignored, as with series_integrate()
+            y = ys[col].values.astype(np.float64)
+            defined = ~np.isnan(y)
+            _x = x[defined]
+            _y = y[defined]
+            _keys = keys[defined]
+
+            x_next = shift(_x, _keys, -1)
+            y_next = shift(_y, _keys, -1)
+
+            # Linear interpolation of the segments, clipped to the window
+            u = np.clip(_x, start, end)
+            v = np.clip(x_next, start, end)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                slope = (y_next - _y) / (x_next - _x)
+                y_u = _y + slope * (u - _x)
+                y_v = _y + slope * (v - _x)
+                col_area = (y_u + y_v) / 2 * (v - u)
+                col_area = np.where(v > u, col_area, 0)
+
+            area[col] = pd.Series(col_area).groupby(_keys).sum()
+
+        area = pd.DataFrame(area, columns=ys.columns)
+        area = area.reindex(pd.unique(keys)).sort_index().fillna(0)
+
+    else:
+        raise ValueError('Unsupported integration method: {}'.format(method))
+
+    if by is not None:
+        area.index.name = by
+
+    return (area, x_clipped, keys)
+
+
+def df_integrate(df, x=None, sign=None, method='rect', rect_step='post', by=None, window=None):
+    """
+    Compute the integral of all the columns of a dataframe with respect to
+    `x`, in one pass.
+
+    :returns: A :class:`pandas.Series` with the integral of each column. If
+        ``by`` is used, a :class:`pandas.DataFrame` indexed by the values of
+        the ``by`` column, with one column per integrated column.
+
+    :param df: Dataframe with the data to integrate.
+    :type df: pandas.DataFrame
+
+    :param x: Series with the `x` data. If ``None``, the index of `df` will be
+        used.
+    :type x: pandas.Series or None
+
+    :param sign: Same as for :func:`series_integrate`.
+    :type sign: str or None
+
+    :param method: Same as for :func:`series_integrate`, among ``rect`` and
+        ``trapz``.
+    :type method: str
+
+    :param rect_step: Same as for :func:`series_integrate`.
+    :type rect_step: str
+
+    :param by: Name of a column of a long dataframe used to split the rows in
+        groups. Each group is integrated separately, as if it was a separate
+        series.
+    :type by: str or None
+
+    :param window: Only integrate over the ``(start, end)`` interval. The
+        segments crossing the bounds of the window are cut. ``None`` bounds
+        extend to the data.
+    :type window: tuple(float or None, float or None) or None
+
+    This gives the same results as calling :func:`series_integrate` on each
+    column (and on each group), but in a single vectorized pass.
+    """
+    area, _, _ = _df_integrate(df, x, by, sign, method, rect_step, window)
+    if by is None:
+        if area.empty:
+            return pd.Series(0, index=df.columns, dtype=np.float64)
+        else:
+            return area.iloc[0]
+    else:
+        return area
+
+
+def df_mean(df, x=None, sign=None, method='rect', rect_step='post', by=None, window=None):
+    """
+    Compute the average of all the columns of a dataframe by integrating with
+    respect to `x` and dividing by the range of `x`, in one pass.
+
+    :returns: Same as :func:`df_integrate`.
+
+    The parameters are the same as for :func:`df_integrate`. If ``by`` is
+    used, the range of `x` is computed for each group. If ``window`` is used,
+    the range of `x` is clipped to the window.
+    """
+    area, x, keys = _df_integrate(df, x, by, sign, method, rect_step, window)
+    x = pd.Series(x).groupby(keys)
+    mean = area.div(x.max() - x.min(), axis=0)
+
+    if by is None:
+        if mean.empty:
+            return pd.Series(np.nan, index=df.columns)
+        else:
+            return mean.iloc[0]
+    else:
+        return mean
+
+
+class StepSignal:
+    """
+    Square wave signal, backed by :mod:`numpy` arrays.
+
+    :param index: Sorted timestamps at which the signal takes a new value.
+    :type index: numpy.ndarray
+
+    :param values: Value of the signal from the corresponding timestamp until
+        the next one.
+    :type values: numpy.ndarray
+
+    This is a lightweight alternative to a :class:`pandas.Series` for signals
+    that only change value on events, such as the active state of a CPU. The
+    signal is undefined before its first timestamp.
+
+    Signals can be combined with the ``&``, ``|`` and ``^`` operators, with
+    either a scalar or another :class:`StepSignal`. In the latter case, the
+    result is defined on the union of both indices, starting from the first
+    timestamp where both signals are defined.
+    """
+
+    __slots__ = ['index', 'values']
+
+    def __init__(self, index, values):
+        index = np.asarray(index)
+        values = np.asarray(values)
+        if index.shape != values.shape:
+            raise ValueError('Index and values must have the same shape: {} != {}'.format(
+                index.shape, values.shape))
+
+        self.index = index
+        self.values = values
+
+    @classmethod
+    def from_series(cls, series):
+        """
+        Build a signal from a :class:`pandas.Series` indexed by time.
+        """
+        return cls(series.index.values, series.values)
+
+    def to_series(self, name=None):
+        """
+        Convert the signal to a :class:`pandas.Series`.
+        """
+        return pd.Series(self.values, index=self.index, name=name)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __repr__(self):
+        return '{}({!r}, {!r})'.format(self.__class__.__qualname__, self.index, self.values)
+
+    def at(self, index, fill_value=np.nan):
+        """
+        Values of the signal at the given timestamps.
+
+        :param index: Timestamps to sample the signal at.
+        :type index: numpy.ndarray
+
+        :param fill_value: Value used for timestamps before the beginning of
+            the signal.
+        :type fill_value: object
+        """
+        index = np.asarray(index)
+        if not len(self):
+            return np.full(index.shape, fill_value)
+
+        pos = np.searchsorted(self.index, index, side='right') - 1
+        before = pos < 0
+        values = self.values[np.clip(pos, 0, None)]
+        if before.any():
+            values = np.where(before, fill_value, values)
+
+        return values
+
+    @staticmethod
+    def align(signals, fill_value=np.nan):
+        """
+        Sample a list of signals on the union of their indices.
+
+        :param signals: Signals to align
+        :type signals: list(StepSignal)
+
+        :param fill_value: Value used before the beginning of each signal.
+        :type fill_value: object
+
+        :returns: A tuple ``(index, values)``, where ``values`` is a list of
+            arrays, one per signal.
+        """
+        index = np.unique(np.concatenate([signal.index for signal in signals]))
+        return (index, [signal.at(index, fill_value) for signal in signals])
+
+    @classmethod
+    def combine(cls, signals, func, fill_value=np.nan):
+        """
+        Combine signals with a function.
+
+        :param signals: Signals to combine.
+        :type signals: list(StepSignal)
+
+        :param func: Function called with the aligned values of each signal,
+            as positional parameters. It must return an array of the
+            same length.
+        :type func: collections.abc.Callable
+
+        :param fill_value: Forwarded to :meth:`align`.
+        :type fill_value: object
+        """
+        index, values = cls.align(signals, fill_value)
+        return cls(index, func(*values))
+
+    def _apply_op(self, other, op):
+        if isinstance(other, StepSignal):
+            if not (len(self) and len(other)):
+                return self.__class__([], [])
+
+            # The result is only defined when both signals are defined
+            start = max(self.index[0], other.index[0])
+            index, values = self.align([self, other], fill_value=0)
+            defined = index >= start
+            return self.__class__(
+                index[defined],
+                op(*(_values[defined] for _values in values)),
+            )
+        else:
+            return self.__class__(self.index, op(self.values, other))
+
+    def __and__(self, other):
+        return self._apply_op(other, operator.and_)
+
+    def __or__(self, other):
+        return self._apply_op(other, operator.or_)
+
+    def __xor__(self, other):
+        return self._apply_op(other, operator.xor)
+
+    def durations(self, end=None):
+        """
+        Duration of each step of the signal.
+
+        :param end: End of the last step. If ``None``, the last step lasts 0.
+        :type end: float or None
+        """
+        last = self.index[-1:] if end is None else [end]
+        return np.diff(self.index, append=last)
+
+    def integrate(self, end=None):
+        """
+        Integral of the signal, ignoring undefined values.
+
+        This is equivalent to :func:`series_integrate` with the ``rect``
+        method and ``post`` step.
+
+        :param end: Forwarded to :meth:`durations`.
+        :type end: float or None
+        """
+        if not len(self):
+            return 0
+
+        return np.nansum(self.values * self.durations(end))
+
+
 def series_window(series, window, method='inclusive', clip_window=False):
     """
     Select a portion of a :class:`pandas.Series`
@@ -565,51 +957,39 @@ def df_window_signals(df, window, signal_cols, compress_init=False):
     .. seealso:: :func:`df_split_signals`
     """
 
-    def signal_in_window(signal_df, window):
-        start = window[0]
-        index = signal_df.index
-        signal_start, signal_end = index[0], index[-1]
-        # Signals are encoded as transitions, so as soon as we a transition
-        # inside the window, we know that the signal is relevant
-        return signal_start <= start <= signal_end
-
-    # Get the value of each signal at the beginning of the window
-    signal_df_list = [
-        df_window(signal_df, window, method='pre')
-        for signal, signal_df in df_split_signals(df, signal_cols, align_start=False)
-        # Only consider the signal that are in the window. Signals that started
-        # after the window are irrelevant.
-        if signal_in_window(signal_df, window)
-    ]
-
+    start = window[0]
     windowed_df = df_window(df, window, method='pre')
 
-    if compress_init:
-        def make_init_df_index(init_df):
-            # Yield a sequence of numbers incrementing by the smallest amount
-            # possible
-            def smallest_increment(start, length):
-                curr = start
-                for _ in range(length):
-                    curr = np.nextafter(curr, -math.inf)
-                    yield curr
-
-            index = list(smallest_increment(windowed_df.index[0], len(init_df)))
-            index = pd.Float64Index(reversed(index))
-            return index
-    else:
-        def make_init_df_index(init_df):
-            return init_df.index
+    # Rows of all signals up to the beginning of the window. The last one of
+    # each signal holds its value at the beginning of the window.
+    before_df = df[df.index <= start]
+    init_df = before_df.groupby(signal_cols, sort=False).tail(1)
+
+    # Only consider the signals that are in the window. Signals are encoded as
+    # transitions, so signals that ended before the window are irrelevant (and
+    # signals that started after the window have no rows in init_df anyway).
+    after_keys = pd.MultiIndex.from_frame(df.loc[df.index >= start, signal_cols])
+    init_keys = pd.MultiIndex.from_frame(init_df[signal_cols])
+    init_df = init_df[init_keys.isin(after_keys)]
 
     # Get the last row before the beginning the window for each signal, in
-    # timestamp order
-    init_df = pd.concat(
-        # First row of the dataframe
-        signal_df.iloc[0:1]
-        for signal_df in sorted(signal_df_list, key=lambda df: df.index[0])
-    )
+    # timestamp order. Ties are broken by signal identification values.
+    init_df = init_df.sort_values(signal_cols, kind='mergesort')
+    init_df = init_df.sort_index(kind='mergesort')
+
+    if compress_init:
+        # Yield a sequence of numbers incrementing by the smallest amount
+        # possible
+        def smallest_increment(start, length):
+            curr = start
+            for _ in range(length):
+                curr = np.nextafter(curr, -math.inf)
+                yield curr
+
+        index = list(smallest_increment(windowed_df.index[0], len(init_df)))
+        init_df = init_df.copy(deep=False)
+        init_df.index = pd.Float64Index(reversed(index))
 
-    init_df.index = make_init_df_index(init_df)
     return pd.concat([init_df, windowed_df])
 
 
@@ -758,6 +1138,142 @@ def series_tunnel_mean(series):
     return (maxs_mean - mins_mean) / 2 + mins_mean
 
 
+def _rolling_window_bounds(index, window):
+    """
+    Compute the first row of the rolling windows ending at each row of
+    ``index``, with the same semantic as
+    :meth:`pandas.Series.rolling` with a time-based window.
+
+    :returns: A tuple ``(index_ns, start)`` where ``index_ns`` is the index
+        converted to integer nanoseconds and ``start`` the array of the first
+        row of the window ending at the corresponding row.
+    """
+    index_ns = pd.to_timedelta(index, unit='s').values.astype('int64')
+    window_ns = int(window * 1e9)
+    # Time-based rolling windows are closed on the right and open on the left
+    start = np.searchsorted(index_ns, index_ns - window_ns, side='right')
+    return (index_ns, start)
+
+
+def _rolling_cumsum(values):
+    """
+    Cumulative sum with a leading 0, so that the sum of ``values[i:j]`` is
+    ``cumsum[j] - cumsum[i]``.
+    """
+    return np.concatenate([[0], np.cumsum(values)])
+
+
+def series_rolling_agg(series, window, agg, center=False):
+    """
+    Compute an aggregation of a series over a rolling time window.
+
+    Unlike :func:`series_rolling_apply`, no Python function is called per
+    window. Sums, counts and integrals are computed from cumulative sums and
+    the window boundaries are found with :func:`numpy.searchsorted`, which
+    makes it suitable for dense signals.
+
+    :returns: The series of aggregated values.
+
+    :param series: Series to act on, indexed by time in seconds.
+    :type series: pandas.Series
+
+    :param window: Rolling window width in seconds. The window ending at a
+        given row includes the rows with a timestamp in ``(t - window, t]``,
+        as for :meth:`pandas.Series.rolling`.
+    :type window: float
+
+    :param agg: Aggregation to compute. ``NaN`` values are ignored. Can be one
+        of:
+
+        * ``count``: number of values in the window.
+        * ``sum``: sum of the values in the window.
+        * ``mean``: mean of the values in the window.
+        * ``min``: minimum of the values in the window.
+        * ``max``: maximum of the values in the window.
+        * ``integral``: integral of the series over ``[t - window, t]``,
+          considered as a square wave (see :func:`series_integrate` with the
+          ``rect`` method and ``post`` step). The part of the window before
+          the first row is not accounted for.
+        * ``time_weighted_mean``: ``integral`` divided by the duration of the
+          part of the window where the series is defined.
+
+    :type agg: str
+
+    :param center: Label values with the center of the window, rather than the
+        highest index in it.
+    :type center: bool
+    """
+    orig_index = series.index
+    if series.empty:
+        return pd.Series([], index=orig_index, dtype=np.float64)
+
+    values = series.values.astype(np.float64)
+    is_nan = np.isnan(values)
+    values_0 = np.where(is_nan, 0, values)
+
+    if agg in ('min', 'max'):
+        # pandas already implements these efficiently for time-based windows
+        index = pd.to_timedelta(orig_index, unit='s')
+        rolling = pd.Series(values, index=index).rolling('{}ns'.format(int(window * 1e9)))
+        result = getattr(rolling, agg)().values
+    else:
+        index_ns, start = _rolling_window_bounds(orig_index, window)
+        end = np.arange(1, len(values) + 1)
+
+        if agg in ('count', 'sum', 'mean'):
+            count_cumsum = _rolling_cumsum(~is_nan)
+            count = count_cumsum[end] - count_cumsum[start]
+
+            if agg == 'count':
+                result = count.astype(np.float64)
+            else:
+                cumsum = _rolling_cumsum(values_0)
+                total = cumsum[end] - cumsum[start]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    if agg == 'sum':
+                        result = np.where(count > 0, total, np.nan)
+                    else:
+                        result = total / count
+
+        elif agg in ('integral', 'time_weighted_mean'):
+            index = orig_index.values.astype(np.float64)
+            # Integral of the square wave from the first row to each row
+            area = _rolling_cumsum(values_0[:-1] * np.diff(index))
+            window_start = np.maximum(index - window, index[0])
+            # Row in which each window starts
+            row = np.searchsorted(index, window_start, side='right') - 1
+            start_area = area[row] + values_0[row] * (window_start - index[row])
+            result = area - start_area
+
+            if agg == 'time_weighted_mean':
+                duration = index - window_start
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    # Zero-width windows take the value of the series
+                    result = np.where(duration > 0, result / duration, values)
+        else:
+            raise ValueError('Unsupported aggregation: {}'.format(agg))
+
+    if center:
+        new_index = orig_index - (window / 2)
+    else:
+        new_index = orig_index
+
+    return pd.Series(result, index=new_index)
+
+
+# Functions that can be replaced by an aggregation of series_rolling_agg()
+_ROLLING_AGGS = {
+    np.mean: 'mean',
+    np.sum: 'sum',
+    np.min: 'min',
+    np.max: 'max',
+    pd.Series.mean: 'mean',
+    pd.Series.sum: 'sum',
+    pd.Series.min: 'min',
+    pd.Series.max: 'max',
+}
+
+
 def series_rolling_apply(series, func, window, window_float_index=True, center=False):
     """
     Apply a function on a rolling window of a series.
@@ -768,8 +1284,10 @@ def series_rolling_apply(series, func, window, window_float_index=True, center=F
     :type series: pandas.Series
 
     :param func: Function to apply on each window. It must take a
-        :class:`pandas.Series` as only parameter and return one value.
-    :type func: collections.abc.Callable
+        :class:`pandas.Series` as only parameter and return one value. The
+        name of an aggregation supported by :func:`series_rolling_agg` can also
+        be passed.
+    :type func: collections.abc.Callable or str
 
     :param window: Rolling window width in seconds.
     :type window: float
@@ -783,7 +1301,24 @@ def series_rolling_apply(series, func, window, window_float_index=True, center=F
         recommended if the index is not used by ``func`` since it will remove
         the need for a conversion.
     :type window_float_index: bool
+
+    .. note:: Calling a Python function for each window is slow. If ``func`` is
+        a reducer known by :func:`series_rolling_agg` such as
+        :func:`numpy.mean` or :meth:`pandas.Series.max`,
+        :func:`series_rolling_agg` is used instead.
     """
+    if isinstance(func, str):
+        agg = func
+    else:
+        try:
+            agg = _ROLLING_AGGS.get(func)
+        # Unhashable callable
+        except TypeError:
+            agg = None
+
+    if agg is not None:
+        return series_rolling_agg(series, window, agg, center=center)
+
     orig_index = series.index
 
     # Wrap the func to turn the index into nanosecond Float64Index
@@ -880,4 +1415,45 @@ def df_deduplicate(df, keep, consecutives, cols=None, all_col=True):
     """
     return _data_deduplicate(df, keep=keep, consecutives=consecutives, cols=cols, all_col=all_col)
 
+
+def df_compact_dtypes(df, max_category_ratio=0.5):
+    """
+    Convert the columns of a dataframe to more memory-efficient dtypes.
+
+    * Integer columns are narrowed to the smallest signed integer dtype able
+      to hold their values.
+    * String columns are converted to :class:`pandas.CategoricalDtype` when
+      they contain few unique values compared to the number of rows.
+
+    :param df: Dataframe to convert.
+    :type df: pandas.DataFrame
+
+    :param max_category_ratio: Maximum ratio between the number of unique
+        values and the number of rows for a string column to be converted to
+        a categorical.
+    :type max_category_ratio: float
+
+    :returns: A new dataframe. Columns that are not converted share their
+        data with ``df``.
+
+    .. note:: Arithmetic on narrowed integer columns can overflow, and
+        grouping on categorical columns lists unobserved categories unless
+        ``observed=True`` is used.
+    """
+    df = df.copy(deep=False)
+    size = len(df)
+    for col in df.columns:
+        series = df[col]
+        dtype = series.dtype
+        if pd.api.types.is_integer_dtype(dtype):
+            df[col] = pd.to_numeric(series, downcast='integer')
+        elif (
+            pd.api.types.is_object_dtype(dtype)
+            and pd.api.types.infer_dtype(series, skipna=True) == 'string'
+            and series.nunique() <= max_category_ratio * size
+        ):
+            df[col] = series.astype('category')
+
+    return df
+
 # vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab
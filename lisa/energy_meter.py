@@ -37,7 +37,7 @@ import pandas as pd
 import devlib
 
 from lisa.utils import Loggable, get_subclasses, ArtifactPath, HideExekallID
-from lisa.datautils import series_integrate
+from lisa.datautils import df_integrate
 from lisa.conf import (
     SimpleMultiSrcConf, KeyDesc, TopLevelKeyDesc, Configurable,
     StrList, FloatList
@@ -295,11 +295,9 @@ class _DevlibContinuousEnergyMeter(EnergyMeter):
         return df
 
     def _compute_energy(self, df):
-        channels_nrg = {}
-        for site, measure in df:
-            if measure == 'power':
-                channels_nrg[site] = series_integrate(df[site]['power'], method='trapz')
-        return channels_nrg
+        power = df.loc[:, df.columns.get_level_values(1) == 'power']
+        power.columns = power.columns.get_level_values(0)
+        return df_integrate(power, method='trapz').to_dict()
 
 
 class AEPConf(SimpleMultiSrcConf, HideExekallID):
@@ -17,6 +17,7 @@
 
 from collections import namedtuple, OrderedDict, defaultdict
 from itertools import product
+import itertools
 import logging
 import operator
 import warnings
@@ -683,6 +684,556 @@ class EnergyModel(Serializable, Loggable):
         return self._estimate_from_active_time(cpu_active_time,
                                                freqs, idle_states, combine=True)
 
+    @staticmethod
+    def _lookup_table(mapping, keys, what):
+        """
+        Return a function mapping an array of keys of ``mapping`` to an array
+        of the corresponding values.
+
+        :param mapping: Function called on each key of ``mapping`` to get the
+            value to put in the table.
+        :type mapping: collections.abc.Callable
+
+        :param keys: Keys of the table.
+        :type keys: list
+
+        :param what: Name of the keys, used in error messages.
+        :type what: str
+        """
+        keys = np.array(keys)
+        values = np.array([mapping(key) for key in keys], dtype='float64')
+        order = np.argsort(keys)
+        keys = keys[order]
+        values = values[order]
+
+        def lookup(query):
+            query = np.asarray(query)
+            idx = np.searchsorted(keys, query).clip(0, len(keys) - 1)
+            invalid = keys[idx] != query
+            if invalid.any():
+                raise KeyError('Unknown {}: {}'.format(
+                    what, sorted(set(query[invalid].tolist()))))
+            return values[idx]
+
+        return lookup
+
+    @property
+    @memoized
+    def _node_tables(self):
+        """
+        Lookup tables for each :class:`EnergyModelNode` with energy data, used
+        by :meth:`estimate_from_cpu_util_batch`.
+
+        It is a list of tuples ``(node, active_power, idle_powers)`` where
+        ``active_power`` maps a frequency to its power, and ``idle_powers``
+        maps each CPU of the node to a table of the idle power of the node,
+        indexed with the idle state index of the CPU.
+        """
+        def make_idle_powers(node, cpu):
+            cpu_states = list(self.cpu_nodes[cpu].idle_states.keys())
+            # Undefined idle states are mapped to NaN, and will trigger an
+            # exception if they are used
+            return np.array([
+                node.idle_states.get(state, np.nan)
+                for state in cpu_states
+            ], dtype='float64')
+
+        return [
+            (
+                node,
+                self._lookup_table(
+                    lambda freq: node.active_states[freq].power,
+                    list(node.active_states.keys()),
+                    'frequency for {}'.format(node.name),
+                ),
+                {
+                    cpu: make_idle_powers(node, cpu)
+                    for cpu in node.cpus
+                },
+            )
+            for node in self.root.iter_nodes()
+            # Some nodes might not have energy model data, they could just be
+            # used to group other nodes (likely the root node, for example).
+            if node.active_states and node.idle_states
+        ]
+
+    @property
+    @memoized
+    def _cpu_capacity_tables(self):
+        """
+        Lookup tables mapping a frequency to the capacity of each CPU.
+        """
+        return [
+            self._lookup_table(
+                lambda freq: node.active_states[freq].capacity,
+                list(node.active_states.keys()),
+                'frequency for CPU{}'.format(cpu),
+            )
+            for cpu, node in enumerate(self.cpu_nodes)
+        ]
+
+    def _ideal_freqs_batch(self, cpu_utils, capacity_margin_pct):
+        """
+        Like :meth:`_guess_freqs_batch`, but with the frequency each CPU would
+        select regardless of the other CPUs of its frequency domain.
+        """
+        ideal_freqs = np.empty(cpu_utils.shape, dtype='int64')
+        overutilized = np.zeros(len(cpu_utils), dtype=bool)
+        margin = 100 / (100 - capacity_margin_pct)
+
+        for cpu, node in enumerate(self.cpu_nodes):
+            freqs = np.array(list(node.active_states.keys()))
+            caps = np.array([s.capacity for s in node.active_states.values()])
+
+            required_cap = cpu_utils[:, cpu] * margin
+            possible = caps[np.newaxis, :] >= required_cap[:, np.newaxis]
+            cpu_overutilized = ~possible.any(axis=1)
+
+            # Lowest frequency providing the required capacity, or the max
+            # freq if the CPU cannot provide it
+            cpu_freqs = np.where(possible, freqs, freqs.max()).min(axis=1)
+            ideal_freqs[:, cpu] = cpu_freqs
+            overutilized |= cpu_overutilized
+
+        return (ideal_freqs, overutilized)
+
+    def _guess_freqs_batch(self, cpu_utils, capacity_margin_pct):
+        """
+        Vectorized version of :meth:`_guess_freqs` operating on a 2D array of
+        ``cpu_utils``.
+
+        :returns: A tuple of a 2D array of frequencies, and of a 1D array of
+            booleans telling whether each ``cpu_utils`` overutilizes a CPU.
+        """
+        ideal_freqs, overutilized = self._ideal_freqs_batch(cpu_utils, capacity_margin_pct)
+
+        # Rectify the frequencies among domains
+        freqs = np.empty_like(ideal_freqs)
+        for domain in self.freq_domains:
+            domain = list(domain)
+            freqs[:, domain] = ideal_freqs[:, domain].max(axis=1)[:, np.newaxis]
+
+        return (freqs, overutilized)
+
+    def _deepest_idle_idxs_batch(self, cpus_active):
+        """
+        Vectorized version of :meth:`_deepest_idle_idxs` operating on a 2D
+        array of booleans.
+        """
+        idxs = np.empty(cpus_active.shape, dtype='int64')
+        for cpu, power_domain in enumerate(self.cpu_pds):
+            # A power domain only contributes its idle states if all the CPUs
+            # in it are idle. Since a power domain contains all the CPUs of its
+            # children, once a domain is active, all its parents are active too.
+            cpu_idxs = np.full(len(cpus_active), -1)
+            while power_domain:
+                pd_idle = ~cpus_active[:, list(power_domain.cpus)].any(axis=1)
+                cpu_idxs += pd_idle * len(power_domain.idle_states)
+                power_domain = power_domain.parent
+            idxs[:, cpu] = cpu_idxs
+
+        return idxs
+
+    def estimate_from_cpu_util_batch(self, cpu_utils, freqs=None, idle_idxs=None):
+        """
+        Vectorized version of :meth:`estimate_from_cpu_util`, estimating the
+        energy usage of many utilization distributions at once.
+
+        :param cpu_utils: 2D array with one utilization distribution per row,
+            and one column per CPU. See :ref:`cpu_utils <cpu-utils>`.
+        :type cpu_utils: numpy.ndarray
+
+        :param freqs: 2D array of CPU frequencies, with the same shape as
+            ``cpu_utils``. Guessed like :meth:`guess_freqs` by default.
+        :type freqs: numpy.ndarray
+
+        :param idle_idxs: 2D array of CPU idle states indices, with the same
+            shape as ``cpu_utils``. Negative values are treated as ``0``.
+            Guessed like :meth:`guess_idle_states` by default.
+        :type idle_idxs: numpy.ndarray
+
+        :returns: Dict with power in bogo-Watts (bW), like
+            :meth:`estimate_from_cpu_util`, but with an array of power values
+            instead of a single value for each node.
+        """
+        cpu_utils = np.asarray(cpu_utils, dtype='float64')
+        if cpu_utils.ndim != 2 or cpu_utils.shape[1] != len(self.cpus):
+            raise ValueError(
+                'cpu_utils must be a 2D array with one column per CPU ({})'.format(
+                    len(self.cpus)))
+
+        if freqs is None:
+            freqs, _ = self._guess_freqs_batch(cpu_utils, capacity_margin_pct=0)
+        else:
+            freqs = np.asarray(freqs)
+
+        if idle_idxs is None:
+            idle_idxs = self._deepest_idle_idxs_batch(cpu_utils != 0)
+        idle_idxs = np.maximum(np.asarray(idle_idxs), 0)
+
+        for cpu, node in enumerate(self.cpu_nodes):
+            if (idle_idxs[:, cpu] >= len(node.idle_states)).any():
+                raise KeyError('No idle state with index {} for CPU{}'.format(
+                    idle_idxs[:, cpu].max(), cpu))
+
+        cpu_active_time = np.empty_like(cpu_utils)
+        for cpu, lookup in enumerate(self._cpu_capacity_tables):
+            cap = lookup(freqs[:, cpu])
+            cpu_active_time[:, cpu] = np.minimum(cpu_utils[:, cpu] / cap, 1.0)
+
+        assert ((0.0 <= cpu_active_time) & (cpu_active_time <= 1.0)).all()
+
+        ret = {}
+        for node, active_power, idle_powers in self._node_tables:
+            cpus = list(node.cpus)
+            # For now we assume topology nodes with energy models do not overlap
+            # with frequency domains
+            freq = freqs[:, cpus[0]]
+
+            # The active time of a node is estimated as the max of the active
+            # times of its children.
+            active_time = cpu_active_time[:, cpus].max(axis=1)
+
+            idle_power = np.max([
+                idle_powers[cpu][idle_idxs[:, cpu]]
+                for cpu in cpus
+            ], axis=0)
+            if np.isnan(idle_power).any():
+                raise KeyError('Idle state not defined for {}'.format(node.name))
+
+            ret[node.cpus] = (
+                active_power(freq) * active_time +
+                idle_power * (1 - active_time)
+            )
+
+        return ret
+
+    @property
+    @memoized
+    def _node_bound_tables(self):
+        """
+        Tables for each :class:`EnergyModelNode` with energy data, used by
+        :meth:`_estimate_lower_bound_batch`.
+
+        It is a list of tuples ``(cpus, freqs, active_powers, cpu_caps,
+        min_idle_power, busy_idle_powers, util_powers)`` where ``cpu_caps`` is
+        the capacity of each CPU of the node at each frequency,
+        ``busy_idle_powers`` is the idle power of the node when each of its
+        CPUs is busy, and ``util_powers`` is the minimum power added by each
+        unit of utilization at each frequency for nodes of a single CPU, or
+        ``None``.
+        """
+        def make_table(node, idle_powers):
+            cpus = list(node.cpus)
+            freqs = np.array(sorted(node.active_states.keys()))
+            active_powers = np.array([
+                node.active_states[freq].power
+                for freq in freqs
+            ], dtype='float64')
+            cpu_caps = np.array([
+                self._cpu_capacity_tables[cpu](freqs)
+                for cpu in cpus
+            ])
+            idle_powers = [idle_powers[cpu] for cpu in cpus]
+            # The idle power of a node is the max of the idle power of its
+            # CPUs, so it cannot be lower than this
+            min_idle_power = max(np.nanmin(powers) for powers in idle_powers)
+            # Busy CPUs are in their shallowest idle state
+            busy_idle_powers = np.array([
+                powers[0] if not np.isnan(powers[0]) else -np.inf
+                for powers in idle_powers
+            ])
+
+            if len(cpus) == 1:
+                max_idle_power = np.nanmax(idle_powers[0])
+                util_powers = (active_powers - max_idle_power) / cpu_caps[0]
+            else:
+                util_powers = None
+
+            return (cpus, freqs, active_powers, cpu_caps, min_idle_power,
+                    busy_idle_powers, util_powers)
+
+        return [
+            make_table(node, idle_powers)
+            for node, _, idle_powers in self._node_tables
+        ]
+
+    def _estimate_lower_bound_batch(self, cpu_utils, capacity_margin_pct, remaining_utils=()):
+        """
+        Lower bound of the energy estimated by
+        :meth:`estimate_from_cpu_util_batch` for any utilization distribution
+        obtained by adding the utilization of tasks to ``cpu_utils``.
+
+        :param remaining_utils: Utilizations of the tasks still to be placed,
+            in decreasing order.
+        :type remaining_utils: list(int)
+
+        Adding utilization can only increase the frequency, the active time of
+        the nodes at a given frequency, and the idle power of the nodes, so
+        each node is bounded independently using the lowest power it could
+        have with any frequency that could be selected. Since the power of a
+        CPU node is linear in its utilization, the remaining utilization then
+        adds at least the lowest power per unit of utilization of any CPU.
+        """
+        remaining_util = sum(remaining_utils)
+
+        def get_bound(freqs):
+            bound = np.zeros(len(cpu_utils))
+            util_power = np.full(len(cpu_utils), np.inf)
+            util_power_cpus = set()
+
+            for cpus, node_freqs, active_powers, cpu_caps, min_idle_power, busy_idle_powers, util_powers in self._node_bound_tables:
+                possible_freqs = node_freqs >= freqs[:, [cpus[0]]]
+
+                # Active time of the node at each frequency
+                active_time = np.minimum(
+                    cpu_utils[:, cpus, np.newaxis] / cpu_caps[np.newaxis],
+                    1,
+                ).max(axis=1)
+
+                busy = cpu_utils[:, cpus] != 0
+                idle_power = np.maximum(
+                    min_idle_power,
+                    np.where(busy, busy_idle_powers, -np.inf).max(axis=1),
+                )[:, np.newaxis]
+
+                # The power is linear in the active time, which can only grow
+                # up to 1
+                power = np.minimum(
+                    active_powers,
+                    active_powers * active_time + idle_power * (1 - active_time),
+                )
+                bound += np.where(possible_freqs, power, np.inf).min(axis=1)
+
+                if util_powers is not None:
+                    util_power = np.minimum(
+                        util_power,
+                        np.where(possible_freqs, util_powers, np.inf).min(axis=1),
+                    )
+                    util_power_cpus.update(cpus)
+
+            # With a negative margin, the active time of a CPU can be capped to
+            # 1 so the additional utilization might not increase the power.
+            # CPUs without energy data would not consume anything either.
+            if capacity_margin_pct >= 0 and util_power_cpus == set(self.cpus):
+                bound += remaining_util * np.maximum(util_power, 0)
+
+            return bound
+
+        freqs, _ = self._guess_freqs_batch(cpu_utils, capacity_margin_pct)
+        if not remaining_utils:
+            return get_bound(freqs)
+
+        # The biggest remaining task will be placed in one of the frequency
+        # domains, which will at least run at the frequency required by that
+        # task on top of the CPU requiring the lowest frequency for it.
+        next_freqs, _ = self._ideal_freqs_batch(
+            cpu_utils + remaining_utils[0],
+            capacity_margin_pct,
+        )
+        bounds = []
+        for domain in self.freq_domains:
+            domain = list(domain)
+            domain_freqs = freqs.copy()
+            domain_freqs[:, domain] = np.maximum(
+                freqs[:, domain],
+                next_freqs[:, domain].min(axis=1)[:, np.newaxis],
+            )
+            bounds.append(get_bound(domain_freqs))
+
+        return np.min(bounds, axis=0)
+
+    @property
+    @memoized
+    def _symmetric_cpu_groups(self):
+        """
+        List of lists of CPUs that can be swapped without changing the energy
+        estimation.
+
+        Such CPUs are in the same frequency domain, have the same parent in
+        both the :class:`EnergyModelNode` and :class:`PowerDomain` trees, and
+        have the same energy data.
+        """
+        def key(cpu):
+            node = self.cpu_nodes[cpu]
+            power_domain = self.cpu_pds[cpu]
+            [freq_domain] = [
+                i
+                for i, domain in enumerate(self.freq_domains)
+                if cpu in domain
+            ]
+            return (
+                freq_domain,
+                id(node.parent),
+                tuple(node.active_states.items()),
+                tuple(node.idle_states.items()),
+                id(power_domain.parent),
+                tuple(power_domain.idle_states),
+            )
+
+        groups = OrderedDict()
+        for cpu in self.cpus:
+            groups.setdefault(key(cpu), []).append(cpu)
+
+        return list(groups.values())
+
+    @memoized
+    def _get_optimal_placements(self, task_utils, capacity_margin_pct):
+        """
+        Memoized implementation of :meth:`get_optimal_placements`, keyed on
+        the sorted utilization of the tasks since the task names don't matter.
+
+        The placements are found with a branch-and-bound search: tasks are
+        placed by decreasing utilization, and a partial placement is abandoned
+        as soon as :meth:`_estimate_lower_bound_batch` shows it cannot beat the
+        best complete placement found so far.
+        """
+        groups = self._symmetric_cpu_groups
+        # All CPUs in a group have the same capacity
+        max_caps = [self.cpu_nodes[group[0]].max_capacity for group in groups]
+        margin = 100 / (100 - capacity_margin_pct)
+        # Placing the biggest tasks first allows pruning earlier
+        task_utils = sorted(task_utils, reverse=True)
+
+        def make_cpu_utils(state):
+            util = [0 for _ in self.cpus]
+            for group, group_utils in zip(groups, state):
+                for cpu, cpu_util in zip(group, group_utils):
+                    util[cpu] = cpu_util
+            return util
+
+        # Columns of the flattened states in the CPU utilization arrays
+        state_cpus = list(itertools.chain.from_iterable(groups))
+
+        def make_utils_array(states):
+            utils = np.empty((len(states), len(self.cpus)), dtype='float64')
+            utils[:, state_cpus] = np.array([
+                list(itertools.chain.from_iterable(state))
+                for state in states
+            ], dtype='float64').reshape(len(states), len(state_cpus))
+            return utils
+
+        # Since CPUs in a group are interchangeable, the state of a group is
+        # represented by the decreasing utilizations of its CPUs, regardless of
+        # which CPU got which tasks.
+        def get_children(state, util):
+            for i, (group_utils, max_cap) in enumerate(zip(state, max_caps)):
+                for j, cpu_util in enumerate(group_utils):
+                    # CPUs with the same utilization are equivalent
+                    if j and group_utils[j - 1] == cpu_util:
+                        continue
+
+                    new_util = cpu_util + util
+                    # Utilization can only grow as tasks are placed, so an
+                    # overutilized CPU will stay overutilized
+                    if (new_util > self.capacity_scale or
+                            new_util * margin > max_cap):
+                        continue
+
+                    new_group_utils = sorted(
+                        group_utils[:j] + (new_util,) + group_utils[j + 1:],
+                        reverse=True,
+                    )
+                    yield state[:i] + (tuple(new_group_utils),) + state[i + 1:]
+
+        # Power of the complete placements that are not known to be worse
+        # than the best one
+        candidates = {}
+        min_power = np.inf
+
+        def is_pruned(bound):
+            # Allow for rounding errors, so that placements with the same
+            # energy as the best one are all found
+            return bound > min_power + abs(min_power) * 1e-9
+
+        def evaluate(states):
+            nonlocal min_power
+            utils = make_utils_array(states)
+            freqs, overutilized = self._guess_freqs_batch(utils, capacity_margin_pct)
+            power = sum(self.estimate_from_cpu_util_batch(utils, freqs=freqs).values())
+            power[overutilized] = np.inf
+            min_power = min(min_power, power.min())
+            candidates.update(
+                (state, state_power)
+                for state, state_power in zip(states, power)
+                if state_power != np.inf and not is_pruned(state_power)
+            )
+
+        def get_bounds(states, depth):
+            return self._estimate_lower_bound_batch(
+                make_utils_array(states),
+                capacity_margin_pct,
+                remaining_utils=task_utils[depth + 1:],
+            )
+
+        # Complete a placement by always picking the most promising child, to
+        # find good placements early and prune more of the search
+        def dive(state, depth):
+            children = list(set(get_children(state, task_utils[depth])))
+            if not children:
+                return False
+            elif depth == len(task_utils) - 1:
+                evaluate(children)
+                return True
+            else:
+                bounds = get_bounds(children, depth)
+                return any(
+                    dive(child, depth + 1)
+                    for bound, child in sorted(zip(bounds, children), key=operator.itemgetter(0))
+                    if not is_pruned(bound)
+                )
+
+        # Breadth-first search of all the placements, one task at a time. Each
+        # unique state is only explored once, and states that cannot beat the
+        # best complete placement found so far are abandoned.
+        states = [tuple((0,) * len(group) for group in groups)]
+        for depth, util in enumerate(task_utils):
+            states = list(set(itertools.chain.from_iterable(
+                get_children(state, util)
+                for state in states
+            )))
+            if not states:
+                break
+
+            if depth < len(task_utils) - 1:
+                bounds = get_bounds(states, depth)
+                # Look for a better placement if there might be one
+                best = bounds.argmin()
+                if not candidates or bounds[best] < min_power - abs(min_power) * 1e-9:
+                    dive(states[best], depth + 1)
+                states = [
+                    state
+                    for state, bound in zip(states, bounds)
+                    if not is_pruned(bound)
+                ]
+
+        if states:
+            evaluate(states)
+
+        if not candidates:
+            # The system can't provide full throughput to this workload.
+            raise EnergyModelCapacityError(
+                "Can't handle workload: total capacity = {}".format(
+                    sum(task_utils)))
+
+        # Whittle down to those that give the lowest energy estimate
+        optimal_states = [
+            state
+            for state, power in candidates.items()
+            if not is_pruned(power)
+        ]
+
+        # Expand the optimal states into all the equivalent CPU utilizations
+        placements = set()
+        for state in optimal_states:
+            for perms in product(*(
+                set(itertools.permutations(group_utils))
+                for group_utils in state
+            )):
+                placements.add(tuple(make_cpu_utils(perms)))
+
+        return sorted(placements, reverse=True)
+
     def get_optimal_placements(self, capacities, capacity_margin_pct=0):
         """Find the optimal distribution of work for a set of tasks
 
@@ -704,8 +1255,14 @@ class EnergyModel(Serializable, Loggable):
         states for CPUs.
 
         .. note::
-            This is a brute force search taking time exponential wrt. the number
-            of tasks.
+            The search only considers placements that are not equivalent to
+            each other: CPUs that are interchangeable in the energy model are
+            not distinguished, and placements overutilizing a CPU are pruned as
+            soon as possible. Placements that cannot beat the best one found
+            so far are also pruned, using a lower bound of their energy.
+            Results are memoized based on the utilization of the tasks. The
+            complexity is still exponential wrt. the number of tasks in the
+            worst case.
 
         :param capacities: Dict mapping tasks to expected utilization
                            values. These tasks are assumed not to change; they
@@ -717,54 +1274,11 @@ class EnergyModel(Serializable, Loggable):
                   under optimal task placements, see
                   :ref:`cpu_utils <cpu-utils>`. Multiple task placements
                   that result in the same CPU utilizations are considered
-                  equivalent.
+                  equivalent. The list is sorted in decreasing order, so that
+                  placements using the CPUs with the lowest IDs come first.
         """
-        tasks = list(capacities.keys())
-
-        num_candidates = len(self.cpus) ** len(tasks)
-
-        logger = self.get_logger()
-        logger.debug(
-            'Searching {} configurations for optimal task placement...'.format(
-            num_candidates
-        ))
-
-        candidates = {}
-        excluded = []
-        for cpus in product(self.cpus, repeat=len(tasks)):
-            placement = {task: cpu for task, cpu in zip(tasks, cpus)}
-
-            util = [0 for _ in self.cpus]
-            for task, cpu in list(placement.items()):
-                util[cpu] += capacities[task]
-            util = tuple(util)
-
-            # Filter out candidate placements that have tasks greater than max
-            # or that we have already determined that we cannot place.
-            if (any(u > self.capacity_scale for u in util) or util in excluded):
-                continue
-
-            if util not in candidates:
-                freqs, overutilized = self._guess_freqs(util, capacity_margin_pct)
-                if overutilized:
-                    # This isn't a valid placement
-                    excluded.append(util)
-                else:
-                    power = self.estimate_from_cpu_util(util, freqs=freqs)
-                    candidates[util] = sum(power.values())
-
-        if not candidates:
-            # The system can't provide full throughput to this workload.
-            raise EnergyModelCapacityError(
-                "Can't handle workload: total capacity = {}".format(
-                    sum(capacities.values())))
-
-        # Whittle down to those that give the lowest energy estimate
-        min_power = min(p for p in iter(candidates.values()))
-        ret = [u for u, p in candidates.items() if p == min_power]
-
-        logger.debug('done')
-        return ret
+        task_utils = tuple(sorted(capacities.values()))
+        return list(self._get_optimal_placements(task_utils, capacity_margin_pct))
 
     @classmethod
     def probe_target(cls, target):
@@ -866,59 +1380,51 @@ class EnergyModel(Serializable, Loggable):
         idle = trace.df_events('cpu_idle').pivot(columns='cpu_id')['state']
         freqs = trace.df_events('cpu_frequency').pivot(columns='cpu')['frequency']
 
-        inputs = pd.concat([idle, freqs], axis=1, keys=['idle', 'freq']).ffill()
+        inputs = pd.concat([idle, freqs], axis=1, keys=['idle', 'freq'])
+        inputs = inputs.sort_index().ffill()
 
         # Drop stuff at the beginning where we don't have the inputs
         # (e.g. where we have had our first cpu_idle event but no cpu_frequency)
         inputs = inputs.dropna()
         # Convert to int wholesale so we can do things like use the values in
-        # the inputs DataFrame as list indexes. The only reason we had floats
+        # the inputs DataFrame as array indexes. The only reason we had floats
         # was to make room for NaN, but we've just dropped all the NaNs, so
         # that's fine.
         inputs = inputs.astype(int)
         inputs = df_deduplicate(inputs, keep='first', consecutives=True)
 
-        memo_cache = {}
-
-        def f(input_row):
-            # The code in this module is slow. Try not to call it too much.
-            memo_key = tuple(input_row)
-            if memo_key in memo_cache:
-                return memo_cache[memo_key]
+        trace_idle_idxs = inputs['idle'][list(self.cpus)].to_numpy()
+        freqs = inputs['freq'][list(self.cpus)].to_numpy()
 
-            # cpuidle doesn't understand shared resources so it will claim to
-            # put a CPU into e.g. 'cluster sleep' while its cluster siblings are
-            # active. Rectify those false claims.
-            cpus_active = input_row['idle'] == -1
-            deepest_possible = self._deepest_idle_idxs(cpus_active)
-            idle_idxs = [min(i, j) for i, j in zip(deepest_possible,
-                                                   input_row['idle'])]
+        # cpuidle doesn't understand shared resources so it will claim to
+        # put a CPU into e.g. 'cluster sleep' while its cluster siblings are
+        # active. Rectify those false claims.
+        cpus_active = trace_idle_idxs == -1
+        deepest_possible = self._deepest_idle_idxs_batch(cpus_active)
+        idle_idxs = np.minimum(deepest_possible, trace_idle_idxs)
 
-            # Convert indexes to state names
-            idle_states = [n.idle_state_by_idx(max(i, 0))
-                           for n, i in zip(self.cpu_nodes, idle_idxs)]
+        # We don't use tracked load, we just treat a CPU as active or idle,
+        # so set util to 0 or 100%.
+        utils = cpus_active * self.capacity_scale
 
-            # We don't use tracked load, we just treat a CPU as active or idle,
-            # so set util to 0 or 100%.
-            utils = cpus_active * self.capacity_scale
-
-            nrg = self.estimate_from_cpu_util(cpu_utils=utils,
-                                              idle_states=idle_states,
-                                              freqs=input_row['freq'])
-
-            # nrg is a dict mapping CPU group tuples to energy values.
-            # Unfortunately tuples don't play nicely as pandas column labels
-            # because parts of its API treat that as nested indexing
-            # (i.e. df[(0, 1)] sometimes means df[0][1]). So we'll give them
-            # awkward names.
-
-            nrg = {'-'.join(str(c) for c in k): v for k, v in iter(nrg.items())}
-
-            ret = pd.Series(nrg)
-            memo_cache[memo_key] = ret
-            return ret
+        nrg = self.estimate_from_cpu_util_batch(
+            cpu_utils=utils,
+            freqs=freqs,
+            idle_idxs=idle_idxs,
+        )
 
-        return inputs.apply(f, axis=1)
+        # nrg is a dict mapping CPU group tuples to energy values.
+        # Unfortunately tuples don't play nicely as pandas column labels
+        # because parts of its API treat that as nested indexing
+        # (i.e. df[(0, 1)] sometimes means df[0][1]). So we'll give them
+        # awkward names.
+        return pd.DataFrame(
+            {
+                '-'.join(str(c) for c in k): v
+                for k, v in nrg.items()
+            },
+            index=inputs.index,
+        )
 
     @classmethod
     def _get_idle_states_name(cls, target, cpu):
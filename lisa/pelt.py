@@ -20,6 +20,12 @@ import math
 import pandas as pd
 import numpy as np
 
+# numba is an optional dependency used to compile the PELT simulation
+try:
+    import numba
+except ImportError:
+    numba = None
+
 PELT_WINDOW = 1024 * 1024 * 1e-9
 """
 PELT window in seconds.
@@ -33,6 +39,94 @@ PELT half-life in number of windows.
 PELT_SCALE = 1024
 
 
+def _simulate_pelt(activations, clock, delta, windows, bounds, inits, output, window, alpha):
+    """
+    PELT simulation engine.
+
+    All the series to simulate are concatenated in the input buffers, and
+    ``bounds`` gives the start offset of each of them, followed by the total
+    length. The signal is normalized to ``1``.
+
+    .. note:: This function is compiled with :mod:`numba` if available, so it
+        should only use the subset of Python it supports.
+    """
+    decay = 1 - alpha
+    for i in range(len(bounds) - 1):
+        # Accumulator of running time within a PELT window
+        acc = 0.0
+        # Output signal
+        signal = inits[i]
+        out = signal
+
+        for j in range(bounds[i], bounds[i + 1]):
+            # 1=running 0=sleeping
+            running = activations[j]
+            now = clock[j]
+            nr_windows = windows[j]
+
+            # We crossed one or more windows boundaries
+            if nr_windows:
+                # Handle last piece of the window in which this activation
+                # started
+                first_window_fraction = window - ((now - delta[j]) % window)
+                first_window_fraction /= window
+
+                acc += running * first_window_fraction
+                signal = alpha * acc + decay * signal
+
+                # Handle the windows we fully crossed, which is a geometric
+                # progression towards "running"
+                if nr_windows > 1:
+                    signal = running + (signal - running) * decay ** (nr_windows - 1)
+
+                # Handle the current incomplete window
+                last_window_fraction = (now % window) / window
+
+                # Extrapolate the signal as it would look with the same
+                # `running` state at the end of the current window
+                extrapolated = running * alpha + decay * signal
+                # Take an value between signal and extrapolated based on the
+                # current completion of the window. This implements the same
+                # idea as introduced by kernel commit:
+                #  sched/cfs: Make util/load_avg more stable 625ed2bf049d5a352c1bcca962d6e133454eaaff
+                out = signal + last_window_fraction * (extrapolated - signal)
+
+                signal += alpha * running * last_window_fraction
+                acc = 0.0
+            # If we are still in the same window, just accumulate the running
+            # time
+            else:
+                acc += running * delta[j] / window
+
+            output[j] = out
+
+
+if numba is None:
+    _simulate_pelt_jit = None
+else:
+    _simulate_pelt_jit = numba.njit(cache=True, nogil=True)(_simulate_pelt)
+
+
+def _make_pelt_df(activations, index, clock, window):
+    if index is not None:
+        activations = activations.reindex(index, method='ffill')
+
+    df = pd.DataFrame({'activations': activations})
+    df['clock'] = clock if clock is not None else df.index
+    df['delta'] = df['clock'].diff()
+
+    # Compute the number of crossed PELT windows between each sample Since PELT
+    # windowing is not time invariant (windows are at "millisecond"
+    # boundaries), we need non-normalized timestamps
+    window_series = df['clock'] // window
+    df['crossed_windows'] = window_series.diff()
+
+    # First row of "delta" is NaN, and activations reindex may have produced
+    # some NaN at the beginning of the dataframe as well
+    df.dropna(inplace=True)
+    return df
+
+
 def simulate_pelt(activations, init=0, index=None, clock=None, window=PELT_WINDOW, half_life=PELT_HALF_LIFE, scale=PELT_SCALE):
     """
     Simulate a PELT signal out of a series of activations.
@@ -70,88 +164,115 @@ def simulate_pelt(activations, init=0, index=None, clock=None, window=PELT_WINDO
         Also note that the kernel uses integer arithmetic with a different way
         of computing the signal. This means that the simulation cannot
         perfectly match the kernel's signal.
-    """
-    if index is not None:
-        activations = activations.reindex(index, method='ffill')
 
-    df = pd.DataFrame({'activations': activations})
-    df['clock'] = clock if clock is not None else df.index
-    df['delta'] = df['clock'].diff()
+    .. note:: The simulation is compiled with :mod:`numba` if it is
+        installed, and is otherwise carried out by a pure Python loop over
+        plain buffers.
 
-    # Compute the number of crossed PELT windows between each sample Since PELT
-    # windowing is not time invariant (windows are at "millisecond"
-    # boundaries), we need non-normalized timestamps
-    window_series = df['clock'] // window
-    df['crossed_windows'] = window_series.diff()
-
-    # First row of "delta" is NaN, and activations reindex may have produced
-    # some NaN at the beginning of the dataframe as well
-    df.dropna(inplace=True)
+    .. seealso:: :func:`simulate_pelt_batch` to simulate multiple signals
+        at once.
+    """
+    return simulate_pelt_batch(
+        [activations],
+        init=init,
+        index=[index],
+        clock=[clock],
+        window=window,
+        half_life=half_life,
+        scale=scale,
+    )[0]
 
-    def make_pelt_sim(init, scale, window, half_life):
-        decay = (1 / 2)**(1 / half_life)
-        # Alpha as defined in https://en.wikipedia.org/wiki/Moving_average
-        alpha = 1 - decay
 
-        # Accumulator of running time within a PELT window
-        acc = 0
-        # Output signal
-        signal = init / scale
-        output = signal
+def simulate_pelt_batch(activations, init=0, index=None, clock=None, window=PELT_WINDOW, half_life=PELT_HALF_LIFE, scale=PELT_SCALE):
+    """
+    Simulate multiple PELT signals at once.
 
-        def pelt(row):
-            nonlocal acc, signal, output
+    This is equivalent to calling :func:`simulate_pelt` on each series of
+    activations, but the simulation engine is only invoked once for all of
+    them.
 
-            # 1=running 0=sleeping
-            running = row['activations']
-            clock = row['clock']
-            delta = row['delta']
-            windows = row['crossed_windows'].astype('int')
+    :param activations: List of series of activations, as expected by
+        :func:`simulate_pelt`.
+    :type activations: list(pandas.Series)
 
-            # We crossed one or more windows boundaries
-            if windows:
-                # Handle last piece of the window in which this activation started
-                first_window_fraction = window - ((clock - delta) % window)
-                first_window_fraction /= window
+    :param init: Initial value of the signals, or a list or array with one
+        initial value per series of activations.
+    :type init: float or list(float) or numpy.ndarray
 
-                acc += running * first_window_fraction
-                signal = alpha * acc + (1 - alpha) * signal
+    :param index: List of indexes at which the PELT values should be
+        computed, see :func:`simulate_pelt`. ``None`` items (or ``None``
+        instead of a list) will use the index of the activations.
+    :type index: list(pandas.Index) or None
 
-                # Handle the windows we fully crossed
-                for _ in range(windows - 1):
-                    signal = alpha * running + (1 - alpha) * signal
+    :param clock: List of clock series, see :func:`simulate_pelt`. ``None``
+        items (or ``None`` instead of a list) will use the timestamp index.
+    :type clock: list(pandas.Series) or None
 
-                # Handle the current incomplete window
-                last_window_fraction = (clock % window) / window
+    :param window: PELT window in seconds.
+    :type window: float
 
-                # Extrapolate the signal as it would look with the same
-                # `running` state at the end of the current window
-                extrapolated = running * alpha + (1 - alpha) * signal
-                # Take an value between signal and extrapolated based on the
-                # current completion of the window. This implements the same
-                # idea as introduced by kernel commit:
-                #  sched/cfs: Make util/load_avg more stable 625ed2bf049d5a352c1bcca962d6e133454eaaff
-                output = signal + last_window_fraction * (extrapolated - signal)
+    :param half_life: PELT half-life in number of windows.
+    :type half_life: int
 
-                signal += alpha * running * last_window_fraction
-                acc = 0
-            # If we are still in the same window, just accumulate the running
-            # time
-            else:
-                acc += running * delta / window
+    :param scale: Scale of the signal, i.e. maximum value it can take.
+    :type scale: float
 
-            return output * scale
+    :returns: A list of :class:`pandas.Series`, one for each series of
+        activations.
+    """
+    nr_series = len(activations)
+
+    if np.ndim(init) == 0:
+        init = [init] * nr_series
+    if index is None:
+        index = [None] * nr_series
+    if clock is None:
+        clock = [None] * nr_series
+
+    if not len(init) == len(index) == len(clock) == nr_series:
+        raise ValueError('init, index and clock must have one item per series of activations')
+
+    dfs = [
+        _make_pelt_df(_activations, _index, _clock, window)
+        for _activations, _index, _clock in zip(activations, index, clock)
+    ]
+
+    bounds = np.cumsum([0] + [len(df) for df in dfs], dtype='int64')
+    inits = np.array(init, dtype='float64') / scale
+    buffers = [
+        np.concatenate([
+            df[col].to_numpy(dtype=dtype)
+            for df in dfs
+        ]) if dfs else np.empty(0, dtype=dtype)
+        for col, dtype in (
+            ('activations', 'float64'),
+            ('clock', 'float64'),
+            ('delta', 'float64'),
+            ('crossed_windows', 'int64'),
+        )
+    ]
 
-        return pelt
+    decay = (1 / 2)**(1 / half_life)
+    # Alpha as defined in https://en.wikipedia.org/wiki/Moving_average
+    alpha = 1 - decay
 
-    sim = make_pelt_sim(
-        init=init,
-        window=window,
-        half_life=half_life,
-        scale=scale,
-    )
-    df['pelt'] = df.apply(sim, axis=1)
-    return df['pelt']
+    if _simulate_pelt_jit is None:
+        # Python lists are much faster to index than numpy arrays when not
+        # compiled
+        args = [x.tolist() for x in buffers + [bounds, inits]]
+        output = [0.0] * bounds[-1]
+        _simulate_pelt(*args, output, window, alpha)
+        output = np.array(output, dtype='float64')
+    else:
+        output = np.empty(bounds[-1], dtype='float64')
+        _simulate_pelt_jit(*buffers, bounds, inits, output, window, alpha)
+
+    output *= scale
+
+    return [
+        pd.Series(output[start:end], index=df.index, name='pelt')
+        for df, start, end in zip(dfs, bounds[:-1], bounds[1:])
+    ]
 
 
 def pelt_settling_time(margin=1, init=0, final=PELT_SCALE, window=PELT_WINDOW, half_life=PELT_HALF_LIFE, scale=PELT_SCALE):
@@ -17,6 +17,8 @@
 
 import re
 import functools
+import shlex
+import tempfile
 from collections.abc import Mapping
 
 from lisa.utils import HideExekallID, group_by_value
@@ -26,9 +28,11 @@ from lisa.conf import (
 )
 from lisa.energy_model import EnergyModel
 from lisa.wlgen.rta import RTA
+from lisa.target_script import TargetScript
 
 from devlib.target import KernelVersion, TypedKernelConfig
 from devlib.exception import TargetStableError
+from devlib.utils.misc import ranges_to_list
 
 
 def compute_capa_classes(conf):
@@ -92,7 +96,7 @@ class PlatformInfo(MultiSrcConf, HideExekallID):
     ))
     """Some keys have a reserved meaning with an associated type."""
 
-    def add_target_src(self, target, rta_calib_res_dir, src='target', only_missing=True, **kwargs):
+    def add_target_src(self, target, rta_calib_res_dir, src='target', only_missing=True, bulk_probe=True, **kwargs):
         """
         Add source from a live :class:`lisa.target.Target`.
 
@@ -111,6 +115,13 @@ class PlatformInfo(MultiSrcConf, HideExekallID):
             inconsistencies between user-provided values and autodetected values.
         :type only_missing: bool
 
+        :param bulk_probe: If ``True``, the per-CPU sysfs files needed for
+            ``freq-domains``, ``freqs`` and ``cpu-capacities`` are read using a
+            single script executed on the target, rather than one command per
+            file. This speeds up the connection to high-latency targets. Values
+            that cannot be found that way are retrieved using devlib as usual.
+        :type bulk_probe: bool
+
         :Variable keyword arguments: Forwarded to
             :class:`lisa.conf.MultiSrcConf.add_src`.
         """
@@ -129,18 +140,82 @@ class PlatformInfo(MultiSrcConf, HideExekallID):
             'cpus-count': lambda: target.number_of_cpus
         }
 
+        cpu_sysfs = '/sys/devices/system/cpu'
+        nr_cpus = target.number_of_cpus
+
+        def cpu_path(cpu, name):
+            return '{}/cpu{}/{}'.format(cpu_sysfs, cpu, name)
+
+        @functools.lru_cache(maxsize=None)
+        def read_sysfs():
+            if not bulk_probe:
+                return {}
+
+            paths = ['{}/online'.format(cpu_sysfs)] + [
+                cpu_path(cpu, name)
+                for cpu in range(nr_cpus)
+                for name in (
+                    'cpufreq/related_cpus',
+                    'cpufreq/scaling_available_frequencies',
+                    'cpufreq/stats/time_in_state',
+                    'cpu_capacity',
+                )
+            ]
+            return self._read_target_files(target, paths)
+
+        def from_sysfs(path, parse, fallback):
+            try:
+                content = read_sysfs()[path]
+            except KeyError:
+                return fallback()
+            else:
+                return parse(content)
+
+        def parse_ints(content):
+            return list(map(int, content.split()))
+
         def get_freq_domains():
             if target.is_module_available('cpufreq'):
-                return list(target.cpufreq.iter_domains())
+                def get_related_cpus(cpu):
+                    return from_sysfs(
+                        cpu_path(cpu, 'cpufreq/related_cpus'),
+                        parse_ints,
+                        lambda: target.cpufreq.get_related_cpus(cpu),
+                    )
+
+                # Same as devlib's CpufreqModule.iter_domains()
+                domains = []
+                cpus = set(range(nr_cpus))
+                while cpus:
+                    domain = get_related_cpus(next(iter(cpus)))
+                    domains.append(domain)
+                    cpus = cpus.difference(domain)
+                return domains
             else:
                 return None
 
         info['freq-domains'] = get_freq_domains
 
+        def list_frequencies(cpu):
+            # Same as devlib's CpufreqModule.list_frequencies()
+            def parse_time_in_state(content):
+                out_iter = iter(content.split())
+                return list(map(int, reversed([f for f, _ in zip(out_iter, out_iter)])))
+
+            return from_sysfs(
+                cpu_path(cpu, 'cpufreq/scaling_available_frequencies'),
+                parse_ints,
+                lambda: from_sysfs(
+                    cpu_path(cpu, 'cpufreq/stats/time_in_state'),
+                    parse_time_in_state,
+                    lambda: target.cpufreq.list_frequencies(cpu),
+                ),
+            )
+
         def get_freqs():
             if target.is_module_available('cpufreq'):
-                freqs = {cpu: target.cpufreq.list_frequencies(cpu)
-                        for cpu in range(target.number_of_cpus)}
+                freqs = {cpu: list_frequencies(cpu)
+                        for cpu in range(nr_cpus)}
                 # Only add the frequency info if there is any, otherwise don't
                 # mislead the client code with empty frequency list
                 if all(freqs.values()):
@@ -154,7 +229,26 @@ class PlatformInfo(MultiSrcConf, HideExekallID):
 
         def get_cpu_capacities():
             if target.is_module_available('sched'):
-                return target.sched.get_capacities(default=1024)
+                # Use the capacities exposed in sysfs if they are available
+                # for all online CPUs, otherwise let devlib look for other
+                # sources such as the sched domains energy model
+                online_cpus = from_sysfs(
+                    '{}/online'.format(cpu_sysfs),
+                    ranges_to_list,
+                    target.list_online_cpus,
+                )
+                sysfs = read_sysfs()
+                paths = {
+                    cpu: cpu_path(cpu, 'cpu_capacity')
+                    for cpu in online_cpus
+                }
+                if all(path in sysfs for path in paths.values()):
+                    return {
+                        cpu: int(sysfs[path])
+                        for cpu, path in paths.items()
+                    }
+                else:
+                    return target.sched.get_capacities(default=1024)
             else:
                 return None
 
@@ -193,6 +287,60 @@ class PlatformInfo(MultiSrcConf, HideExekallID):
             logger.error("Couldn't read target energy model: {}".format(err))
             return None
 
+    @classmethod
+    def _read_target_files(cls, target, paths):
+        """
+        Read the content of a list of files using a single script executed on
+        the target.
+
+        :returns: A dictionary of paths to their stripped content. Files that
+            could not be read are not present in the dictionary.
+        """
+        begin_marker = 'LISA_PROBE_BEGIN'
+        end_marker = 'LISA_PROBE_END'
+
+        logger = cls.get_logger()
+        logger.debug('Reading {} files from target'.format(len(paths)))
+
+        with tempfile.TemporaryDirectory() as local_dir:
+            script = TargetScript(target, 'lisa_platinfo_probe.sh', local_dir)
+            for path in paths:
+                # The script is executed with "set -e", so failures to read
+                # must not abort it
+                script.append(
+                    'echo {begin} {path}; ret=0; cat {path} 2>/dev/null || ret=$?; echo; echo {end} $ret'.format(
+                        begin=begin_marker,
+                        end=end_marker,
+                        path=shlex.quote(path),
+                    )
+                )
+
+            try:
+                script.push()
+                output = script.run()
+            except (TargetStableError, FileNotFoundError) as e:
+                logger.warning('Could not read files with a single script, falling back on individual reads: {}'.format(e))
+                return {}
+            finally:
+                if script.remote_path:
+                    try:
+                        target.remove(script.remote_path)
+                    except TargetStableError as e:
+                        logger.debug('Could not remove {}: {}'.format(script.remote_path, e))
+
+        regex = re.compile(
+            r'^{begin} (?P<path>.*?)\n(?P<content>.*?)^{end} (?P<ret>\d+)$'.format(
+                begin=begin_marker,
+                end=end_marker,
+            ),
+            re.MULTILINE | re.DOTALL,
+        )
+        return {
+            match.group('path'): match.group('content').strip()
+            for match in regex.finditer(output)
+            if int(match.group('ret')) == 0
+        }
+
     @classmethod
     def _read_kallsyms(cls, target):
         """
@@ -17,9 +17,9 @@
 
 import os
 import os.path
-from math import isnan
 import abc
 
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -226,27 +226,32 @@ class EASBehaviour(RTATestBundle):
         """
         task_utils_df = self._get_expected_task_utils_df(nrg_model)
 
-        data = []
-        index = []
+        # Placements are memoized by the energy model, so identical rows don't
+        # trigger a new search
+        expected_utils = [
+            nrg_model.get_optimal_placements(task_utils, capacity_margin_pct)[0]
+            for task_utils in task_utils_df.to_dict(orient='records')
+        ]
 
-        def exp_power(row):
-            task_utils = row.to_dict()
-            expected_utils = nrg_model.get_optimal_placements(task_utils, capacity_margin_pct)[0]
-            power = nrg_model.estimate_from_cpu_util(expected_utils)
-            columns = list(power.keys())
+        # Assemble a dataframe to plot the expected utilization
+        util_df = pd.DataFrame(expected_utils, index=task_utils_df.index)
+        self._plot_expected_util(util_df, nrg_model)
 
-            # Assemble a dataframe to plot the expected utilization
-            data.append(expected_utils)
-            index.append(row.name)
+        power = nrg_model.estimate_from_cpu_util_batch(util_df.to_numpy())
+        return self._make_power_df(power, util_df.index, nrg_model)
 
-            return pd.Series([power[c] for c in columns], index=columns)
-
-        res_df = self._sort_power_df_columns(
-            task_utils_df.apply(exp_power, axis=1), nrg_model)
-
-        self._plot_expected_util(pd.DataFrame(data, index=index), nrg_model)
-
-        return res_df
+    def _make_power_df(self, power, index, nrg_model):
+        """
+        Build a power DataFrame out of the output of
+        :meth:`lisa.energy_model.EnergyModel.estimate_from_cpu_util_batch`
+        """
+        columns = list(power.keys())
+        df = pd.DataFrame(
+            np.column_stack([power[c] for c in columns]),
+            index=index,
+            columns=columns,
+        )
+        return self._sort_power_df_columns(df, nrg_model)
 
     def _get_estimated_power_df(self, nrg_model):
         """
@@ -282,17 +287,18 @@ class EASBehaviour(RTATestBundle):
         df = df.sort_index().fillna(method='ffill')
 
         # Now make a DataFrame with the estimated power at each moment.
-        def est_power(row):
-            cpu_utils = [0 for cpu in nrg_model.cpus]
-            for task in tasks:
-                cpu = row['cpus'][task]
-                util = row['utils'][task]
-                if not isnan(cpu):
-                    cpu_utils[int(cpu)] += util
-            power = nrg_model.estimate_from_cpu_util(cpu_utils)
-            columns = list(power.keys())
-            return pd.Series([power[c] for c in columns], index=columns)
-        return self._sort_power_df_columns(df.apply(est_power, axis=1), nrg_model)
+        cpu_utils = np.zeros((len(df), len(nrg_model.cpus)))
+        for task in tasks:
+            cpus = df['cpus'][task].to_numpy()
+            running = ~np.isnan(cpus)
+            np.add.at(
+                cpu_utils,
+                (np.nonzero(running)[0], cpus[running].astype(int)),
+                df['utils'][task].to_numpy()[running],
+            )
+
+        power = nrg_model.estimate_from_cpu_util_batch(cpu_utils)
+        return self._make_power_df(power, df.index, nrg_model)
 
     @requires_events('sched_switch')
     @RTATestBundle.check_noisy_tasks(noise_threshold_pct=1)
@@ -25,13 +25,13 @@ from lisa.tests.base import (
     RTATestBundle, CannotCreateError
 )
 from lisa.target import Target
-from lisa.utils import ArtifactPath, groupby, ExekallTaggable
+from lisa.utils import ArtifactPath, groupby, ExekallTaggable, memoized
 from lisa.datautils import series_mean, df_window, df_filter_task_ids, series_tunnel_mean
 from lisa.wlgen.rta import RTA, Periodic, RTATask
 from lisa.trace import FtraceCollector, requires_events
 from lisa.analysis.load_tracking import LoadTrackingAnalysis
 from lisa.analysis.tasks import TasksAnalysis
-from lisa.pelt import PELT_SCALE, simulate_pelt, pelt_settling_time
+from lisa.pelt import PELT_SCALE, simulate_pelt, simulate_pelt_batch, pelt_settling_time
 
 UTIL_SCALE = PELT_SCALE
 
@@ -257,19 +257,13 @@ class InvarianceItem(LoadTrackingBase, ExekallTaggable):
 
     @LoadTrackingAnalysis.df_tasks_signal.used_events
     @TasksAnalysis.df_task_activation.used_events
-    def get_simulated_pelt(self, task, signal_name):
+    def _get_pelt_sim_params(self, task, signal_name):
         """
-        Simulate a PELT signal for a given task.
-
-        :param task: task to look for in the trace.
-        :type task: int or str or tuple(int, str)
-
-        :param signal_name: Name of the PELT signal to simulate.
-        :type signal_name: str
+        Get the parameters of :func:`lisa.pelt.simulate_pelt` to simulate the
+        PELT signal of a task.
 
-        :return: A :class:`pandas.DataFrame` with a ``simulated`` column
-            containing the simulated signal, along with the column of the
-            signal as found in the trace.
+        :returns: A tuple of the :class:`pandas.DataFrame` of the signal, and
+            a dictionary of parameters for :func:`lisa.pelt.simulate_pelt`.
         """
         logger = self.get_logger()
         trace = self.trace
@@ -305,7 +299,21 @@ class InvarianceItem(LoadTrackingBase, ExekallTaggable):
             logger.warning('PELT clock is not available, ftrace timestamp will be used at the expense of accuracy')
             clock = None
 
-        df['simulated'] = simulate_pelt(df_activation['active'], index=df.index, init=init, clock=clock)
+        params = dict(
+            activations=df_activation['active'],
+            index=df.index,
+            init=init,
+            clock=clock,
+        )
+        return (df, params)
+
+    def _add_simulated_pelt(self, df, signal_name, simulated):
+        """
+        Add the ``simulated`` and ``error`` columns to the dataframe returned
+        by :meth:`_get_pelt_sim_params`.
+        """
+        logger = self.get_logger()
+        df['simulated'] = simulated
 
         # Since load is now CPU invariant in recent kernel versions, we don't
         # rescale it back. To match the old behavior, that line is
@@ -324,6 +332,43 @@ class InvarianceItem(LoadTrackingBase, ExekallTaggable):
         df = df.dropna()
         return df
 
+    @property
+    @memoized
+    def _simulated_pelt_cache(self):
+        """
+        Simulated PELT signals, indexed by task ID and signal name.
+
+        Being memoized, this cache is not serialized along with the bundle.
+        """
+        return {}
+
+    @_get_pelt_sim_params.used_events
+    def get_simulated_pelt(self, task, signal_name):
+        """
+        Simulate a PELT signal for a given task.
+
+        :param task: task to look for in the trace.
+        :type task: int or str or tuple(int, str)
+
+        :param signal_name: Name of the PELT signal to simulate.
+        :type signal_name: str
+
+        :return: A :class:`pandas.DataFrame` with a ``simulated`` column
+            containing the simulated signal, along with the column of the
+            signal as found in the trace.
+
+        .. seealso:: :meth:`Invariance.get_simulated_pelts` to simulate the
+            signals of multiple items at once.
+        """
+        key = (self.trace.get_task_id(task), signal_name)
+        try:
+            return self._simulated_pelt_cache[key]
+        except KeyError:
+            df, params = self._get_pelt_sim_params(task, signal_name)
+            df = self._add_simulated_pelt(df, signal_name, simulate_pelt(**params))
+            self._simulated_pelt_cache[key] = df
+            return df
+
     def _plot_pelt(self, task, signal_name, simulated, test_name):
         trace = self.trace
 
@@ -599,6 +644,57 @@ class Invariance(TestBundle, LoadTrackingHelpers):
                 return item
         raise ValueError('No invariance item matching {cpu}@{freq}'.format(cpu, freq))
 
+    @InvarianceItem.get_simulated_pelt.used_events
+    def get_simulated_pelts(self, signal_name, items=None):
+        """
+        Simulate the PELT signal of the task of all the
+        :class:`InvarianceItem`.
+
+        The simulations that are not already cached by the items are carried
+        out in a single call to :func:`lisa.pelt.simulate_pelt_batch`, and
+        the result is cached so that subsequent calls to
+        :meth:`InvarianceItem.get_simulated_pelt` are free.
+
+        :param signal_name: Name of the PELT signal to simulate.
+        :type signal_name: str
+
+        :param items: Items to simulate the signal of. If ``None``, all the
+            items are used.
+        :type items: list(InvarianceItem) or None
+
+        :returns: A dictionary of :class:`InvarianceItem` to the dataframe
+            :meth:`InvarianceItem.get_simulated_pelt` would return.
+        """
+        items = self.invariance_items if items is None else items
+
+        def get_key(item):
+            return (item.trace.get_task_id(item.task_name), signal_name)
+
+        missing = [
+            item
+            for item in items
+            if get_key(item) not in item._simulated_pelt_cache
+        ]
+        if missing:
+            sim_params = [
+                item._get_pelt_sim_params(item.task_name, signal_name)
+                for item in missing
+            ]
+            params = {
+                param: [item_params[param] for _, item_params in sim_params]
+                for param in ('activations', 'index', 'init', 'clock')
+            }
+            simulated = simulate_pelt_batch(**params)
+
+            for item, (df, _), item_simulated in zip(missing, sim_params, simulated):
+                df = item._add_simulated_pelt(df, signal_name, item_simulated)
+                item._simulated_pelt_cache[get_key(item)] = df
+
+        return {
+            item: item._simulated_pelt_cache[get_key(item)]
+            for item in items
+        }
+
     # Combined version of some other tests, applied on all available
     # InvarianceItem with the result merged.
 
@@ -612,7 +708,7 @@ class Invariance(TestBundle, LoadTrackingHelpers):
                 mean_error_margin_pct=mean_error_margin_pct,
                 max_error_margin_pct=max_error_margin_pct,
             )
-        return self._test_all_freq(item_test)
+        return self._test_all_freq(item_test, 'util')
 
     @InvarianceItem.test_load_correctness.used_events
     def test_load_correctness(self, mean_error_margin_pct=2, max_error_margin_pct=5) -> AggregatedResultBundle:
@@ -624,7 +720,7 @@ class Invariance(TestBundle, LoadTrackingHelpers):
                 mean_error_margin_pct=mean_error_margin_pct,
                 max_error_margin_pct=max_error_margin_pct,
             )
-        return self._test_all_freq(item_test)
+        return self._test_all_freq(item_test, 'load')
 
     @InvarianceItem.test_util_behaviour.used_events
     def test_util_behaviour(self, error_margin_pct=5) -> AggregatedResultBundle:
@@ -635,7 +731,7 @@ class Invariance(TestBundle, LoadTrackingHelpers):
             return test_item.test_util_behaviour(
                 error_margin_pct=error_margin_pct,
             )
-        return self._test_all_freq(item_test)
+        return self._test_all_freq(item_test, 'util')
 
     @InvarianceItem.test_load_behaviour.used_events
     def test_load_behaviour(self, error_margin_pct=5) -> AggregatedResultBundle:
@@ -646,16 +742,21 @@ class Invariance(TestBundle, LoadTrackingHelpers):
             return test_item.test_load_behaviour(
                 error_margin_pct=error_margin_pct,
             )
-        return self._test_all_freq(item_test)
+        return self._test_all_freq(item_test, 'load')
 
-    def _test_all_freq(self, item_test):
+    @get_simulated_pelts.used_events
+    def _test_all_freq(self, item_test, signal_name):
         """
         Apply the `item_test` function on all instances of
         :class:`InvarianceItem` and aggregate the returned
         :class:`~lisa.tests.base.ResultBundle` into one.
 
+        The ``signal_name`` PELT signal of all the items is simulated
+        beforehand in one batch.
+
         :attr:`~lisa.tests.base.Result.UNDECIDED` is ignored.
         """
+        self.get_simulated_pelts(signal_name)
         item_res_bundles = [
             item_test(item)
             for item in self.invariance_items
@@ -685,6 +786,7 @@ class Invariance(TestBundle, LoadTrackingHelpers):
                 for item in item_group
                 if item.freq == max_freq
             ]
+            self.get_simulated_pelts('util', max_freq_items)
             for item in max_freq_items:
                 # Only test util, as it should be more robust
                 res = item.test_util_behaviour()
@@ -701,6 +803,7 @@ class Invariance(TestBundle, LoadTrackingHelpers):
         """
 
         logger = self.get_logger()
+        self.get_simulated_pelts('util')
 
         def make_group_bundle(cpu, item_group):
             bundle = AggregatedResultBundle(
@@ -20,7 +20,7 @@ import pandas as pd
 from devlib.module.sched import SchedDomain, SchedDomainFlag
 
 from lisa.utils import memoized, ArtifactPath
-from lisa.datautils import df_squash
+from lisa.datautils import df_squash, df_squash_windows
 from lisa.trace import Trace, FtraceConf, FtraceCollector, requires_events
 from lisa.wlgen.rta import Periodic
 from lisa.tests.base import RTATestBundle, Result, ResultBundle, CannotCreateError, TestMetric
@@ -244,29 +244,28 @@ class StaggeredFinishes(MisfitMigrationBase):
         return active_df
 
     @_get_active_df.used_events
-    def _max_idle_time(self, start, end, cpus):
+    def _max_idle_times(self, windows, cpus):
         """
-        :returns: The maximum idle time of 'cpus' in the [start, end] interval
+        :returns: A list with the maximum idle time of 'cpus' and the
+            corresponding CPU for each [start, end] window in ``windows``
         """
-        max_time = 0
-        max_cpu = 0
-
+        max_idle = {}
         for cpu in cpus:
             busy_df = self._get_active_df(cpu)
-            busy_df = df_squash(busy_df, start, end)
+            busy_df = df_squash_windows(busy_df, windows)
             busy_df = busy_df[busy_df.state == 0]
+            max_idle[cpu] = busy_df.delta.groupby(level='window').max()
 
-            if busy_df.empty:
-                continue
+        max_idle = pd.DataFrame(max_idle, index=range(len(windows)), columns=cpus)
+        max_idle = max_idle.fillna(0)
 
-            local_max = busy_df.delta.max()
-            if local_max > max_time:
-                max_time = local_max
-                max_cpu = cpu
+        max_time = max_idle.max(axis=1)
+        # CPU that first reached the maximum, or 0 if no CPU was idle
+        max_cpu = max_idle.idxmax(axis=1).where(max_time > 0, 0)
 
-        return max_time, max_cpu
+        return list(zip(max_time, max_cpu))
 
-    @_max_idle_time.used_events
+    @_max_idle_times.used_events
     def _test_cpus_busy(self, task_state_dfs, cpus, allowed_idle_time_s):
         """
         Test that for every window in which the tasks are running, :attr:`cpus`
@@ -279,8 +278,8 @@ class StaggeredFinishes(MisfitMigrationBase):
 
         for task, state_df in task_state_dfs.items():
             # Have a look at every task activation
-            task_idle_times = [self._max_idle_time(index, index + row.delta, cpus)
-                               for index, row in state_df.iterrows()]
+            windows = list(zip(state_df.index, state_df.index + state_df.delta))
+            task_idle_times = self._max_idle_times(windows, cpus)
 
             if not task_idle_times:
                 continue
@@ -32,6 +32,15 @@ import inspect
 import shlex
 import contextlib
 import tempfile
+import hashlib
+import mmap
+import weakref
+import re
+import subprocess
+import itertools
+import concurrent.futures
+import threading
+import time
 from functools import reduce, wraps
 from collections.abc import Iterable
 from collections import namedtuple
@@ -45,8 +54,10 @@ import devlib
 from devlib.target import KernelVersion
 
 from lisa.utils import Loggable, HideExekallID, memoized, deduplicate, deprecate, nullcontext
+from lisa.version import __version__ as lisa_version
 from lisa.platforms.platinfo import PlatformInfo
 from lisa.conf import SimpleMultiSrcConf, KeyDesc, TopLevelKeyDesc, StrList, Configurable
+from lisa.datautils import df_compact_dtypes
 
 
 class TaskID(namedtuple('TaskID', ('pid', 'comm'))):
@@ -187,48 +198,25 @@ class TraceView(Loggable, TraceBase):
 
       * :meth:`df_events` uses the underlying :meth:`lisa.trace.Trace.df_events`
         and trims the dataframe according to the given ``window`` before
-        returning it.
+        returning it. The trimmed dataframes are cached, and views created
+        for the same window on a given :class:`Trace` are shared.
       * ``self.start`` and ``self.end`` mimic the :class:`Trace` attributes but
         they are adjusted to match the given window. On top of this, this class
         mimics a regular :class:`Trace` using :func:`getattr`.
+      * The window bounds are computed using the timestamps of the first and
+        last occurrence of each event, so only the dataframes of the events
+        spanning across ``window[0]`` or ``window[1]`` are looked at.
     """
 
     def __init__(self, trace, window):
         super().__init__()
 
         self.base_trace = trace
+        # Dataframes trimmed to the window of the view, indexed by event name
+        self._df_events = {}
 
-        t_min = window[0]
-        t_max = window[1]
-
-        df_list = [
-            trace.df_events(event)
-            for event in trace.available_events
-        ]
-
-        if t_min is not None:
-            start = self.base_trace.end
-            for df in df_list:
-                df = df[t_min:]
-                if not df.empty:
-                    start = min(start, df.index[0])
-            t_min = start
-        else:
-            t_min = self.base_trace.start
-
-        if t_max is not None:
-            end = self.base_trace.start
-            for df in df_list:
-                df = df[:t_max]
-                if not df.empty:
-                    end = max(end, df.index[-1])
-            t_max = end
-        else:
-            t_max = self.base_trace.end
-
-        self.start = t_min
-        self.end = t_max
-        self.time_range = t_max - t_min
+        self.start, self.end = trace._get_window_bounds(window)
+        self.time_range = self.end - self.start
 
     def __getattr__(self, name):
         return getattr(self.base_trace, name)
@@ -241,11 +229,15 @@ class TraceView(Loggable, TraceBase):
         :param event: Trace event name
         :type event: str
         """
-        df = self.base_trace.df_events(event)
-        if not df.empty:
-            df = df[self.start:self.end]
+        try:
+            return self._df_events[event]
+        except KeyError:
+            df = self.base_trace.df_events(event)
+            if not df.empty:
+                df = df[self.start:self.end]
 
-        return df
+            self._df_events[event] = df
+            return df
 
     def get_view(self, window):
         start = self.start
@@ -260,6 +252,276 @@ class TraceView(Loggable, TraceBase):
         return self.base_trace.get_view((start, end))
 
 
+def _get_line_timestamp(line):
+    """
+    Get the timestamp of a text trace line in seconds, as computed by trappy.
+
+    :param line: Line of the trace
+    :type line: bytes
+
+    :returns: The timestamp, or ``None`` if the line is not a trace event.
+    """
+    match = trappy.ftrace.SPECIAL_FIELDS_RE.match(line.decode('utf-8', errors='replace'))
+    if not match:
+        return None
+
+    timestamp = float(match.group('timestamp'))
+    if not match.group('us'):
+        timestamp /= 1e9
+    return timestamp
+
+
+def _parse_txt(path, events):
+    """
+    Parse a text trace with trappy, without letting trappy cache the result.
+
+    :returns: A tuple of a dictionary of dataframes indexed by name, and the
+        number of lines seen by trappy.
+    """
+    disable_cache = trappy.FTrace.disable_cache
+    trappy.FTrace.disable_cache = True
+    try:
+        with warnings.catch_warnings():
+            # trappy complains about parsing .txt files
+            warnings.simplefilter('ignore')
+            ftrace = trappy.FTrace(path, scope="custom", events=events,
+                                   normalize_time=False)
+    finally:
+        trappy.FTrace.disable_cache = disable_cache
+
+    df_map = {}
+    for event in events:
+        name, _ = Trace._get_trappy_event(event)
+        df_map[name] = getattr(ftrace, name).data_frame
+
+    # trappy does not set it if there was nothing to parse
+    nr_lines = getattr(ftrace, 'lines', 0)
+    return (df_map, nr_lines)
+
+
+def _parse_txt_chunk(path, chunk, events):
+    """
+    Parse a byte range of a text trace with trappy.
+
+    This is run in worker processes by :meth:`Trace._parse_events_parallel`.
+
+    :returns: Same as :func:`_parse_txt`.
+    """
+    # Each worker works on its own temporary copy, so there is no point in
+    # letting trappy create its own cache for it.
+    start, end = chunk
+    with tempfile.TemporaryDirectory() as temp_dir:
+        chunk_path = os.path.join(temp_dir, 'trace.txt')
+        with open(path, 'rb') as src, open(chunk_path, 'wb') as dst:
+            src.seek(start)
+            remaining = end - start
+            while remaining:
+                data = src.read(min(remaining, 16 * 1024 * 1024))
+                dst.write(data)
+                remaining -= len(data)
+
+        return _parse_txt(chunk_path, events)
+
+
+class TraceCache(Loggable):
+    """
+    Persistent on-disk cache of the dataframes parsed from a trace file.
+
+    :param path: Folder in which the cache is stored. It is created if
+        necessary.
+    :type path: str
+
+    :param trace_path: Trace file the cache is associated with.
+    :type trace_path: str
+
+    Each event is stored in its own Parquet file, so that the cache can be
+    incrementally filled as new events are requested. Files are read back
+    using memory mapping, which makes reloading a previously-parsed trace
+    almost free.
+
+    The cache is invalidated when the content of the trace file, the LISA
+    version or the trappy version changes. The timestamps of the first and
+    last occurrence of each event are also recorded, so that a
+    :class:`Trace` can be created without loading any dataframe. The
+    dataframes are stored before
+    any LISA-specific post-processing, since it can depend on the
+    :class:`lisa.platforms.platinfo.PlatformInfo` used.
+
+    .. note:: Storing and loading dataframes requires ``pyarrow`` to be
+        installed.
+    """
+
+    METADATA_FILENAME = 'metadata.json'
+
+    FORMAT_VERSION = 1
+    """
+    Version of the on-disk layout, to be bumped on incompatible changes.
+    """
+
+    def __init__(self, path, trace_path):
+        self.path = path
+        self.trace_path = trace_path
+        self._metadata = self._load_metadata()
+
+    @staticmethod
+    def get_default_path(trace_path):
+        """
+        Default cache folder, alongside the trace file.
+        """
+        dirname, basename = os.path.split(os.path.abspath(trace_path))
+        return os.path.join(dirname, '.{}.lisa-cache'.format(basename))
+
+    def _get_trace_id(self):
+        """
+        Metadata used to check that the cache matches the trace.
+        """
+        md5 = hashlib.md5()
+        with open(self.trace_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                md5.update(chunk)
+
+        return {
+            'cache-format': self.FORMAT_VERSION,
+            'trace-md5': md5.hexdigest(),
+            'lisa-version': lisa_version,
+            'trappy-version': trappy.__version__,
+        }
+
+    def _load_metadata(self):
+        logger = self.get_logger()
+        trace_id = self._get_trace_id()
+        metadata_path = os.path.join(self.path, self.METADATA_FILENAME)
+
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            metadata = {}
+
+        if all(metadata.get(key) == val for key, val in trace_id.items()):
+            return metadata
+        else:
+            if metadata:
+                logger.info('Invalidating outdated trace cache: {}'.format(self.path))
+            return dict(trace_id, events={})
+
+    def _write_metadata(self):
+        os.makedirs(self.path, exist_ok=True)
+        metadata_path = os.path.join(self.path, self.METADATA_FILENAME)
+        self._atomic_write(
+            metadata_path,
+            lambda path: self._write_json(path, self._metadata),
+        )
+
+    @staticmethod
+    def _write_json(path, data):
+        with open(path, 'w') as f:
+            json.dump(data, f, sort_keys=True, indent=4)
+
+    @staticmethod
+    def _atomic_write(path, write):
+        """
+        Call ``write`` on a temporary file and rename it to ``path``, so that
+        a concurrent reader never sees a partially written file.
+        """
+        dirname = os.path.dirname(path)
+        with tempfile.NamedTemporaryFile(dir=dirname, delete=False) as f:
+            temp_path = f.name
+
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(temp_path)
+            raise
+
+    def __contains__(self, event):
+        return event in self._metadata['events']
+
+    def load(self, event):
+        """
+        Load the dataframes of a given event.
+
+        :param event: Name of the event, as requested from :class:`Trace`.
+        :type event: str
+
+        :returns: A dictionary of dataframes, indexed by the name under which
+            they are exposed. Empty dataframes are not part of the
+            dictionary.
+        :raises KeyError: If the event has not been cached.
+        """
+        files = self._metadata['events'][event]
+        try:
+            return {
+                name: pd.read_parquet(os.path.join(self.path, spec['file']), memory_map=True)
+                for name, spec in files.items()
+            }
+        except (ImportError, OSError, ValueError) as e:
+            self.get_logger().warning('Could not load event "{}" from cache: {}'.format(event, e))
+            raise KeyError(event)
+
+    def get_index(self, event):
+        """
+        Get the timestamps of the first and last occurrence of the given
+        event, without loading its dataframes.
+
+        :param event: Name of the event, as requested from :class:`Trace`.
+        :type event: str
+
+        :returns: A dictionary of ``(first, last)`` tuples with the same keys
+            as :meth:`load`.
+        :raises KeyError: If the event has not been cached.
+        """
+        return {
+            name: (spec['start'], spec['end'])
+            for name, spec in self._metadata['events'][event].items()
+        }
+
+    def store(self, event, df_map):
+        """
+        Store the dataframes of a given event.
+
+        :param event: Name of the event, as requested from :class:`Trace`.
+        :type event: str
+
+        :param df_map: Dictionary of dataframes, indexed by the name under
+            which they are exposed.
+        :type df_map: dict(str, pandas.DataFrame)
+        """
+        logger = self.get_logger()
+        os.makedirs(self.path, exist_ok=True)
+
+        files = {}
+        for name, df in df_map.items():
+            # Empty dataframes are only recorded in the metadata
+            if df.empty:
+                continue
+
+            filename = '{}.parquet'.format(name)
+            try:
+                self._atomic_write(
+                    os.path.join(self.path, filename),
+                    df.to_parquet,
+                )
+            # pyarrow errors inherit from these exceptions types
+            except (ImportError, OSError, ValueError, TypeError, NotImplementedError) as e:
+                logger.warning('Could not store event "{}" in cache: {}'.format(event, e))
+                return
+
+            files[name] = {
+                'file': filename,
+                'start': df.index[0],
+                'end': df.index[-1],
+            }
+
+        self._metadata['events'][event] = files
+        try:
+            self._write_metadata()
+        except OSError as e:
+            logger.warning('Could not update trace cache metadata: {}'.format(e))
+
+
 class Trace(Loggable, TraceBase):
     """
     The Trace object is the LISA trace events parser.
@@ -293,6 +555,33 @@ class Trace(Loggable, TraceBase):
     :param plots_prefix: prefix for plots file names
     :type plots_prefix: str
 
+    :param cache: If ``True``, the parsed dataframes are stored in a
+        :class:`TraceCache` so that loading the same trace again only parses
+        the events that were not already cached.
+    :type cache: bool
+
+    :param cache_path: Folder used by the cache. Defaults to a hidden folder
+        next to the trace file (see :meth:`TraceCache.get_default_path`).
+    :type cache_path: str or None
+
+    :param lazy: If ``True``, the trace is only scanned for the presence of
+        ``events`` when the object is created. Each event is then parsed the
+        first time it is accessed using :meth:`df_events`. This is especially
+        useful when ``events`` is left to its default value, as only the
+        events actually used by the analysis will be parsed.
+    :type lazy: bool
+
+    :param jobs: Number of processes used to parse text traces, or ``None``
+        to use one per CPU. The trace is split into chunks of lines parsed
+        independently, and the resulting dataframes are merged back.
+    :type jobs: int or None
+
+    :param compact_dtypes: If ``True``, the dataframes are converted to more
+        memory-efficient dtypes once sanitized, using
+        :func:`lisa.datautils.df_compact_dtypes`. This considerably reduces
+        the memory footprint of large traces. See :meth:`memory_usage`.
+    :type compact_dtypes: bool
+
     :ivar start: The timestamp of the first trace event in the trace
     :ivar end: The timestamp of the last trace event in the trace
     :ivar time_range: Maximum timespan for all collected events
@@ -306,7 +595,12 @@ class Trace(Loggable, TraceBase):
                  normalize_time=False,
                  trace_format='FTrace',
                  plots_dir=None,
-                 plots_prefix=''):
+                 plots_prefix='',
+                 cache=False,
+                 cache_path=None,
+                 lazy=False,
+                 jobs=1,
+                 compact_dtypes=False):
 
         super().__init__()
 
@@ -331,6 +625,17 @@ class Trace(Loggable, TraceBase):
 
         self.plots_prefix = plots_prefix
 
+        if cache:
+            cache_path = cache_path or TraceCache.get_default_path(trace_path)
+            self._cache = TraceCache(cache_path, trace_path)
+        else:
+            self._cache = None
+
+        self.lazy = lazy
+        self.jobs = jobs or os.cpu_count()
+        self.compact_dtypes = compact_dtypes
+        # Views on the trace, indexed by their window
+        self._views = weakref.WeakValueDictionary()
         self._parse_trace(self.trace_path, trace_format, normalize_time)
 
     @property
@@ -355,6 +660,9 @@ class Trace(Loggable, TraceBase):
     def ftrace(self):
         """
         Underlying :class:`trappy.ftrace.FTrace`.
+
+        .. note:: This is ``None`` if all the events were loaded from the
+            cache.
         """
         return self._ftrace
 
@@ -395,7 +703,13 @@ class Trace(Loggable, TraceBase):
         :type filepath: str or None
 
         :Variable keyword arguments: Forwarded to :class:`Trace`.
+
+        .. note:: ``lazy=True`` requires ``filepath`` to be set, since the
+            trace file needs to be kept around.
         """
+        if kwargs.get('lazy') and not filepath:
+            raise ValueError('A lazy trace needs a "filepath" to store the trace to')
+
         ftrace_coll = FtraceCollector(target, events=events, buffer_size=buffer_size)
         plat_info = target.plat_info
 
@@ -462,6 +776,22 @@ class Trace(Loggable, TraceBase):
 
         return events
 
+    # Post-processing methods, along with the events they act on. Events
+    # handled by the same method are always loaded together, so that lazy
+    # loading gives the same result as parsing everything at once.
+    _SANITIZE_METHODS = [
+        ('_sanitize_SchedLoadAvgCpu', ['sched_load_avg_cpu']),
+        ('_sanitize_SchedLoadAvgTask', ['sched_load_avg_task']),
+        ('_sanitize_SchedCpuCapacity', ['cpu_capacity']),
+        ('_sanitize_SchedBoostCpu', ['sched_boost_cpu']),
+        ('_sanitize_SchedBoostTask', ['sched_boost_task']),
+        ('_sanitize_SchedEnergyDiff', ['sched_energy_diff']),
+        ('_sanitize_SchedOverutilized', ['sched_overutilized']),
+        ('_sanitize_CpuFrequency', ['cpu_frequency', 'cpu_frequency_devlib']),
+        ('_sanitize_ThermalPowerCpu', ['thermal_power_cpu_get_power', 'thermal_power_cpu_limit']),
+        ('_sanitize_funcgraph', ['funcgraph_entry', 'funcgraph_exit']),
+    ]
+
     def _parse_trace(self, path, trace_format, normalize_time):
         """
         Internal method in charge of performing the actual parsing of the
@@ -486,123 +816,511 @@ class Trace(Loggable, TraceBase):
         else:
             raise ValueError("Unknown trace format {}".format(trace_format))
 
-        # Make sure event names are not unicode strings
-        self._ftrace = trace_class(path, scope="custom", events=self.events,
-                                  normalize_time=normalize_time)
+        self._trace_class = trace_class
+        self._ftrace = None
+        # Dataframes ready to be used, indexed by event name
+        self._df_events = {}
 
-        # trappy sometimes decides to be "clever" and overrules the path to be
-        # used, even though it was specifically asked for a given file path
-        assert path == self._ftrace.trace_path
+        if self.lazy:
+            events_index = self._index_events(path, self.events)
+            # Dataframes parsed but not yet normalized and sanitized
+            self._pending_df_events = {}
+        else:
+            events_df = self._load_raw_events(self.events)
+            events_index = {
+                event: {
+                    name: (df.index[0], df.index[-1])
+                    for name, df in df_map.items()
+                    if not df.empty
+                }
+                for event, df_map in events_df.items()
+            }
+            self._pending_df_events = {
+                name: df
+                for df_map in events_df.values()
+                for name, df in df_map.items()
+                if not df.empty
+            }
+
+        # Map each event name to the event used to ask for it
+        self._name_to_event = {
+            name: event
+            for event in self.events
+            for name in events_index[event].keys()
+        }
+        self._events_index = {
+            name: span
+            for event in self.events
+            for name, span in events_index[event].items()
+        }
 
         # Check for events available on the parsed trace
-        self.available_events = self._check_available_events()
+        self.available_events = list(self._events_index.keys())
+        logger.debug('Events found on trace: {}'.format(', '.join(self.available_events)))
         if not self.available_events:
             raise ValueError('The trace does not contain useful events')
 
-        self.basetime = self._ftrace.basetime
+        # devlib always introduces fake cpu_frequency events, which are
+        # registered as 'cpu_frequency' events if the OS has not generated any
+        if self.has_events('cpu_frequency_devlib') \
+           and 'freq-domains' in self.plat_info \
+           and not self.has_events('cpu_frequency'):
+            self.available_events.append('cpu_frequency')
+
+        # The first event of the trace gives the base time, as with trappy
+        self.basetime = min(
+            start
+            for start, end in self._events_index.values()
+        )
 
         self._compute_timespan()
 
-        # Setup internal data reference to interesting events/dataframes
-        self._sanitize_SchedLoadAvgCpu()
-        self._sanitize_SchedLoadAvgTask()
-        self._sanitize_SchedCpuCapacity()
-        self._sanitize_SchedBoostCpu()
-        self._sanitize_SchedBoostTask()
-        self._sanitize_SchedEnergyDiff()
-        self._sanitize_SchedOverutilized()
-        self._sanitize_CpuFrequency()
-        self._sanitize_ThermalPowerCpu()
-        self._sanitize_funcgraph()
+        if not self.lazy:
+            self._load_events(self.available_events)
 
-    def _check_available_events(self, key=""):
+    def _load_events(self, events):
         """
-        Internal method used to build a list of available events.
+        Make the dataframes of the given events available in
+        :meth:`df_events`.
 
-        :param key: key to be used for TRAPpy filtering
-        :type key: str
+        The events post-processed by the same ``_sanitize_*`` method as one of
+        ``events`` are loaded as well.
+        """
+        loaded = set(self._df_events.keys())
+        events = set(events)
+        sanitize_list = [
+            (meth, meth_events)
+            for meth, meth_events in self._SANITIZE_METHODS
+            if events & set(meth_events)
+        ]
+        events.update(
+            event
+            for meth, meth_events in sanitize_list
+            for event in meth_events
+        )
+        events = [
+            event
+            for event in self.available_events
+            if event in events
+            and event in self._events_index
+            and event not in self._df_events
+        ]
+
+        to_parse = deduplicate(
+            [
+                self._name_to_event[event]
+                for event in events
+                if event not in self._pending_df_events
+            ],
+            keep_last=False,
+        )
+        if to_parse:
+            self.get_logger().debug('Loading events: {}'.format(', '.join(to_parse)))
+            for df_map in self._load_raw_events(to_parse).values():
+                self._pending_df_events.update(df_map)
+
+        for event in events:
+            df = self._pending_df_events.pop(event)
+            if self.normalize_time:
+                df.index = df.index - self.basetime
+            self._df_events[event] = df
+
+        for meth, meth_events in sanitize_list:
+            getattr(self, meth)()
+
+        if self.compact_dtypes:
+            self._compact_events(
+                event
+                for event in self._df_events.keys()
+                if event not in loaded
+            )
+
+    def _compact_events(self, events):
+        """
+        Convert the dataframes of the given events to compact dtypes.
         """
         logger = self.get_logger()
-        available_events = []
-        for val in self._ftrace.get_filters(key):
-            obj = getattr(self._ftrace, val)
-            if not obj.data_frame.empty:
-                available_events.append(val)
-        logger.debug('Events found on trace: {}'.format(', '.join(available_events)))
-        return available_events
+        for event in list(events):
+            df = self._df_events[event]
+            compact_df = df_compact_dtypes(df)
+            logger.debug('Compacted dtypes of {}: {} -> {} bytes'.format(
+                event,
+                df.memory_usage(deep=True).sum(),
+                compact_df.memory_usage(deep=True).sum(),
+            ))
+            self._df_events[event] = compact_df
 
-    @memoized
-    def _get_task_maps(self):
+    def _load_raw_events(self, events):
         """
-        Give the mapping from PID to task names, and the opposite.
+        Load the given events from the cache, or parse them from the trace.
 
-        The names or PIDs are listed in appearance order.
+        :returns: A dictionary mapping each event in ``events`` to a
+            dictionary of the dataframes it produced, indexed by their name.
+            The timestamps are not normalized.
         """
+        events_df = {}
+        if self._cache:
+            for event in events:
+                with contextlib.suppress(KeyError):
+                    events_df[event] = self._cache.load(event)
 
-        name_to_pid = {}
-        pid_to_name = {}
+        to_parse = [
+            event
+            for event in events
+            if event not in events_df
+        ]
 
-        # Merge the list values if the key already exists rather than
-        # overriding them
-        def update_mapping(existing, new):
-            for key, new_val in new.items():
-                existing.setdefault(key, []).extend(new_val)
+        if to_parse:
+            parsed = self._parse_events(self.trace_path, self._trace_class, to_parse)
+            events_df.update(parsed)
+            if self._cache:
+                for event, df_map in parsed.items():
+                    self._cache.store(event, df_map)
+        else:
+            self.get_logger().debug('Events loaded from cache: {}'.format(self._cache.path))
 
-        # Keep only the values, in appearance order according to the timestamp
-        # index
-        def finalize_mapping(mapping):
-            def keep_values(items): return list(zip(*items))[1]
-            return {
-                # Remove duplicates and only keep the first occurence of each
-                k: deduplicate(
-                    # Sort by index values, i.e. appearance order
-                    keep_values(sorted(values, key=itemgetter(0))),
-                    keep_last=False
-                )
-                for k, values in mapping.items()
-            }
+        return events_df
 
-        def create_mapping(df, key_col, value_col):
-            return {
-                k: [
-                    # save the index at which that value appeared so we
-                    # conserve appearance order across events
-                    (df[df[value_col] == value].index[0], value)
-                    for value in df[df[key_col] == k][value_col].unique()
-                ]
-                for k in df[key_col].unique()
-            }
+    @staticmethod
+    def _get_trappy_event(event):
+        """
+        Get the name under which trappy exposes ``event``, along with the
+        unique word it uses to recognize the trace lines of that event.
+        """
+        ftrace_cls = trappy.FTrace
+        for scope in (ftrace_cls.thermal_classes, ftrace_cls.sched_classes, ftrace_cls.dynamic_classes):
+            for name, cls in scope.items():
+                if event in (cls.unique_word, name) or event + ':' == cls.unique_word:
+                    return (name, cls.unique_word)
+
+        return (event, event + ':')
+
+    def _parse_events(self, path, trace_class, events):
+        """
+        Parse the given events using trappy.
+
+        :returns: A dictionary mapping each event in ``events`` to a
+            dictionary of the dataframes it produced, indexed by their name.
+            The timestamps are not normalized.
+        """
+        if self.jobs > 1 and issubclass(trace_class, trappy.FTrace):
+            return self._parse_events_parallel(path, events)
+
+        ftrace = trace_class(path, scope="custom", events=events,
+                             normalize_time=False)
+
+        # trappy sometimes decides to be "clever" and overrules the path to be
+        # used, even though it was specifically asked for a given file path
+        assert path == ftrace.trace_path
+
+        self._ftrace = ftrace
+
+        def get_df_map(event):
+            # trappy may expose some known events under a different name than
+            # the one used to select them, e.g. "cpu_out_power" for
+            # "thermal_power_cpu_limit"
+            name, _ = self._get_trappy_event(event)
+            return {name: getattr(ftrace, name).data_frame}
 
-        def load(event, name_col, pid_col):
-            df = self.df_events(event)
-            update_mapping(name_to_pid, create_mapping(df, name_col, pid_col))
-            update_mapping(pid_to_name, create_mapping(df, pid_col, name_col))
+        return {
+            event: get_df_map(event)
+            for event in events
+        }
+
+    def _parse_events_parallel(self, path, events):
+        """
+        Same as :meth:`_parse_events`, but split the trace in chunks parsed
+        by a pool of processes.
+        """
+        logger = self.get_logger()
 
-        if 'sched_load_avg_task' in self.available_events:
-            load('sched_load_avg_task', 'comm', 'pid')
+        with self._open_txt(path) as txt_path:
+            chunks = self._split_txt(txt_path, self.jobs)
+            logger.debug('Parsing {} chunks of trace with {} processes'.format(len(chunks), self.jobs))
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                results = list(executor.map(
+                    _parse_txt_chunk,
+                    itertools.repeat(txt_path),
+                    chunks,
+                    itertools.repeat(events),
+                ))
+
+        def merge(name):
+            df_list = []
+            # __line is relative to the beginning of each chunk
+            line_offset = 0
+            for df_map, nr_lines in results:
+                df = df_map[name]
+                if not df.empty:
+                    df['__line'] += line_offset
+                    df_list.append(df)
+                line_offset += nr_lines
+
+            if not df_list:
+                return pd.DataFrame()
+
+            df = pd.concat(df_list)
+            # The chunks are split so that they are already in timestamp
+            # order, but that is cheap to check
+            if not df.index.is_monotonic_increasing:
+                df.sort_index(kind='mergesort', inplace=True)
+            return df
+
+        def get_df_map(event):
+            name, _ = self._get_trappy_event(event)
+            return {name: merge(name)}
+
+        return {
+            event: get_df_map(event)
+            for event in events
+        }
 
-        if 'sched_wakeup' in self.available_events:
-            load('sched_wakeup', '__comm', '__pid')
+    @classmethod
+    @contextlib.contextmanager
+    def _open_txt(cls, path):
+        """
+        Context manager giving the path to a text version of the trace, as
+        parsed by trappy.
 
-        if 'sched_switch' in self.available_events:
-            load('sched_switch', 'prev_comm', 'prev_pid')
-            load('sched_switch', 'next_comm', 'next_pid')
+        ``trace.dat`` files are converted using ``trace-cmd report`` to a
+        temporary file.
+        """
+        if not path.endswith('.dat'):
+            yield path
+            return
 
-        if not (name_to_pid and pid_to_name):
+        # Ask for the events that trappy parses in raw format
+        cmd = ['trace-cmd', 'report', '-t']
+        ftrace_cls = trappy.FTrace
+        for scope in (ftrace_cls.thermal_classes, ftrace_cls.sched_classes, ftrace_cls.dynamic_classes):
+            for name, trace_cls in scope.items():
+                if getattr(trace_cls, 'parse_raw', False):
+                    cmd.extend(['-r', name])
+        cmd.append(path)
+
+        with tempfile.NamedTemporaryFile(suffix='.txt') as temp:
+            cls.get_logger().debug('Converting trace to text format: {}'.format(path))
+            subprocess.check_call(cmd, stdout=temp, stderr=subprocess.DEVNULL)
+            yield temp.name
+
+    @staticmethod
+    def _split_txt(path, nr_chunks):
+        """
+        Split a text trace into ``(start, end)`` byte ranges that can be
+        parsed independently.
+
+        Chunks are only split between lines with different timestamps, so
+        that the timestamps trappy makes unique in each chunk are the same as
+        if the whole trace was parsed at once.
+        """
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return [(0, 0)]
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                def line_timestamp(pos):
+                    end = mm.find(b'\n', pos)
+                    end = size if end == -1 else end + 1
+                    return (_get_line_timestamp(mm[pos:end]), end)
+
+                # Skip the header, which only belongs to the first chunk
+                first = 0
+                while first < size:
+                    timestamp, end = line_timestamp(first)
+                    if timestamp is not None:
+                        break
+                    first = end
+
+                boundaries = [0]
+                chunk_size = (size - first) // nr_chunks
+                for i in range(1, nr_chunks):
+                    target = max(first + i * chunk_size, boundaries[-1])
+                    # Get the timestamp of the line containing "target"
+                    pos = mm.rfind(b'\n', 0, target) + 1
+                    prev_timestamp, pos = line_timestamp(pos)
+                    while pos < size:
+                        timestamp, end = line_timestamp(pos)
+                        if timestamp is not None:
+                            if prev_timestamp is not None and timestamp > prev_timestamp:
+                                break
+                            prev_timestamp = timestamp
+                        pos = end
+
+                    if pos >= size:
+                        break
+                    elif pos > boundaries[-1]:
+                        boundaries.append(pos)
+
+        boundaries.append(size)
+        return list(zip(boundaries, boundaries[1:]))
+
+    def _index_events(self, path, events):
+        """
+        Find the timestamps of the first and last occurrence of each event,
+        without parsing the trace.
+
+        :returns: A dictionary mapping each event in ``events`` to a
+            dictionary of ``(first, last)`` tuples, indexed by the name of the
+            dataframes the event will produce.
+        """
+        events_index = {}
+        if self._cache:
+            for event in events:
+                with contextlib.suppress(KeyError):
+                    events_index[event] = self._cache.get_index(event)
+
+        to_index = [
+            event
+            for event in events
+            if event not in events_index
+        ]
+
+        if to_index:
+            with self._open_txt(path) as txt_path:
+                events_index.update(self._scan_events(txt_path, to_index))
+
+        return events_index
+
+    @classmethod
+    def _scan_events(cls, path, events):
+        """
+        Scan a text trace looking for the first and last line of each event,
+        in the same way trappy would select the lines to parse.
+        """
+
+        def get_timestamp(mm, pos):
+            start = mm.rfind(b'\n', 0, pos) + 1
+            end = mm.find(b'\n', pos)
+            end = len(mm) if end == -1 else end
+            return (_get_line_timestamp(mm[start:end]), start, end)
+
+        words = {
+            event: cls._get_trappy_event(event)[1].encode('utf-8')
+            for event in events
+        }
+        first = {}
+        last = {}
+
+        with open(path, 'rb') as f:
+            # mmap cannot map empty files
+            if not os.fstat(f.fileno()).st_size:
+                return {event: {} for event in events}
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Find the first occurrence of all the words in a single pass
+                # over the file, by looking for any of the remaining words.
+                pos = 0
+                remaining = set(words.values())
+                while remaining:
+                    regex = re.compile(b'|'.join(map(re.escape, remaining)))
+                    match = regex.search(mm, pos)
+                    if not match:
+                        break
+
+                    word = match.group(0)
+                    timestamp, _, end = get_timestamp(mm, match.start())
+                    if timestamp is None:
+                        pos = end
+                    else:
+                        first[word] = timestamp
+                        remaining.remove(word)
+                        pos = match.start()
+
+                for word in first.keys():
+                    end = len(mm)
+                    while True:
+                        pos = mm.rfind(word, 0, end)
+                        timestamp, end, _ = get_timestamp(mm, pos)
+                        if timestamp is not None:
+                            last[word] = timestamp
+                            break
+
+        return {
+            event: {
+                cls._get_trappy_event(event)[0]: (first[word], last[word])
+            } if word in first else {}
+            for event, word in words.items()
+        }
+
+    def _get_task_ids_sources(self):
+        """
+        List of dataframes with a ``pid`` and a ``comm`` column, extracted
+        from the events mentioning tasks.
+        """
+        # Events sharing the same timestamp are ordered according to this
+        # list, since the sorts done on the concatenated dataframes are stable.
+        sources = [
+            ('sched_load_avg_task', 'pid', 'comm'),
+            ('sched_wakeup', '__pid', '__comm'),
+            ('sched_switch', 'prev_pid', 'prev_comm'),
+            ('sched_switch', 'next_pid', 'next_comm'),
+        ]
+
+        df_list = [
+            self.df_events(event)[[pid_col, comm_col]].rename(
+                columns={pid_col: 'pid', comm_col: 'comm'},
+            )
+            for event, pid_col, comm_col in sources
+            if event in self.available_events
+        ]
+
+        if not any(not df.empty for df in df_list):
             raise RuntimeError('Failed to load tasks names, sched_switch, sched_wakeup, or sched_load_avg_task events are needed')
 
-        name_to_pid = finalize_mapping(name_to_pid)
-        pid_to_name = finalize_mapping(pid_to_name)
+        return df_list
+
+    @memoized
+    def df_task_ids(self):
+        """
+        Dataframe of all the tasks in the trace.
+
+        The dataframe has a ``pid`` and a ``comm`` column, with one row per
+        ``(pid, comm)`` pair. It is indexed by the timestamp of the first
+        occurrence of the pair and sorted in appearance order.
+        """
+        df = pd.concat(self._get_task_ids_sources())
+        df.sort_index(inplace=True, kind='mergesort')
+        df.drop_duplicates(inplace=True, keep='first')
+        df.index.name = 'Time'
+        return df
+
+    def _get_task_map(self, key_col, value_col):
+        """
+        Map the values of ``key_col`` to the list of values of ``value_col``
+        they appear with.
+
+        The values are sorted by the timestamp of their first occurrence in
+        the events they are extracted from.
+        """
+        df_list = []
+        for df in self._get_task_ids_sources():
+            first_seen = df.index.to_series().groupby(df[value_col].values, sort=False).first()
+            df = df.drop_duplicates([key_col, value_col], keep='first')
+            df.index = df[value_col].map(first_seen).values
+            df_list.append(df)
+
+        df = pd.concat(df_list)
+        df.sort_index(inplace=True, kind='mergesort')
+        # When a value was first seen at different times in different events,
+        # it is listed according to the latest of these times.
+        df.drop_duplicates(inplace=True, keep='last')
 
-        return (name_to_pid, pid_to_name)
+        return {
+            key: values.tolist()
+            for key, values in df.groupby(key_col, sort=False)[value_col]
+        }
 
     @property
+    @memoized
     def _task_name_map(self):
-        return self._get_task_maps()[0]
+        return self._get_task_map('comm', 'pid')
 
     @property
+    @memoized
     def _task_pid_map(self):
-        return self._get_task_maps()[1]
+        return self._get_task_map('pid', 'comm')
 
     def has_events(self, events):
         """
@@ -625,19 +1343,109 @@ class Trace(Loggable, TraceBase):
             return set(events).issubset(set(self.available_events))
 
     def get_view(self, window):
-        return TraceView(self, window)
+        window = tuple(window)
+        try:
+            return self._views[window]
+        except KeyError:
+            view = TraceView(self, window)
+            self._views[window] = view
+            return view
+
+    def _get_event_span(self, event):
+        """
+        Timestamps of the first and last occurrence of ``event``, or ``None``
+        if the event does not appear in the trace.
+
+        The span recorded when the trace was parsed or indexed is used for
+        events that have not been loaded yet, so that lazy traces do not have
+        to parse them.
+        """
+        try:
+            df = self._df_events[event]
+        except KeyError:
+            try:
+                start, end = self._events_index[event]
+            except KeyError:
+                df = self.df_events(event)
+            else:
+                if self.normalize_time:
+                    start -= self.basetime
+                    end -= self.basetime
+                return (start, end)
+
+        if df.empty:
+            return None
+        else:
+            return (df.index[0], df.index[-1])
+
+    def _get_window_bounds(self, window):
+        """
+        Compute the timestamps of the first and last events inside ``window``.
+
+        Only the events spanning across one of the bounds of the window need
+        their dataframe to be searched, the other ones are either entirely
+        inside or outside of it.
+
+        :param window: ``(start, end)`` tuple. ``None`` bounds are replaced by
+            the bounds of the trace.
+        :type window: tuple(float or None, float or None)
+        """
+        t_min, t_max = window
+        spans = {
+            event: self._get_event_span(event)
+            for event in self.available_events
+        }
+        spans = {
+            event: span
+            for event, span in spans.items()
+            if span is not None
+        }
+
+        def first_after(event, first, t):
+            if first >= t:
+                return first
+            else:
+                index = self.df_events(event).index
+                return index[index.searchsorted(t, side='left')]
+
+        def last_before(event, last, t):
+            if last <= t:
+                return last
+            else:
+                index = self.df_events(event).index
+                return index[index.searchsorted(t, side='right') - 1]
+
+        if t_min is None:
+            start = self.start
+        else:
+            start = min(
+                (
+                    first_after(event, first, t_min)
+                    for event, (first, last) in spans.items()
+                    if last >= t_min
+                ),
+                default=self.end,
+            )
+
+        if t_max is None:
+            end = self.end
+        else:
+            end = max(
+                (
+                    last_before(event, last, t_max)
+                    for event, (first, last) in spans.items()
+                    if first <= t_max
+                ),
+                default=self.start,
+            )
+
+        return (start, end)
 
     def _compute_timespan(self):
         """
         Compute time axis range, considering all the parsed events.
         """
-        start = []
-        end = []
-        for event in self.available_events:
-            df = self.df_events(event)
-            start.append(df.index[0])
-            end.append(df.index[-1])
-
+        start, end = zip(*self._events_index.values())
         duration = max(end) - min(start)
 
         self.start = 0 if self.normalize_time else self.basetime
@@ -853,11 +1661,27 @@ class Trace(Loggable, TraceBase):
         In both cases the native viewer is assumed to be available in the host
         machine.
         """
-        if isinstance(self._ftrace, trappy.FTrace):
+        if issubclass(self._trace_class, trappy.FTrace):
             return os.popen("kernelshark {}".format(shlex.quote(self.trace_path)))
-        if isinstance(self._ftrace, trappy.SysTrace):
+        if issubclass(self._trace_class, trappy.SysTrace):
             return webbrowser.open(self.trace_path)
 
+    def memory_usage(self):
+        """
+        Memory used by the dataframes of the events loaded so far.
+
+        :returns: A :class:`pandas.Series` with the number of bytes used by
+            each event dataframe, indexed by event name.
+        """
+        return pd.Series(
+            {
+                event: df.memory_usage(deep=True).sum()
+                for event, df in self._df_events.items()
+            },
+            name='memory',
+            dtype='int64',
+        )
+
     def df_events(self, event):
         """
         Get a dataframe containing all occurrences of the specified trace event
@@ -873,7 +1697,11 @@ class Trace(Loggable, TraceBase):
                 available_events=self.available_events,
             )
 
-        return getattr(self._ftrace, event).data_frame
+        try:
+            return self._df_events[event]
+        except KeyError:
+            self._load_events([event])
+            return self._df_events[event]
 
 ###############################################################################
 # Trace Events Sanitize Methods
@@ -1059,11 +1887,10 @@ class Trace(Loggable, TraceBase):
         # devlib always introduces fake cpu_frequency events, in case the
         # OS has not generated cpu_frequency envets there are the only
         # frequency events to report
-        if not self.has_events('cpu_frequency'):
+        if 'cpu_frequency' not in self._events_index:
             # Register devlib injected events as 'cpu_frequency' events
-            self._ftrace.cpu_frequency.data_frame = devlib_freq
+            self._df_events['cpu_frequency'] = devlib_freq
             df = devlib_freq
-            self.available_events.append('cpu_frequency')
 
         # make sure fake cpu_frequency events are never interleaved with
         # OS generated events
@@ -1107,7 +1934,7 @@ class Trace(Loggable, TraceBase):
 
                 df.sort_index(inplace=True)
 
-            self._ftrace.cpu_frequency.data_frame = df
+            self._df_events['cpu_frequency'] = df
 
     def _sanitize_funcgraph(self):
         """
@@ -1123,7 +1950,7 @@ class Trace(Loggable, TraceBase):
             return
 
         try:
-            addr_map = self.plat_info['kernel']['symbols-address']
+            addr_map = self.plat_info.get_nested_key(['kernel', 'symbols-address'], frozen=True)
         except KeyError as e:
             self.get_logger().warning('Missing symbol addresses, function names will not be resolved: {}'.format(e))
         else:
@@ -1132,6 +1959,402 @@ class Trace(Loggable, TraceBase):
                 df['func_name'] = df['func'].map(addr_map)
 
 
+class _TraceStreamSnapshot(Trace):
+    """
+    :class:`Trace` created from the dataframes accumulated by a
+    :class:`TraceStream` rather than by parsing a trace file.
+    """
+    def __init__(self, events_df, trace_path, **kwargs):
+        self._stream_events_df = events_df
+        super().__init__(trace_path, **kwargs)
+
+    def _load_raw_events(self, events):
+        events_df = self._stream_events_df
+        return {
+            event: events_df[event]
+            for event in events
+        }
+
+
+class TraceStream(Loggable):
+    """
+    Incrementally parse a live text trace, such as the content of the
+    ``trace_pipe`` file of ftrace.
+
+    :param trace_path: Text file the raw trace lines are appended to. Once
+        streaming is over, it is a regular trace file that can be loaded with
+        :class:`Trace`.
+    :type trace_path: str
+
+    :param events: Events to parse, see :class:`Trace`.
+    :type events: str or list(str)
+
+    :param plat_info: Platform information used for the :class:`Trace`
+        objects returned by :meth:`get_trace`.
+    :type plat_info: lisa.platforms.platinfo.PlatformInfo
+
+    :param max_rows: Maximum number of rows kept in memory for each event, or
+        ``None`` for no limit. Older rows are spilled to Parquet files in
+        ``spill_path``, see :meth:`get_trace`.
+    :type max_rows: int or None
+
+    :param spill_path: Folder in which the rows dropped from memory because
+        of ``max_rows`` are stored, using the same Parquet format as
+        :class:`TraceCache`. Defaults to a folder alongside ``trace_path``.
+        Files previously spilled there for the same events are removed, other
+        files are left untouched.
+    :type spill_path: str or None
+
+    :param chunk_size: Amount of data in bytes to accumulate before parsing
+        it. Smaller chunks make new data available earlier, at the expense of
+        more parsing overhead.
+    :type chunk_size: int
+
+    :Variable keyword arguments: Forwarded to :class:`Trace` when creating a
+        snapshot with :meth:`get_trace`.
+
+    Lines are only parsed once a line with a later timestamp has been seen, so
+    that the timestamps trappy makes unique are the same as if the whole trace
+    was parsed at once.
+
+    **Example**::
+
+        stream = TraceStream('trace.txt', events=['sched_switch'])
+        stream.feed(data)
+        trace = stream.get_trace()
+    """
+
+    def __init__(self, trace_path, events=None, plat_info=None, max_rows=None,
+                 chunk_size=1024 * 1024, spill_path=None, **kwargs):
+        # Import here to avoid a circular dependency issue at import time
+        # with lisa.analysis.base
+        from lisa.analysis.proxy import AnalysisProxy
+        self.events = Trace._process_events(events, AnalysisProxy)
+        self.trace_path = trace_path
+        self.plat_info = plat_info
+        self.max_rows = max_rows
+        self.chunk_size = chunk_size
+        self.spill_path = spill_path or self.get_default_spill_path(trace_path)
+        self._trace_kwargs = kwargs
+
+        self._lock = threading.RLock()
+        self._file = open(trace_path, 'wb')
+        # Data received but not parsed yet
+        self._pending = bytearray()
+        # Number of lines parsed so far, used to offset the __line column
+        self._nr_lines = 0
+        self._last_feed = time.monotonic()
+
+        # List of dataframes for each event, indexed by event and name
+        self._events_df = {
+            event: {
+                Trace._get_trappy_event(event)[0]: []
+            }
+            for event in self.events
+        }
+        # List of Parquet files holding the rows dropped from memory, indexed
+        # by name
+        self._spilled = {}
+
+        # The trace file is truncated, so previously spilled rows are stale
+        if max_rows is not None:
+            self._remove_spilled()
+
+    @staticmethod
+    def get_default_spill_path(trace_path):
+        """
+        Default folder for the spilled rows, alongside the trace file.
+        """
+        dirname, basename = os.path.split(os.path.abspath(trace_path))
+        return os.path.join(dirname, '.{}.lisa-stream'.format(basename))
+
+    def close(self):
+        """
+        Parse all the remaining data and close ``trace_path``.
+        """
+        with self._lock:
+            self.update(final=True)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def feed(self, data):
+        """
+        Feed some new trace data.
+
+        :param data: Raw trace data. It does not need to end on a line
+            boundary.
+        :type data: bytes
+        """
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            self._pending.extend(data)
+            self._last_feed = time.monotonic()
+
+            if len(self._pending) >= self.chunk_size:
+                self.update()
+
+    def update(self, final=False):
+        """
+        Parse the data fed so far.
+
+        :param final: If ``True``, also parse the last lines, since no later
+            data is expected.
+        :type final: bool
+        """
+        with self._lock:
+            pending = self._pending
+            if final:
+                end = len(pending)
+            else:
+                end = self._get_parsable_size(pending)
+
+            if not end:
+                return
+
+            data = bytes(pending[:end])
+            del pending[:end]
+
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = os.path.join(temp_dir, 'trace.txt')
+                with open(path, 'wb') as f:
+                    f.write(data)
+
+                df_map, nr_lines = _parse_txt(path, self.events)
+
+            for event, name_map in self._events_df.items():
+                for name, df_list in name_map.items():
+                    df = df_map[name]
+                    if df.empty:
+                        continue
+
+                    df['__line'] += self._nr_lines
+                    df_list.append(df)
+                    self._trim(name, df_list)
+
+            self._nr_lines += nr_lines
+
+    @staticmethod
+    def _get_parsable_size(data):
+        """
+        Size of the beginning of ``data`` that can be parsed without waiting
+        for more data.
+
+        Only complete lines are parsed, and the lines sharing the timestamp of
+        the last complete line are held back.
+        """
+        end = data.rfind(b'\n') + 1
+        last_timestamp = None
+        while end:
+            start = data.rfind(b'\n', 0, end - 1) + 1
+            timestamp = _get_line_timestamp(bytes(data[start:end]))
+            if timestamp is not None:
+                if last_timestamp is None:
+                    last_timestamp = timestamp
+                elif timestamp != last_timestamp:
+                    break
+            end = start
+
+        return end
+
+    def _trim(self, name, df_list):
+        """
+        Move the oldest rows of an event to :attr:`spill_path` so that at most
+        :attr:`max_rows` are kept in memory.
+        """
+        max_rows = self.max_rows
+        if max_rows is None:
+            return
+
+        dropped = []
+        nr_rows = sum(map(len, df_list))
+        while nr_rows - len(df_list[0]) >= max_rows:
+            df = df_list.pop(0)
+            nr_rows -= len(df)
+            dropped.append(df)
+
+        if nr_rows > max_rows:
+            df = df_list[0]
+            split = nr_rows - max_rows
+            dropped.append(df.iloc[:split])
+            df_list[0] = df.iloc[split:]
+
+        if dropped:
+            self._spill(name, pd.concat(dropped))
+
+    def _remove_spilled(self):
+        """
+        Remove the files spilled to :attr:`spill_path` for the events of this
+        stream.
+        """
+        try:
+            filenames = set(os.listdir(self.spill_path))
+        except OSError:
+            return
+
+        names = {
+            name
+            for name_map in self._events_df.values()
+            for name in name_map.keys()
+        }
+        regex = re.compile(r'(?P<name>.*)-\d+\.parquet')
+        for filename in filenames:
+            match = regex.fullmatch(filename)
+            if match and match.group('name') in names:
+                with contextlib.suppress(OSError):
+                    os.unlink(os.path.join(self.spill_path, filename))
+
+    def _spill(self, name, df):
+        """
+        Append ``df`` to the rows of ``name`` stored in :attr:`spill_path`.
+        """
+        logger = self.get_logger()
+        files = self._spilled.setdefault(name, [])
+        path = os.path.join(
+            self.spill_path,
+            '{}-{}.parquet'.format(name, len(files)),
+        )
+        try:
+            os.makedirs(self.spill_path, exist_ok=True)
+            TraceCache._atomic_write(path, df.to_parquet)
+        # pyarrow errors inherit from these exceptions types
+        except (ImportError, OSError, ValueError, TypeError, NotImplementedError) as e:
+            logger.warning('Could not spill {} rows of "{}", they will only be available in {}: {}'.format(
+                len(df), name, self.trace_path, e))
+        else:
+            files.append(path)
+
+    def get_trace(self, full=False):
+        """
+        Get a :class:`Trace` with all the events parsed so far.
+
+        :param full: If ``True``, also load the rows spilled to
+            :attr:`spill_path` because of :attr:`max_rows`. Otherwise, the
+            trace only starts at the oldest row kept in memory.
+        :type full: bool
+
+        The returned trace is a snapshot and will not be affected by data fed
+        afterwards, so that analyses can freely cache their results.
+        """
+        with self._lock:
+            self.update()
+
+            def make_df(name, df_list):
+                if full:
+                    df_list = [
+                        pd.read_parquet(path, memory_map=True)
+                        for path in self._spilled.get(name, [])
+                    ] + df_list
+
+                if df_list:
+                    return pd.concat(df_list)
+                else:
+                    return pd.DataFrame()
+
+            events_df = {
+                event: {
+                    name: make_df(name, df_list)
+                    for name, df_list in name_map.items()
+                }
+                for event, name_map in self._events_df.items()
+            }
+
+        kwargs = dict(self._trace_kwargs, lazy=False, cache=False, jobs=1)
+        return _TraceStreamSnapshot(
+            events_df,
+            self.trace_path,
+            events=self.events,
+            plat_info=self.plat_info,
+            **kwargs,
+        )
+
+    def _read(self, f, size=64 * 1024):
+        """
+        Feed the content of a binary file object until the end of the file is
+        reached.
+        """
+        read = getattr(f, 'read1', f.read)
+        for data in iter(lambda: read(size), b''):
+            self.feed(data)
+
+    @classmethod
+    @contextlib.contextmanager
+    def from_target(cls, target, trace_path, events=None, buffer_size=10240, drain_timeout=1, **kwargs):
+        """
+        Context manager streaming the ftrace ``trace_pipe`` of a
+        :class:`lisa.target.Target` into a :class:`TraceStream`.
+
+        **Example**::
+
+            from lisa.trace import TraceStream
+            from lisa.target import Target
+
+            target = Target.from_default_conf()
+
+            with TraceStream.from_target(target, 'trace.txt', events=['sched_switch'], max_rows=100000) as stream:
+                while True:
+                    time.sleep(60)
+                    trace = stream.get_trace()
+                    trace.analysis.tasks.df_tasks_runtime()
+
+        :param target: Target to connect to.
+        :type target: Target
+
+        :param trace_path: Text file the trace is saved to.
+        :type trace_path: str
+
+        :param events: ftrace events to collect and parse in the trace.
+        :type events: list(str)
+
+        :param buffer_size: Size of the ftrace ring buffer.
+        :type buffer_size: int
+
+        :param drain_timeout: When leaving the ``with`` statement, keep
+            reading the remaining events until no new data has been received
+            for that amount of seconds.
+        :type drain_timeout: float
+
+        :Variable keyword arguments: Forwarded to :class:`TraceStream`.
+
+        .. note:: Since events are consumed when reading ``trace_pipe``, they
+            will not be part of the ``trace.dat`` file that
+            :class:`FtraceCollector` would produce.
+        """
+        ftrace_coll = FtraceCollector(target, events=events, buffer_size=buffer_size)
+        pipe_path = target.path.join(ftrace_coll.tracing_path, 'trace_pipe')
+        kwargs.setdefault('plat_info', target.plat_info)
+
+        with cls(trace_path, events=events, **kwargs) as stream:
+            reader = None
+            try:
+                with ftrace_coll:
+                    reader = target.background(
+                        'cat {}'.format(shlex.quote(pipe_path)),
+                        as_root=True,
+                    )
+                    thread = threading.Thread(
+                        target=stream._read,
+                        args=(reader.stdout,),
+                        daemon=True,
+                    )
+                    thread.start()
+                    yield stream
+
+                # Tracing is now stopped, but some events may still be on
+                # their way
+                while time.monotonic() - stream._last_feed < drain_timeout:
+                    time.sleep(drain_timeout / 10)
+            finally:
+                if reader is not None:
+                    reader.kill()
+                    thread.join()
+
+
 class TraceEventCheckerBase(abc.ABC, Loggable):
     """
     ABC for events checker classes.
@@ -88,7 +88,8 @@ class Loggable:
     @classmethod
     def get_logger(cls, suffix=None):
         cls_name = cls.__name__
-        module = inspect.getmodule(cls)
+        # Equivalent to inspect.getmodule(cls), without the overhead
+        module = sys.modules.get(cls.__module__)
         if module:
             name = module.__name__ + '.' + cls_name
         else:
@@ -856,34 +857,34 @@ def get_call_site(levels=0, exclude_caller_module=False):
         :mod:`lisa.utils` module.
     """
 
-    try:
-        # context=0 speeds up a lot the stack retrieval, since it avoids
-        # reading the source files
-        stack = inspect.stack(context=0)
-    # Getting the stack can sometimes fail under IPython for some reason:
-    # https://github.com/ipython/ipython/issues/1456/
-    except IndexError:
-        return (None, None, None)
+    # Walk the frames directly rather than using inspect.stack(), which
+    # builds a FrameInfo for every frame of the stack and is therefore very
+    # slow on deep stacks.
+    frame = sys._getframe(1)
 
     # Exclude all functions from lisa.utils
     excluded_files = {
         __file__,
     }
     if exclude_caller_module:
-        excluded_files.add(stack[1].filename)
+        excluded_files.add(frame.f_code.co_filename)
+
+    for _ in range(levels):
+        if frame is None:
+            break
+        frame = frame.f_back
 
     caller = None
     filename = None
     lineno = None
-    for frame in stack[levels + 1:]:
-        caller = frame.function
-        filename = frame.filename
-        lineno = frame.lineno
+    lisa_paths = tuple(lisa.__path__)
+    while frame is not None:
+        caller = frame.f_code.co_name
+        filename = frame.f_code.co_filename
+        lineno = frame.f_lineno
+        frame = frame.f_back
         # exclude all non-lisa sources
-        if not any(
-            filename.startswith(path)
-            for path in lisa.__path__
-        ) or filename in excluded_files:
+        if not filename.startswith(lisa_paths) or filename in excluded_files:
             continue
         else:
             break
@@ -17,9 +17,12 @@
 #
 
 from collections import namedtuple, defaultdict
+import concurrent.futures
 import csv
+import hashlib
 import json
 import numpy as np
+import operator
 import re
 import os
 import pandas as pd
@@ -41,7 +44,8 @@ from IPython.display import display
 from lisa.trace import Trace
 from lisa.git import find_shortest_symref
 from lisa.utils import Loggable, memoized
-from lisa.datautils import series_integrate, series_mean
+from lisa.version import __version__ as lisa_version
+from lisa.datautils import series_integrate, series_mean, df_integrate, StepSignal
 
 
 class WaResultsCollector(Loggable):
@@ -112,8 +116,10 @@ class WaResultsCollector(Loggable):
     :param use_cached_trace_metrics: This class uses LISA to parse and analyse
                      ftrace files for extra metrics. With multiple/large traces
                      this can take some time, so the extracted metrics are
-                     cached in the provided output directories. Set this param
-                     to False to disable this caching.
+                     cached in the provided output directories. The cache is
+                     keyed on the content of the trace and the platform
+                     information, so it is invalidated when any of them
+                     changes. Set this param to False to disable this caching.
 
     :param display_charts: This class uses IPython.display module to render some
                            charts of workloads' results. But we also want to use
@@ -121,12 +127,66 @@ class WaResultsCollector(Loggable):
                            only interested in table of figures. Set this param
                            to False if you only want table of results but not
                            display them.
+
+    :param jobs: Number of processes used to extract the extra metrics of the
+                 jobs of each WA3 output directory, such as the ones derived
+                 from traces, or ``None`` to use one per CPU.
+    :type jobs: int or None
     """
     RE_WLTEST_DIR = re.compile(r"wa\.(?P<sha1>\w+)_(?P<name>.+)")
 
+    DerivedMetric = namedtuple('DerivedMetric', ['metric', 'from_metrics', 'func', 'units'])
+    """
+    Metric computed from other metrics reported by WA for the same job
+    iteration.
+
+    :param metric: Name of the derived metric.
+    :param from_metrics: Names of the metrics it is computed from.
+    :param func: Function called with one :class:`pandas.Series` of values per
+        metric in ``from_metrics``, aligned on the job iteration, and
+        returning the values of the derived metric.
+    :param units: Units of the derived metric, or ``None`` to use the units
+        of the first metric of ``from_metrics``.
+    """
+
+    DERIVED_METRICS = [
+        # When using Monsoon, the device is a single channel which reports
+        # two metrics. This means that devlib's DerivedEnergymeasurements
+        # class cannot see the output. Due to the way that the monsoon.py
+        # script works, it looks difficult to change Monsoon over to the Acme
+        # way of operating. As a workaround, let's assemble a
+        # device_total_energy from the other energy values.
+        DerivedMetric(
+            metric='device_total_energy',
+            from_metrics=['output_total_energy', 'USB_total_energy'],
+            func=operator.add,
+            units=None,
+        ),
+    ]
+    """
+    List of :class:`DerivedMetric` added to the metrics of a WA3 output
+    directory, unless WA already reported them.
+    """
+
+    DERIVED_METRICS_KEYS = ['workload', 'id', 'iteration']
+    """
+    Columns identifying the job iteration a metric was reported for.
+    """
+
+    TRACE_METRICS_VERSION = 1
+    """
+    Version of the metrics extracted from traces, to be bumped when they
+    change so that the cached metrics are invalidated.
+    """
+
+    TRACE_METRICS_PLAT_INFO_KEYS = ['cpus-count', 'freq-domains']
+    """
+    Platform information keys the metrics extracted from traces depend on.
+    """
+
     def __init__(self, base_dir=None, wa_dirs=".*", plat_info=None,
                  kernel_repo_path=None, parse_traces=True,
-                 use_cached_trace_metrics=True, display_charts=True):
+                 use_cached_trace_metrics=True, display_charts=True, jobs=1):
 
         logger = self.get_logger()
 
@@ -153,12 +213,23 @@ class WaResultsCollector(Loggable):
             logger.warning("Trace parsing disabled")
         self.use_cached_trace_metrics = use_cached_trace_metrics
         self.display_charts = display_charts
+        self.jobs = jobs or os.cpu_count()
 
         df = pd.DataFrame()
         df_list = []
-        for wa_dir in wa_dirs:
-            logger.info("Reading wa_dir %s", wa_dir)
-            df_list.append(self._read_wa_dir(wa_dir))
+        if self.jobs > 1:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs)
+        else:
+            executor = None
+
+        try:
+            for wa_dir in wa_dirs:
+                logger.info("Reading wa_dir %s", wa_dir)
+                df_list.append(self._read_wa_dir(wa_dir, executor))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
         df = df.append(df_list)
 
         kernel_refs = {}
@@ -180,6 +251,60 @@ class WaResultsCollector(Loggable):
 
         self.results_df = df
 
+    DIMENSIONS = ['workload', 'metric', 'units', 'tag', 'test', 'kernel',
+                  'kernel_sha1', 'id', '_job_dir']
+    """
+    Columns of :attr:`results_df` identifying what a metric value relates to,
+    as opposed to the value itself.
+    """
+
+    def to_parquet(self, path):
+        """
+        Save the collected results to a Parquet file.
+
+        :param path: File to write to.
+        :type path: str
+
+        The :attr:`DIMENSIONS` columns are stored as categoricals, so that
+        each distinct value is only stored once.
+
+        .. seealso:: :meth:`from_parquet`
+        """
+        df = self.results_df.reset_index(drop=True)
+        for col in self.DIMENSIONS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        df.to_parquet(path)
+
+    @classmethod
+    def from_parquet(cls, path, plat_info=None, display_charts=True):
+        """
+        Load results saved with :meth:`to_parquet`, without reading the WA3
+        output directories again.
+
+        :param path: File to read from.
+        :type path: str
+
+        :param plat_info: Same as for :class:`WaResultsCollector`.
+        :type plat_info: lisa.platforms.platinfo.PlatformInfo
+
+        :param display_charts: Same as for :class:`WaResultsCollector`.
+        :type display_charts: bool
+        """
+        df = pd.read_parquet(path)
+        for col in cls.DIMENSIONS:
+            if col in df.columns:
+                df[col] = df[col].astype(object)
+
+        self = cls.__new__(cls)
+        self.plat_info = plat_info
+        self.parse_traces = False
+        self.use_cached_trace_metrics = True
+        self.display_charts = display_charts
+        self.jobs = 1
+        self.results_df = df
+        return self
+
     def _list_wa_dirs(self, base_dir, wa_dirs_re):
         dirs = []
         logger = self.get_logger()
@@ -201,12 +326,13 @@ class WaResultsCollector(Loggable):
 
         return dirs
 
-    def _read_wa_dir(self, wa_dir):
+    def _read_wa_dir(self, wa_dir, executor=None):
         """
         Get a DataFrame of metrics from a single WA3 output directory.
 
         Includes the extra metrics derived from workload-specific artifacts and
-        ftrace files.
+        ftrace files. If ``executor`` is not ``None``, these metrics are
+        computed by the given :class:`concurrent.futures.Executor`.
 
         Columns returned:
 
@@ -230,37 +356,7 @@ class WaResultsCollector(Loggable):
 
         # results.csv contains all the metrics reported by WA for all jobs.
         df = pd.read_csv(os.path.join(wa_dir, 'results.csv'))
-        # When using Monsoon, the device is a single channel which reports
-        # two metrics. This means that devlib's DerivedEnergymeasurements class
-        # cannot see the output. Due to the way that the monsoon.py script
-        # works, it looks difficult to change Monsoon over to the Acme way of
-        # operating. As a workaround, let's mangle the results here instead.
-        unique_metrics = df['metric'].unique()
-        if 'device_total_energy' not in unique_metrics:
-            # potentially, we need to assemble a device_total_energy from
-            # other energy values we can add together.
-            if 'output_total_energy' in unique_metrics and 'USB_total_energy' in unique_metrics:
-                new_rows = []
-                output_df = df[df['metric'] == 'output_total_energy']
-                usb_df = df[df['metric'] == 'USB_total_energy']
-                # for each 'output_total_energy' metric, we will find
-                # the matching 'USB_total_energy' metric and assemble
-                # a 'device_total_energy' metric by adding them.
-                for row in output_df.iterrows():
-                    vals = row[1]
-                    _id = vals['id']
-                    _workload = vals['workload']
-                    _iteration = vals['iteration']
-                    _value = vals['value']
-                    usb_row = usb_df[(usb_df['workload'] == _workload) & (usb_df['id'] == _id) & (usb_df['iteration'] == _iteration)]
-                    new_val = float(_value) + float(usb_row['value'])
-                    # instead of creating a new row, just change the name
-                    # and value of this one
-                    vals['metric'] = 'device_total_energy'
-                    vals['value'] = new_val
-                    new_rows.append(vals)
-                # add all the new rows in one go at the end
-                df = df.append(new_rows, ignore_index=True)
+        df = self._add_derived_metrics(df)
 
         # __meta/jobs.json describes the jobs that were run - we can use this to
         # find extra artifacts (like traces and detailed energy measurement
@@ -285,7 +381,8 @@ class WaResultsCollector(Loggable):
         tag_map = {}
         test_map = {}
         job_dir_map = {}
-        extra_dfs = []
+        # Jobs to extract extra metrics from
+        extra_jobs = []
 
         for job in jobs:
             workload = job['workload_name']
@@ -354,7 +451,20 @@ class WaResultsCollector(Loggable):
                     skipped_jobs[iteration].append(job_id)
                     continue
 
-            extra_df = self._get_extra_job_metrics(job_dir, workload)
+            extra_jobs.append((job_dir, workload, iteration, job_id, tag, test))
+
+        # Extracting the extra metrics is where most of the time is spent, so
+        # all jobs are processed in one go. The workers only send back the
+        # metrics, not the parsed traces.
+        job_dirs = [job[0] for job in extra_jobs]
+        workloads = [job[1] for job in extra_jobs]
+        if executor is None:
+            extra_df_list = map(self._get_extra_job_metrics, job_dirs, workloads)
+        else:
+            extra_df_list = executor.map(self._get_extra_job_metrics, job_dirs, workloads)
+
+        extra_dfs = []
+        for extra_df, (job_dir, workload, iteration, job_id, tag, test) in zip(extra_df_list, extra_jobs):
             if extra_df.empty:
                 continue
 
@@ -389,6 +499,75 @@ class WaResultsCollector(Loggable):
 
         return df
 
+    def _add_derived_metrics(self, df):
+        """
+        Add the :attr:`DERIVED_METRICS` to a DataFrame of metrics reported by
+        WA.
+
+        Each derived metric is only added if it was not reported by WA and all
+        the metrics it is computed from are available. The new rows are
+        copies of the rows of the first metric it is computed from.
+        """
+        keys = self.DERIVED_METRICS_KEYS
+        available_metrics = set(df['metric'].unique())
+        derived_dfs = []
+        for derived in self.DERIVED_METRICS:
+            if derived.metric in available_metrics \
+               or not available_metrics.issuperset(derived.from_metrics):
+                continue
+
+            first, *others = derived.from_metrics
+            derived_df = df[df['metric'] == first]
+            value_cols = ['value']
+            for i, metric in enumerate(others):
+                value_col = '__value_{}'.format(i)
+                other_df = df.loc[df['metric'] == metric, keys + ['value']]
+                other_df = other_df.rename(columns={'value': value_col})
+                derived_df = derived_df.merge(other_df, on=keys, how='inner')
+                value_cols.append(value_col)
+
+            values = [derived_df[col].astype(float) for col in value_cols]
+            derived_df = derived_df.drop(columns=value_cols[1:])
+            derived_df['value'] = derived.func(*values)
+            derived_df['metric'] = derived.metric
+            if derived.units is not None:
+                derived_df['units'] = derived.units
+
+            derived_dfs.append(derived_df)
+
+        # add all the new rows in one go at the end
+        if derived_dfs:
+            df = df.append(derived_dfs, ignore_index=True)
+
+        return df
+
+    def _get_trace_metrics_cache_path(self, trace_path):
+        """
+        Path to the cached metrics of a given trace.
+
+        The file name contains a hash of everything the metrics depend on: the
+        content of the trace, the relevant platform information and the
+        version of the code computing them.
+        """
+        md5 = hashlib.md5()
+        with open(trace_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                md5.update(chunk)
+
+        plat_info = self.plat_info
+        key = {
+            'metrics-version': self.TRACE_METRICS_VERSION,
+            'lisa-version': lisa_version,
+            'plat-info': {
+                key: plat_info.get(key) if plat_info is not None else None
+                for key in self.TRACE_METRICS_PLAT_INFO_KEYS
+            },
+        }
+        md5.update(json.dumps(key, sort_keys=True).encode('utf-8'))
+
+        filename = 'lisa_trace_metrics-{}.csv'.format(md5.hexdigest())
+        return os.path.join(os.path.dirname(trace_path), filename)
+
     def _get_trace_metrics(self, trace_path):
         """
         Parse a trace (or used cached results) and extract extra metrics from it
@@ -398,7 +577,7 @@ class WaResultsCollector(Loggable):
         metric,value,units
         """
         logger = self.get_logger()
-        cache_path = os.path.join(os.path.dirname(trace_path), 'lisa_trace_metrics.csv')
+        cache_path = self._get_trace_metrics_cache_path(trace_path)
         if self.use_cached_trace_metrics and os.path.exists(cache_path):
             return pd.read_csv(cache_path)
 
@@ -415,20 +594,24 @@ class WaResultsCollector(Loggable):
 
         # Helper to get area under curve of multiple CPU active signals
         def get_cpu_time(trace, cpus):
-            df = pd.DataFrame([trace.analysis.idle.signal_cpu_active(cpu) for cpu in cpus])
-            return df.sum(axis=1).sum(axis=0)
+            index, cpus_active = StepSignal.align([
+                StepSignal.from_series(trace.analysis.idle.signal_cpu_active(cpu))
+                for cpu in cpus
+            ])
+            df = pd.DataFrame(dict(zip(cpus, cpus_active)), index=index)
+            return df_integrate(df).sum()
 
         domains = trace.plat_info.get('freq-domains', [])
         for domain in domains:
             name = '-'.join(str(c) for c in domain)
 
-            df = trace.analysis.frequency.df_domain_frequency_residency(domain)
+            df = trace.analysis.frequency.df_domain_frequency_residency(domain[0])
             if df is None or df.empty:
                 logger.warning("Can't get cluster freq residency from %s",
                                trace.trace_path)
             else:
                 df = df.reset_index()
-                avg_freq = (df.frequency * df.time).sum() / df.time.sum()
+                avg_freq = (df.frequency * df.total_time).sum() / df.total_time.sum()
                 metric = 'avg_freq_cluster_{}'.format(name)
                 metrics.append((metric, avg_freq, 'MHz'))
 
@@ -595,13 +778,52 @@ class WaResultsCollector(Loggable):
         raise RuntimeError("Couldn't find the sha1 of the kernel of the device "
                            "that produced {}".format(wa_dir))
 
+    @memoized
+    def _get_dimension(self, col):
+        """
+        :class:`pandas.Categorical` version of a column of :attr:`results_df`,
+        used for lookups.
+        """
+        return pd.Categorical(self.results_df[col])
+
+    def _match_dimension(self, col, regex):
+        """
+        Boolean mask of the rows of :attr:`results_df` for which ``col``
+        contains a match of ``regex``.
+
+        The regex is only matched once against each distinct value.
+        """
+        dimension = self._get_dimension(col)
+        categories = pd.Series(dimension.categories)
+        matching = categories.str.contains(regex, na=False).values
+        codes = dimension.codes
+        # Missing values have a code of -1
+        return (codes >= 0) & matching[codes]
+
+    def _get_dimension_mask(self, col, value):
+        """
+        Boolean mask of the rows of :attr:`results_df` for which ``col`` is
+        equal to ``value``.
+        """
+        dimension = self._get_dimension(col)
+        try:
+            code = dimension.categories.get_loc(value)
+        except KeyError:
+            return np.zeros(len(dimension), dtype=bool)
+        else:
+            return dimension.codes == code
+
+    @memoized
+    def _select_mask(self, tag='.*', kernel='.*', test='.*'):
+        return (
+            self._match_dimension('tag', tag) &
+            self._match_dimension('kernel', kernel) &
+            self._match_dimension('test', test)
+        )
+
     @memoized
     def _select(self, tag='.*', kernel='.*', test='.*'):
-        _df = self.results_df
-        _df = _df[_df.tag.str.contains(tag)]
-        _df = _df[_df.kernel.str.contains(kernel)]
-        _df = _df[_df.test.str.contains(test)]
-        return _df
+        return self.results_df[self._select_mask(tag, kernel, test)]
 
     @property
     def workloads(self):
@@ -615,13 +837,14 @@ class WaResultsCollector(Loggable):
     def tests(self, workload=None):
         df = self.results_df
         if workload:
-            df = df[df['workload'] == workload]
+            df = df[self._get_dimension_mask('workload', workload)]
         return df['test'].unique()
 
     def workload_available_metrics(self, workload):
-        return (self.results_df
-                .groupby('workload').get_group(workload)
-                ['metric'].unique())
+        mask = self._get_dimension_mask('workload', workload)
+        if not mask.any():
+            raise KeyError(workload)
+        return self.results_df['metric'][mask].unique()
 
     @memoized
     def _get_metric_df(self, workload, metric, tag, kernel, test):
@@ -630,28 +853,30 @@ class WaResultsCollector(Loggable):
         """
         logger = self.get_logger()
 
-        df = self._select(tag, kernel, test)
-        if df.empty:
+        results_df = self.results_df
+        mask = self._select_mask(tag, kernel, test)
+        if not mask.any():
             logger.warning("No data to plot for (tag: %s, kernel: %s, test: %s)",
                            tag, kernel, test)
             return None
 
-        valid_workloads = df.workload.unique()
-        if workload not in valid_workloads:
+        workload_mask = mask & self._get_dimension_mask('workload', workload)
+        if not workload_mask.any():
+            valid_workloads = results_df['workload'][mask].unique()
             logger.warning("No data for [%s] workload", workload)
             logger.info("Workloads with data, for the specified filters, are:")
             logger.info(" %s", ','.join(valid_workloads))
             return None
-        df = df[df['workload'] == workload]
 
-        valid_metrics = df.metric.unique()
-        if metric not in valid_metrics:
+        metric_mask = workload_mask & self._get_dimension_mask('metric', metric)
+        if not metric_mask.any():
+            valid_metrics = results_df['metric'][workload_mask].unique()
             logger.warning("No metric [%s] collected for workoad [%s]",
                          metric, workload)
             logger.info("Metrics with data, for the specied filters, are:")
             logger.info("   %s", ', '.join(valid_metrics))
             return None
-        df = df[df['metric'] == metric]
+        df = results_df[metric_mask]
 
         units = df['units'].unique()
         if len(units) > 1:
@@ -29,6 +29,8 @@ from statistics import mean
 import contextlib
 from operator import itemgetter
 
+import pandas as pd
+
 from devlib import TargetStableError
 
 from lisa.wlgen.workload import Workload
@@ -619,11 +621,12 @@ class RTA(Workload):
             for prefix in names
         }
 
+        comms = pd.Series(trace.df_task_ids()['comm'].unique())
         task_map = {
             prefix: sorted(
                 task_id
-                for task_id in trace.task_ids
-                if re.match(regexp, task_id.comm)
+                for comm in comms[comms.str.match(regexp)]
+                for task_id in trace.get_task_ids(comm)
             )
             for prefix, regexp in prefix_regexps.items()
         }
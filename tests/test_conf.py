@@ -151,6 +151,34 @@ class TestTestConf(StorageTestCase, TestMultiSrcConf):
         })
         self.assertEqual(conf['derived'], 46)
 
+    def test_resolve_src_update(self):
+        conf = copy.deepcopy(self.conf)
+        conf.add_src('mysrc', {'foo': 1})
+        self.assertEqual(conf['foo'], 1)
+
+        # The resolved source of a key must follow the changes of priority
+        conf.add_src('mysrc2', {'foo': 2})
+        self.assertEqual(conf['foo'], 2)
+        conf.force_src('foo', ['mysrc'])
+        self.assertEqual(conf['foo'], 1)
+        conf.force_src('foo', None)
+        conf.set_default_src(['mysrc', 'mysrc2'])
+        self.assertEqual(conf['foo'], 1)
+
+    def test_frozen(self):
+        conf = copy.deepcopy(self.conf)
+        conf.add_src('mysrc', {'bar': [1, 2]})
+
+        bar = conf.get_key('bar', frozen=True)
+        self.assertEqual(bar, [1, 2])
+        with self.assertRaises(TypeError):
+            bar[0] = 3
+
+        # Thawing gives a mutable copy that does not affect the conf
+        bar = bar.thaw()
+        bar.append(3)
+        self.assertEqual(conf['bar'], [1, 2])
+
     def test_force_src_nested(self):
         conf = copy.deepcopy(self.conf)
         conf.add_src('mysrc', {'bar': [6, 7]})
@@ -17,6 +17,7 @@
 
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
 
 import lisa.datautils as du
@@ -36,3 +37,187 @@ class DfCheck(TestCase):
                 self.assertEqual(len(subdf), 3)
             else:
                 self.assertEqual(len(subdf), 2)
+
+    def test_df_compact_dtypes(self):
+        df = pd.DataFrame({
+            'cpu': [0, 1, 2, 1] * 10,
+            'pid': [1, 70000, 3, 4] * 10,
+            'comm': ['a', 'b', 'a', 'c'] * 10,
+            'unique': list(map(str, range(40))),
+        })
+        compact = du.df_compact_dtypes(df)
+
+        self.assertEqual(compact['cpu'].dtype, np.int8)
+        self.assertEqual(compact['pid'].dtype, np.int32)
+        self.assertEqual(compact['comm'].dtype, 'category')
+        self.assertEqual(compact['unique'].dtype, object)
+        pd.testing.assert_frame_equal(compact, df, check_dtype=False, check_categorical=False)
+
+    def test_df_squash_windows(self):
+        index = [15., 16., 17., 18.]
+        df = pd.DataFrame(
+            index=index,
+            data={'delta': [1., 1., 1., 1.], 'state': [1, 0, 1, 0]},
+        )
+        windows = {
+            # Starts and ends in the middle of rows
+            'a': (16.5, 17.5),
+            # Contained in a single row
+            'b': (16.2, 16.8),
+            # Before the first row
+            'c': (8, 9),
+            # Overlaps the first and last rows
+            'd': (10, 30),
+            # Overlaps the first row
+            'e': (14.5, 15.5),
+            # Overlaps the last row
+            'f': (17.5, 20),
+            # Zero-length windows
+            'g': (16.5, 16.5),
+            'h': (17, 17),
+        }
+        squashed = du.df_squash_windows(df, windows)
+
+        expected = pd.DataFrame(
+            index=pd.MultiIndex.from_tuples(
+                [
+                    ('a', 16.5), ('a', 17.),
+                    ('b', 16.2),
+                    ('d', 15.), ('d', 16.), ('d', 17.), ('d', 18.),
+                    ('e', 15.),
+                    ('f', 17.5), ('f', 18.),
+                    ('g', 16.5),
+                ],
+                names=['window', None],
+            ),
+            data={
+                'delta': [0.5, 0.5, 0.6, 1., 1., 1., 1., 0.5, 0.5, 1., 0.],
+                'state': [0, 1, 0, 1, 0, 1, 0, 1, 1, 0, 0],
+            },
+        )
+        pd.testing.assert_frame_equal(squashed, expected)
+
+    def test_df_window_signals(self):
+        index = [1., 2., 3., 4., 5., 6.]
+        df = pd.DataFrame(
+            index=index,
+            data={'cpu': [0, 1, 2, 0, 1, 0], 'value': range(6)},
+        )
+        windowed = du.df_window_signals(df, (4.5, 6), ['cpu'])
+        # CPU 2 has no event in the window, so it is not part of the initial
+        # values
+        self.assertEqual(windowed.index.tolist(), [2., 4., 4., 5., 6.])
+        self.assertEqual(windowed['cpu'].tolist(), [1, 0, 0, 1, 0])
+
+
+class IntegrateCheck(TestCase):
+    def _make_df(self):
+        index = np.cumsum(np.linspace(0.001, 0.01, 100))
+        df = pd.DataFrame(
+            {
+                'a': np.sin(index * 100),
+                'b': np.cos(index * 10),
+                'group': np.arange(len(index)) % 3,
+            },
+            index=index,
+        )
+        df.loc[df.index[::7], 'a'] = np.nan
+        return df
+
+    def test_df_integrate(self):
+        df = self._make_df()
+        for method, rect_step in [('rect', 'post'), ('rect', 'pre'), ('trapz', 'post')]:
+            kwargs = dict(method=method, rect_step=rect_step)
+            area = du.df_integrate(df[['a', 'b']], **kwargs)
+            mean = du.df_mean(df[['a', 'b']], **kwargs)
+            for col in ('a', 'b'):
+                self.assertAlmostEqual(area[col], du.series_integrate(df[col], **kwargs))
+                self.assertAlmostEqual(mean[col], du.series_mean(df[col], **kwargs))
+
+    def test_df_integrate_by(self):
+        df = self._make_df()
+        for method in ('rect', 'trapz'):
+            area = du.df_integrate(df, by='group', method=method)
+            self.assertEqual(sorted(area.index), [0, 1, 2])
+            for group, group_df in df.groupby('group'):
+                for col in ('a', 'b'):
+                    self.assertAlmostEqual(
+                        area.loc[group, col],
+                        du.series_integrate(group_df[col], method=method),
+                    )
+
+    def test_df_integrate_window(self):
+        df = pd.DataFrame({'a': [0, 0, 2, 2, 2, 1, 1]}, index=np.arange(7.0))
+        self.assertEqual(du.df_integrate(df, window=(1.5, 5.5))['a'], 6.5)
+        self.assertEqual(du.df_mean(df, window=(1.5, 5.5))['a'], 6.5 / 4)
+        # The segment between 1 and 2 is interpolated from 1 to 2 in the window
+        self.assertEqual(du.df_integrate(df, method='trapz', window=(1.5, 5.5))['a'], 0.75 + 2 + 2 + 1.5 + 0.5)
+
+
+class StepSignalCheck(TestCase):
+    def test_combine(self):
+        a = du.StepSignal([0.0, 2.0, 4.0], [1, 0, 1])
+        b = du.StepSignal([1.0, 2.0, 3.0], [0, 1, 0])
+
+        # b is undefined at t=0, so is the result
+        c = a | b
+        self.assertEqual(c.index.tolist(), [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(c.values.tolist(), [1, 1, 0, 1])
+
+        c = a & b
+        self.assertEqual(c.index.tolist(), [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(c.values.tolist(), [0, 0, 0, 0])
+
+        c = a ^ 1
+        self.assertEqual(c.index.tolist(), a.index.tolist())
+        self.assertEqual(c.values.tolist(), [0, 1, 0])
+
+    def test_integrate(self):
+        series = pd.Series([0, 0, 2, 2, 2, 1, 1], index=np.arange(7.0))
+        signal = du.StepSignal.from_series(series)
+
+        self.assertEqual(signal.integrate(), du.series_integrate(series))
+        self.assertEqual(signal.integrate(end=8), 9)
+        pd.testing.assert_series_equal(signal.to_series(), series)
+
+
+class RollingCheck(TestCase):
+    def _make_series(self):
+        index = np.cumsum(np.linspace(0.001, 0.01, 200))
+        values = np.sin(index * 100)
+        values[::17] = np.nan
+        return pd.Series(values, index=index)
+
+    def test_series_rolling_agg(self):
+        series = self._make_series()
+        for agg in ('mean', 'sum', 'min', 'max'):
+            expected = du.series_rolling_apply(
+                series,
+                lambda s: getattr(s, agg)(),
+                0.05,
+                window_float_index=False,
+            )
+            pd.testing.assert_series_equal(
+                du.series_rolling_agg(series, 0.05, agg),
+                expected,
+            )
+
+        expected = du.series_rolling_apply(series, lambda s: s.count(), 0.05)
+        count = du.series_rolling_agg(series, 0.05, 'count')
+        pd.testing.assert_series_equal(count[expected.notna()], expected.dropna())
+
+    def test_series_rolling_agg_integral(self):
+        series = pd.Series([0, 0, 2, 2, 2, 1, 1], index=np.arange(7.0))
+
+        integral = du.series_rolling_agg(series, 2.5, 'integral')
+        self.assertEqual(integral.tolist(), [0, 0, 0, 2, 4, 5, 4])
+
+        mean = du.series_rolling_agg(series, 2.5, 'time_weighted_mean')
+        self.assertEqual(mean.tolist(), [0, 0, 0, 2 / 2.5, 4 / 2.5, 5 / 2.5, 4 / 2.5])
+
+    def test_series_rolling_apply_known_func(self):
+        series = self._make_series()
+        pd.testing.assert_series_equal(
+            du.series_rolling_apply(series, np.max, 0.05, center=True),
+            du.series_rolling_agg(series, 0.05, 'max', center=True),
+        )
@@ -16,7 +16,9 @@
 #
 
 from collections import OrderedDict
+from itertools import product
 from unittest import TestCase
+import copy
 import os
 import shutil
 from tempfile import mkdtemp
@@ -26,6 +28,7 @@ from devlib.target import KernelVersion
 from lisa.energy_model import (EnergyModel, ActiveState, EnergyModelCapacityError,
                                EnergyModelNode, EnergyModelRoot, PowerDomain)
 from lisa.platforms.platinfo import PlatformInfo
+from lisa.platforms import hikey620
 from lisa.trace import Trace
 from .utils import StorageTestCase
 
@@ -202,6 +205,59 @@ class TestOptimalPlacement(TestCase):
         self.assertRaises(EnergyModelCapacityError,
                           em.get_optimal_placements, tasks)
 
+    def test_brute_force(self):
+        """
+        Check the placements against an exhaustive search
+        """
+        for task_utils in (
+            [10, 10, 100],
+            [50, 150, 150, 300],
+            [30, 80, 120, 120, 200],
+        ):
+            candidates = {}
+            for cpus in product(em.cpus, repeat=len(task_utils)):
+                util = [0 for _ in em.cpus]
+                for cpu, task_util in zip(cpus, task_utils):
+                    util[cpu] += task_util
+                util = tuple(util)
+                freqs, overutilized = em._guess_freqs(util, 0)
+                if util not in candidates and not overutilized:
+                    power = em.estimate_from_cpu_util(util, freqs=freqs)
+                    candidates[util] = sum(power.values())
+
+            min_power = min(candidates.values())
+            expected = [
+                util
+                for util, power in candidates.items()
+                if power == min_power
+            ]
+
+            tasks = {
+                'task' + str(i): util
+                for i, util in enumerate(task_utils)
+            }
+            self.assertPlacementListEqual(
+                em.get_optimal_placements(tasks), expected)
+
+    def test_branch_and_bound(self):
+        """
+        Check the placements of many distinct tasks on 8 CPUs, which are
+        found without exploring all the possible placements
+        """
+        nrg_model = copy.deepcopy(hikey620.nrg_model)
+        task_utils = [11, 23, 37, 52, 68, 85, 103, 122, 142, 163]
+        tasks = {
+            'task' + str(i): util
+            for i, util in enumerate(task_utils)
+        }
+
+        placements = nrg_model.get_optimal_placements(tasks)
+        # Same result as an exhaustive search
+        self.assertEqual(len(placements), 1200)
+        self.assertIn((369, 362, 75, 0, 0, 0, 0, 0), placements)
+        for placement in placements:
+            self.assertEqual(sum(placement), sum(task_utils))
+
 
 class TestBiggestCpus(TestCase):
     def test_biggest_cpus(self):
@@ -256,6 +312,31 @@ class TestEnergyEst(TestCase):
             + (0.5 * 10)  # LITTLE cluster active power
             + 2)         # big cluster power
 
+    def test_batch(self):
+        cpu_utils = list(product([0, 50, 100, 200, 300, 400, 10000], repeat=4))
+        power = em.estimate_from_cpu_util_batch(cpu_utils)
+
+        for i, utils in enumerate(cpu_utils):
+            for node, node_power in em.estimate_from_cpu_util(utils).items():
+                self.assertAlmostEqual(power[node][i], node_power)
+
+    def test_batch_idle_states(self):
+        cpu_utils = [[0, 50, 0, 0], [100, 0, 300, 0]]
+        freqs = [[1000, 1000, 3000, 3000], [2000, 2000, 4000, 4000]]
+        idle_idxs = [[2, 0, 1, -1], [0, 1, 0, 2]]
+        power = em.estimate_from_cpu_util_batch(
+            cpu_utils, freqs=freqs, idle_idxs=idle_idxs)
+
+        for i, utils in enumerate(cpu_utils):
+            idle_states = [
+                node.idle_state_by_idx(max(idx, 0))
+                for node, idx in zip(em.cpu_nodes, idle_idxs[i])
+            ]
+            exp_power = em.estimate_from_cpu_util(
+                utils, freqs=freqs[i], idle_states=idle_states)
+            for node, node_power in exp_power.items():
+                self.assertAlmostEqual(power[node][i], node_power)
+
 
 class TestIdleStates(TestCase):
     def test_zero_util_deepest(self):
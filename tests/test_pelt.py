@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lisa.pelt import (
+    PELT_SCALE, PELT_WINDOW, PELT_HALF_LIFE, simulate_pelt,
+    simulate_pelt_batch, pelt_settling_time,
+)
+
+
+class TestSimulatePELT(TestCase):
+
+    @staticmethod
+    def _make_activations(period, duty_cycle, duration, start=1000.0):
+        """
+        Activations of a periodic task
+        """
+        starts = np.arange(start, start + duration, period)
+        index = np.sort(np.concatenate([starts, starts + period * duty_cycle]))
+        values = np.tile([1, 0], len(starts))
+        return pd.Series(values, index=index)
+
+    def test_always_running(self):
+        activations = pd.Series(1, index=np.arange(1000, 1001, 0.004))
+        settling_time = pelt_settling_time(1, init=0, final=PELT_SCALE)
+
+        signal = simulate_pelt(activations)
+        signal = signal[activations.index[0] + settling_time:]
+
+        self.assertTrue((signal <= PELT_SCALE).all())
+        self.assertTrue((signal >= PELT_SCALE * 0.99).all())
+
+    def test_never_running(self):
+        activations = pd.Series(0, index=np.arange(1000, 1001, 0.004))
+        signal = simulate_pelt(activations, init=PELT_SCALE)
+
+        self.assertTrue(signal.is_monotonic_decreasing)
+        self.assertLess(signal.iloc[-1], 1)
+
+    @staticmethod
+    def _ref_simulate_pelt(activations, init=0, index=None):
+        """
+        Straightforward scalar implementation of the PELT recurrence, one
+        window at a time, independent from :mod:`lisa.pelt` internals.
+        """
+        window = PELT_WINDOW
+        alpha = 1 - (1 / 2)**(1 / PELT_HALF_LIFE)
+
+        if index is not None:
+            activations = activations.reindex(index, method='ffill').dropna()
+
+        acc = 0
+        signal = init / PELT_SCALE
+        output = []
+        prev_clock = None
+        for clock, running in activations.items():
+            if prev_clock is None:
+                prev_clock = clock
+                continue
+
+            delta = clock - prev_clock
+            windows = int(clock // window - prev_clock // window)
+            if windows:
+                acc += running * (window - (prev_clock % window)) / window
+                signal = alpha * acc + (1 - alpha) * signal
+                for _ in range(windows - 1):
+                    signal = alpha * running + (1 - alpha) * signal
+
+                last_window_fraction = (clock % window) / window
+                extrapolated = running * alpha + (1 - alpha) * signal
+                out = signal + last_window_fraction * (extrapolated - signal)
+                signal += alpha * running * last_window_fraction
+                acc = 0
+            else:
+                acc += running * delta / window
+                out = output[-1] / PELT_SCALE if output else init / PELT_SCALE
+
+            output.append(out * PELT_SCALE)
+            prev_clock = clock
+
+        return pd.Series(output, index=activations.index[1:])
+
+    def test_batch(self):
+        """
+        Check the batch simulation against a reference implementation
+        """
+        activations = [
+            self._make_activations(0.016, 0.25, 1),
+            self._make_activations(0.003, 0.8, 0.5, start=1.2345),
+            self._make_activations(0.1, 0.5, 3),
+        ]
+        inits = [0, 100, PELT_SCALE]
+        index = [
+            None,
+            pd.Index(np.linspace(1.3, 1.7, 1000)),
+            None,
+        ]
+
+        batch = simulate_pelt_batch(activations, init=inits, index=index)
+        self.assertEqual(len(batch), len(activations))
+        for simulated, _activations, init, _index in zip(batch, activations, inits, index):
+            ref = self._ref_simulate_pelt(_activations, init=init, index=_index)
+            np.testing.assert_allclose(simulated.index, ref.index)
+            np.testing.assert_allclose(simulated.values, ref.values, rtol=1e-9, atol=1e-9)
+            np.testing.assert_allclose(
+                simulate_pelt(_activations, init=init, index=_index).values,
+                ref.values, rtol=1e-9, atol=1e-9,
+            )
+
+        # Initial values given as an array
+        array_batch = simulate_pelt_batch(activations, init=np.array(inits), index=index)
+        for simulated, expected in zip(array_batch, batch):
+            pd.testing.assert_series_equal(simulated, expected)
+
+        # A scalar initial value is used for all the series
+        scalar_batch = simulate_pelt_batch(activations, init=np.float64(100), index=index)
+        for simulated, _activations, _index in zip(scalar_batch, activations, index):
+            pd.testing.assert_series_equal(
+                simulated,
+                simulate_pelt(_activations, init=100, index=_index),
+            )
@@ -0,0 +1,240 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, ARM Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import shlex
+from unittest import TestCase
+
+from devlib.exception import TargetStableError
+
+from lisa.platforms.platinfo import PlatformInfo
+
+""" A test suite for the target probing of PlatformInfo."""
+
+CPU_SYSFS = '/sys/devices/system/cpu'
+
+
+def cpu_path(cpu, name):
+    return '{}/cpu{}/{}'.format(CPU_SYSFS, cpu, name)
+
+
+class FakeCpufreq:
+    def __init__(self, target):
+        self.target = target
+
+    def get_related_cpus(self, cpu):
+        self.target.calls.append(('get_related_cpus', cpu))
+        return self.target.domains[cpu]
+
+    def list_frequencies(self, cpu):
+        self.target.calls.append(('list_frequencies', cpu))
+        return [100, 200]
+
+
+class FakeSched:
+    def __init__(self, target):
+        self.target = target
+
+    def get_capacities(self, default=None):
+        self.target.calls.append(('get_capacities',))
+        return {cpu: 512 for cpu in range(self.target.number_of_cpus)}
+
+
+class FakeTarget:
+    """
+    Minimal target executing the probing script by serving the content of
+    ``files``. Files mapped to ``None`` cannot be read.
+    """
+    busybox = '/data/local/tmp/bin/busybox'
+    abi = 'arm64'
+    os = 'linux'
+    kernel_version = None
+
+    class config:
+        typed_config = None
+
+    def __init__(self, files, number_of_cpus, domains=None, script_error=None):
+        self.files = files
+        self.number_of_cpus = number_of_cpus
+        self.domains = domains or {}
+        self.script_error = script_error
+        self.installed = {}
+        self.removed = []
+        self.calls = []
+        self.cpufreq = FakeCpufreq(self)
+        self.sched = FakeSched(self)
+
+    def is_module_available(self, module):
+        return True
+
+    def list_online_cpus(self):
+        return list(range(self.number_of_cpus))
+
+    def revertable_write_value(self, path, value):
+        raise TargetStableError('cannot write to {}'.format(path))
+
+    def install(self, local_path):
+        with open(local_path) as f:
+            content = f.read()
+        remote_path = '/data/local/tmp/bin/lisa_platinfo_probe.sh'
+        self.installed[remote_path] = content
+        return remote_path
+
+    def file_exists(self, path):
+        return path in self.installed
+
+    def remove(self, path):
+        self.removed.append(path)
+        del self.installed[path]
+
+    def execute(self, cmd):
+        self.calls.append(('execute',))
+        if self.script_error:
+            raise self.script_error
+
+        out = []
+        for line in self.installed[cmd].splitlines():
+            words = list(shlex.shlex(line, posix=True, punctuation_chars=True))
+            if words[:2] != ['echo', 'LISA_PROBE_BEGIN']:
+                continue
+
+            path = words[2]
+            content = self.files.get(path)
+            out.append('LISA_PROBE_BEGIN {}\n'.format(path))
+            if content is not None:
+                out.append(content)
+            # "echo" after "cat" adds a newline
+            out.append('\n')
+            out.append('LISA_PROBE_END {}\n'.format(0 if content is not None else 1))
+
+        return ''.join(out)
+
+
+class TestReadTargetFiles(TestCase):
+    def test_read(self):
+        target = FakeTarget(
+            {
+                '/a': '1 2 3\n',
+                '/no_newline': '42',
+                '/multiline': 'foo\nbar\n',
+                '/empty': '',
+                '/unreadable': None,
+            },
+            number_of_cpus=1,
+        )
+        paths = ['/a', '/no_newline', '/multiline', '/empty', '/unreadable', '/missing']
+        content = PlatformInfo._read_target_files(target, paths)
+
+        self.assertEqual(content, {
+            '/a': '1 2 3',
+            '/no_newline': '42',
+            '/multiline': 'foo\nbar',
+            '/empty': '',
+        })
+        self.assertEqual(target.calls, [('execute',)])
+        # The script is not left on the target
+        self.assertEqual(target.installed, {})
+        self.assertEqual(len(target.removed), 1)
+
+    def test_script_error(self):
+        target = FakeTarget(
+            {'/a': '1'},
+            number_of_cpus=1,
+            script_error=TargetStableError('cannot execute'),
+        )
+        content = PlatformInfo._read_target_files(target, ['/a'])
+
+        self.assertEqual(content, {})
+        self.assertEqual(target.installed, {})
+
+
+class TestAddTargetSrc(TestCase):
+    DOMAINS = {
+        0: [0, 1],
+        1: [0, 1],
+        2: [2, 3],
+        3: [2, 3],
+    }
+
+    def _get_files(self):
+        files = {
+            '{}/online'.format(CPU_SYSFS): '0-3\n',
+        }
+        for cpu, domain in self.DOMAINS.items():
+            files[cpu_path(cpu, 'cpufreq/related_cpus')] = ' '.join(map(str, domain)) + '\n'
+            files[cpu_path(cpu, 'cpu_capacity')] = '{}\n'.format(512 if cpu < 2 else 1024)
+
+        for cpu in (0, 1):
+            files[cpu_path(cpu, 'cpufreq/scaling_available_frequencies')] = '500000 1000000 \n'
+
+        # No scaling_available_frequencies, so time_in_state is used instead
+        for cpu in (2, 3):
+            files[cpu_path(cpu, 'cpufreq/stats/time_in_state')] = '2000000 10\n1500000 20\n700000 30\n'
+
+        return files
+
+    def _add_target_src(self, target, **kwargs):
+        plat_info = PlatformInfo()
+        plat_info.add_target_src(target, rta_calib_res_dir=None, **kwargs)
+        return plat_info
+
+    def test_bulk_probe(self):
+        target = FakeTarget(self._get_files(), 4, self.DOMAINS)
+        plat_info = self._add_target_src(target)
+
+        self.assertEqual(plat_info['freq-domains'], [[0, 1], [2, 3]])
+        self.assertEqual(plat_info['freqs'], {
+            0: [500000, 1000000],
+            1: [500000, 1000000],
+            2: [700000, 1500000, 2000000],
+            3: [700000, 1500000, 2000000],
+        })
+        self.assertEqual(plat_info['cpu-capacities'], {0: 512, 1: 512, 2: 1024, 3: 1024})
+        # Everything has been read by a single script
+        self.assertEqual(target.calls, [('execute',)])
+        self.assertEqual(target.installed, {})
+
+    def test_missing_capacity(self):
+        files = self._get_files()
+        files[cpu_path(3, 'cpu_capacity')] = None
+        target = FakeTarget(files, 4, self.DOMAINS)
+        plat_info = self._add_target_src(target)
+
+        self.assertEqual(plat_info['cpu-capacities'], {cpu: 512 for cpu in range(4)})
+        self.assertIn(('get_capacities',), target.calls)
+
+    def test_script_error(self):
+        target = FakeTarget(
+            self._get_files(), 4, self.DOMAINS,
+            script_error=TargetStableError('cannot execute'),
+        )
+        plat_info = self._add_target_src(target)
+
+        self.assertEqual(plat_info['freq-domains'], [[0, 1], [2, 3]])
+        self.assertEqual(plat_info['freqs'], {cpu: [100, 200] for cpu in range(4)})
+        self.assertEqual(plat_info['cpu-capacities'], {cpu: 512 for cpu in range(4)})
+        for call in (('get_related_cpus', 0), ('list_frequencies', 3), ('get_capacities',)):
+            self.assertIn(call, target.calls)
+        self.assertEqual(target.installed, {})
+
+    def test_no_bulk_probe(self):
+        target = FakeTarget(self._get_files(), 4, self.DOMAINS)
+        plat_info = self._add_target_src(target, bulk_probe=False)
+
+        self.assertEqual(plat_info['freqs'], {cpu: [100, 200] for cpu in range(4)})
+        self.assertNotIn(('execute',), target.calls)
+
+# vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab
@@ -24,7 +24,8 @@ import copy
 
 from devlib.target import KernelVersion
 
-from lisa.trace import Trace, TaskID
+from lisa.trace import Trace, TraceStream, TaskID
+from lisa.analysis.tasks import TaskState
 from lisa.datautils import df_squash
 from lisa.platforms.platinfo import PlatformInfo
 from .utils import StorageTestCase, ASSET_DIR
@@ -131,6 +132,15 @@ class TestTrace(TraceTestCase):
                           (1383, ['jbd2/sda2-8'])]:
             self.assertEqual(tasks_dict[pid], name)
 
+    def test_df_task_ids(self):
+        df = self.trace.df_task_ids()
+        self.assertFalse(df.duplicated().any())
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertEqual(
+            set(TaskID(pid=pid, comm=comm) for pid, comm in df.values),
+            set(self.trace.task_ids),
+        )
+
     def test_setTaskName(self):
         """TestTrace: getTaskBy{Pid,Name}() properly track tasks renaming"""
         in_data = """
@@ -361,6 +371,158 @@ class TestTrace(TraceTestCase):
                 continue
             self.assertEqual(e, r)
 
+    def test_cache(self):
+        """
+        Test that loading a trace from the cache gives the same dataframes
+        """
+        cache_path = os.path.join(self.res_dir, 'cache')
+
+        def make_trace(events):
+            return Trace(self.trace_path, self.plat_info, events,
+                         cache=True, cache_path=cache_path)
+
+        # Only cache part of the events, so that the rest is parsed when the
+        # trace is loaded again
+        make_trace(self.events[:2])
+        trace = make_trace(self.events)
+
+        self.assertEqual(trace.available_events, self.trace.available_events)
+        self.assertEqual(trace.basetime, self.trace.basetime)
+        for event in trace.available_events:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event),
+                self.trace.df_events(event),
+            )
+
+    def test_lazy(self):
+        """
+        Test that a lazy trace only parses the events that are used, and gives
+        the same results as a regular trace
+        """
+        trace = Trace(self.trace_path, self.plat_info, self.events, lazy=True)
+
+        self.assertEqual(trace.available_events, self.trace.available_events)
+        self.assertEqual(trace.start, self.trace.start)
+        self.assertEqual(trace.end, self.trace.end)
+
+        df = trace.df_events('sched_switch')
+        self.assertEqual(list(trace._df_events.keys()), ['sched_switch'])
+        pd.testing.assert_frame_equal(df, self.trace.df_events('sched_switch'))
+
+        for event in trace.available_events:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event),
+                self.trace.df_events(event),
+            )
+
+    def test_jobs(self):
+        """
+        Test that parsing the trace with multiple processes gives the same
+        result as a single process
+        """
+        trace = Trace(self.trace_path, self.plat_info, self.events, jobs=3)
+
+        self.assertEqual(trace.available_events, self.trace.available_events)
+        for event in trace.available_events:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event),
+                self.trace.df_events(event),
+            )
+
+    def test_compact_dtypes(self):
+        """
+        Test that compacting the dtypes reduces memory usage without changing
+        the data
+        """
+        trace = Trace(self.trace_path, self.plat_info, self.events, compact_dtypes=True)
+
+        self.assertEqual(trace.available_events, self.trace.available_events)
+        memory = trace.memory_usage()
+        ref_memory = self.trace.memory_usage()
+        self.assertEqual(sorted(memory.index), sorted(ref_memory.index))
+        self.assertTrue((memory < ref_memory).all())
+
+        for event in trace.available_events:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event),
+                self.trace.df_events(event),
+                check_dtype=False,
+                check_categorical=False,
+            )
+
+    def test_stream(self):
+        """
+        Test that feeding the trace to a :class:`TraceStream` in small pieces
+        gives the same result as parsing the whole trace
+        """
+        with open(self.trace_path, 'rb') as f:
+            data = f.read()
+
+        stream_path = os.path.join(self.res_dir, 'stream.txt')
+        with TraceStream(stream_path, self.events, self.plat_info, chunk_size=10000) as stream:
+            for i in range(0, len(data), 1000):
+                stream.feed(data[i:i + 1000])
+
+        with open(stream_path, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+        trace = stream.get_trace()
+        self.assertEqual(trace.available_events, self.trace.available_events)
+        for event in trace.available_events:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event),
+                self.trace.df_events(event),
+            )
+
+    def test_stream_max_rows(self):
+        """
+        Test that a :class:`TraceStream` only keeps the most recent rows in
+        memory
+        """
+        stream_path = os.path.join(self.res_dir, 'stream.txt')
+        with TraceStream(stream_path, self.events, self.plat_info, max_rows=100) as stream:
+            with open(self.trace_path, 'rb') as f:
+                stream.feed(f.read())
+
+        df = stream.get_trace().df_events('sched_switch')
+        expected = self.trace.df_events('sched_switch').iloc[-100:]
+        pd.testing.assert_frame_equal(df, expected)
+
+        # The dropped rows are spilled to disk and still available
+        trace = stream.get_trace(full=True)
+        for event in trace.available_events:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event),
+                self.trace.df_events(event),
+            )
+
+    def test_stream_spill_path(self):
+        """
+        Test that a :class:`TraceStream` only removes its own files from
+        ``spill_path``
+        """
+        stream_path = os.path.join(self.res_dir, 'stream.txt')
+        spill_path = os.path.join(self.res_dir, 'spill')
+        os.makedirs(spill_path)
+        unrelated = ['results.csv', 'foo-1.parquet', 'sched_switch.parquet']
+        for filename in unrelated + ['sched_switch-42.parquet']:
+            with open(os.path.join(spill_path, filename), 'w'):
+                pass
+
+        with TraceStream(stream_path, self.events, self.plat_info, max_rows=100, spill_path=spill_path) as stream:
+            with open(self.trace_path, 'rb') as f:
+                stream.feed(f.read())
+
+        filenames = set(os.listdir(spill_path))
+        self.assertTrue(set(unrelated) <= filenames)
+        self.assertNotIn('sched_switch-42.parquet', filenames)
+
+        trace = stream.get_trace(full=True)
+        pd.testing.assert_frame_equal(
+            trace.df_events('sched_switch'),
+            self.trace.df_events('sched_switch'),
+        )
+
     def test_df_tasks_states(self):
         df = self.trace.analysis.tasks.df_tasks_states()
 
@@ -368,6 +530,115 @@ class TestTrace(TraceTestCase):
         # Proxy check for detecting delta computation changes
         self.assertAlmostEqual(df.delta.sum(), 207.705551)
 
+    def test_df_tasks_states_summary(self):
+        """
+        Test that the per-task views derived from the states summary match
+        the states of each task
+        """
+        tasks = self.trace.analysis.tasks
+        df = tasks.df_tasks_states_summary()
+
+        self.assertEqual(df['count'].sum(), 4780)
+        self.assertAlmostEqual(df['time'].sum(), 207.705551)
+
+        runtime_df = tasks.df_tasks_runtime()
+        for pid in (1, 1639, 1383):
+            states_df = tasks.df_task_states(pid)
+            runtime = states_df[states_df.curr_state == TaskState.TASK_ACTIVE].delta.sum()
+            self.assertAlmostEqual(runtime_df.loc[pid, 'runtime'], runtime)
+            self.assertAlmostEqual(tasks.df_task_total_residency(pid)['runtime'].sum(), runtime)
+
+    def test_funcgraph_calls(self):
+        """
+        Test that funcgraph entries and exits are paired into calls
+        """
+        in_data = """
+          <idle>-0     [001]   100.000100: funcgraph_entry:      func=0xa000 depth=0
+          <idle>-0     [001]   100.000200: funcgraph_entry:      func=0xb000 depth=1
+          <idle>-0     [001]   100.000300: funcgraph_exit:       func=0xb000 calltime=100000200000 rettime=100000300000 overrun=0 depth=1
+          <idle>-0     [001]   100.000350: funcgraph_entry:      func=0xc000 depth=1
+             sh-12     [000]   100.000360: funcgraph_entry:      func=0xc000 depth=1
+          <idle>-0     [001]   100.000400: funcgraph_exit:       func=0xc000 calltime=100000350000 rettime=100000400000 overrun=0 depth=1
+          <idle>-0     [001]   100.000500: funcgraph_exit:       func=0xa000 calltime=100000100000 rettime=100000500000 overrun=0 depth=0
+             sh-12     [000]   100.000600: funcgraph_exit:       func=0xc000 calltime=100000360000 rettime=100000600000 overrun=0 depth=1
+             sh-12     [000]   100.000700: funcgraph_entry:      func=0xa000 depth=0
+        """
+        trace_path = os.path.join(self.res_dir, "funcgraph_trace.txt")
+        with open(trace_path, "w") as fout:
+            fout.write(in_data)
+        trace = Trace(trace_path, events=['funcgraph_entry', 'funcgraph_exit'],
+                      normalize_time=False, plots_dir=self.res_dir)
+
+        analysis = trace.analysis.funcgraph
+        df = analysis.df_funcgraph_calls()
+        # The last entry has no matching exit
+        self.assertEqual(len(df), 4)
+        self.assertEqual(df['func'].tolist(), [0xa000, 0xb000, 0xc000, 0xc000])
+        self.assertEqual(df['caller_id'].tolist(), [-1, 0, 0, -1])
+        for duration, expected in zip(df['duration'], [400e-6, 100e-6, 50e-6, 240e-6]):
+            self.assertAlmostEqual(duration, expected)
+        self.assertAlmostEqual(df['self_duration'].iloc[0], 250e-6)
+
+        stats = analysis.df_funcgraph_stats()
+        self.assertEqual(stats.loc[0xc000, 'hits'], 2)
+        self.assertAlmostEqual(stats.loc[0xc000, 'time'], 290e-6)
+        self.assertAlmostEqual(stats.loc[0xa000, 'self_time'], 250e-6)
+
+    @staticmethod
+    def _ref_df_runtimes(df):
+        """
+        Straightforward state machine implementation of
+        :meth:`lisa.analysis.latency.LatencyAnalysis.df_runtimes`
+        """
+        runtimes = []
+        runtime = 0
+        spurious_wkp = False
+
+        for row in df.itertuples():
+            if row.curr_state == TaskState.TASK_WAKING:
+                if spurious_wkp:
+                    runtime += row.delta
+                    spurious_wkp = False
+                else:
+                    runtime = 0
+            elif row.curr_state == TaskState.TASK_ACTIVE:
+                if row.next_state == TaskState.TASK_WAKING:
+                    spurious_wkp = True
+                runtime += row.delta
+
+            runtimes.append(runtime)
+
+        df = df.copy()
+        df['running_time'] = pd.Series(runtimes, index=df.index, dtype=float)
+        df.running_time = df.running_time.shift(1).fillna(0)
+
+        return df[~df.curr_state.isin([
+            TaskState.TASK_ACTIVE,
+            TaskState.TASK_WAKING
+        ])][["curr_state", "running_time"]]
+
+    def test_df_latency(self):
+        """
+        Test that the runtimes and activations match a reference
+        implementation for all tasks
+        """
+        analysis = self.trace.analysis.latency
+        for task in self.trace.task_ids:
+            df = self.trace.analysis.tasks.df_task_states(task)
+
+            pd.testing.assert_frame_equal(
+                analysis.df_runtimes(task),
+                self._ref_df_runtimes(df),
+            )
+
+            wkp_df = df[df.curr_state == TaskState.TASK_WAKING]
+            activations = analysis.df_activations(task).activation_interval
+            self.assertTrue(np.array_equal(
+                activations.values[1:],
+                np.diff(wkp_df.index.values),
+            ))
+            self.assertTrue(np.isnan(activations.values[:1]).all())
+
 
 class TestTraceView(TraceTestCase):
 
@@ -414,6 +685,28 @@ class TestTraceView(TraceTestCase):
 
         self.assertAlmostEqual(trace.time_range, expected_duration)
 
+    def test_view_bounds(self):
+        for window in [(None, None), (80, None), (None, 80), (80, 81)]:
+            view = self.trace.get_view(window)
+            t_min = window[0] if window[0] is not None else -np.inf
+            t_max = window[1] if window[1] is not None else np.inf
+
+            index = np.concatenate([
+                self.trace.df_events(event).index
+                for event in self.trace.available_events
+            ])
+            index = index[(index >= t_min) & (index <= t_max)]
+            self.assertEqual(view.start, index.min())
+            self.assertEqual(view.end, index.max())
+
+    def test_view_cache(self):
+        view = self.trace[80:81]
+        self.assertIs(view, self.trace[80:81])
+        self.assertIs(
+            view.df_events('sched_switch'),
+            view.df_events('sched_switch'),
+        )
+
 
 class TestNestedTraceView(TestTraceView):
     def __init__(self, *args, **kwargs):
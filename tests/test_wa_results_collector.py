@@ -0,0 +1,323 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import csv
+import glob
+import itertools
+import json
+import operator
+import os
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lisa.platforms.platinfo import PlatformInfo
+from lisa.wa_results_collector import WaResultsCollector
+
+from .utils import StorageTestCase
+
+""" A test suite for the WA3 results collector."""
+
+
+def make_collector(results_df):
+    """
+    Build a :class:`WaResultsCollector` from an existing ``results_df``,
+    without reading any WA3 output directory.
+    """
+    collector = WaResultsCollector.__new__(WaResultsCollector)
+    collector.plat_info = None
+    collector.parse_traces = False
+    collector.use_cached_trace_metrics = True
+    collector.display_charts = False
+    collector.jobs = 1
+    collector.results_df = results_df
+    return collector
+
+
+class TestResultsDf(StorageTestCase):
+    KERNELS = ['aaaaaaa', 'bbbbbbb']
+    WORKLOADS = ['jankbench', 'youtube']
+    TAGS = ['sched', np.nan, 'perf']
+    METRICS = ['frame_total_duration', 'device_total_energy']
+
+    def _get_results_df(self):
+        rows = []
+        for kernel, workload, tag, metric in itertools.product(
+                self.KERNELS, self.WORKLOADS, self.TAGS, self.METRICS):
+            test = '{}-{}'.format(workload, 'list_view' if tag == 'sched' else 'video')
+            job_id = '{}-{}'.format(workload, tag)
+            for iteration in (1, 2):
+                rows.append({
+                    'workload': workload,
+                    'id': job_id,
+                    'iteration': iteration,
+                    'metric': metric,
+                    'value': float(len(rows)),
+                    'units': 'ms' if metric == 'frame_total_duration' else 'J',
+                    'tag': tag,
+                    'test': test,
+                    '_job_dir': '/wa/{}/{}-{}'.format(kernel, job_id, iteration),
+                    'kernel_sha1': kernel,
+                    'kernel': kernel[:3],
+                })
+
+        return pd.DataFrame(rows)
+
+    def test_parquet_round_trip(self):
+        df = self._get_results_df()
+        path = os.path.join(self.res_dir, 'results.parquet')
+        make_collector(df).to_parquet(path)
+        collector = WaResultsCollector.from_parquet(path, display_charts=False)
+
+        pd.testing.assert_frame_equal(collector.results_df, df)
+
+    def test_select(self):
+        df = self._get_results_df()
+        collector = make_collector(df)
+
+        def select(tag='.*', kernel='.*', test='.*'):
+            return df[
+                df['tag'].str.contains(tag, na=False) &
+                df['kernel'].str.contains(kernel, na=False) &
+                df['test'].str.contains(test, na=False)
+            ]
+
+        for params in [
+            {},
+            {'tag': 'sched'},
+            {'tag': '^s|^p'},
+            {'kernel': 'aaa', 'test': 'video'},
+            {'tag': 'perf', 'kernel': 'bbb', 'test': 'youtube'},
+            {'tag': 'missing'},
+        ]:
+            pd.testing.assert_frame_equal(collector._select(**params), select(**params))
+
+    def test_get_metric_df(self):
+        df = self._get_results_df()
+        collector = make_collector(df)
+        for workload, metric, tag, kernel, test in itertools.product(
+                self.WORKLOADS + ['unknown'],
+                self.METRICS + ['unknown'],
+                ['.*', 'sched', 'missing'],
+                ['.*', 'bbb'],
+                ['.*', 'video']):
+
+            expected = df[
+                df['tag'].str.contains(tag, na=False) &
+                df['kernel'].str.contains(kernel, na=False) &
+                df['test'].str.contains(test, na=False) &
+                (df['workload'] == workload) &
+                (df['metric'] == metric)
+            ]
+            metric_df = collector._get_metric_df(workload, metric, tag, kernel, test)
+            if expected.empty:
+                self.assertIsNone(metric_df)
+            else:
+                pd.testing.assert_frame_equal(metric_df, expected)
+
+
+class TestDerivedMetrics(TestCase):
+    def _get_metrics_df(self, metrics):
+        return pd.DataFrame(
+            [
+                ('wk1', 'idle', iteration, metric, value, 'J')
+                for iteration, metric, value in metrics
+            ],
+            columns=['id', 'workload', 'iteration', 'metric', 'value', 'units'],
+        )
+
+    def _get_derived(self, df, collector=None):
+        collector = collector or make_collector(None)
+        df = collector._add_derived_metrics(df)
+        return df[df['metric'] == 'device_total_energy']
+
+    def test_sum(self):
+        df = self._get_metrics_df([
+            (1, 'output_total_energy', 10),
+            (1, 'USB_total_energy', 1),
+            (2, 'output_total_energy', 20),
+            (2, 'USB_total_energy', 2),
+        ])
+        derived = self._get_derived(df)
+
+        self.assertEqual(derived['iteration'].tolist(), [1, 2])
+        self.assertEqual(derived['value'].tolist(), [11, 22])
+        self.assertEqual(derived['units'].tolist(), ['J', 'J'])
+        self.assertEqual(derived['id'].tolist(), ['wk1', 'wk1'])
+
+    def test_missing_metric(self):
+        df = self._get_metrics_df([
+            (1, 'output_total_energy', 10),
+            (1, 'USB_total_energy', 1),
+            (2, 'output_total_energy', 20),
+        ])
+        derived = self._get_derived(df)
+
+        # The iteration without a USB energy does not get a derived metric
+        self.assertEqual(derived['iteration'].tolist(), [1])
+        self.assertEqual(derived['value'].tolist(), [11])
+
+    def test_already_reported(self):
+        df = self._get_metrics_df([
+            (1, 'output_total_energy', 10),
+            (1, 'USB_total_energy', 1),
+            (1, 'device_total_energy', 42),
+        ])
+        collector = make_collector(None)
+
+        pd.testing.assert_frame_equal(collector._add_derived_metrics(df), df)
+
+    def test_units(self):
+        df = self._get_metrics_df([
+            (1, 'output_total_energy', 10),
+            (1, 'USB_total_energy', 1),
+        ])
+        collector = make_collector(None)
+        collector.DERIVED_METRICS = [
+            WaResultsCollector.DerivedMetric(
+                metric='device_total_energy',
+                from_metrics=['output_total_energy', 'USB_total_energy'],
+                func=operator.sub,
+                units='mJ',
+            ),
+        ]
+        derived = self._get_derived(df, collector)
+
+        self.assertEqual(derived['value'].tolist(), [9])
+        self.assertEqual(derived['units'].tolist(), ['mJ'])
+
+
+class TestWaDir(StorageTestCase):
+    TRACE = """
+          <idle>-0     [000]     0.100000: cpu_frequency:        state=500000 cpu_id=0
+          <idle>-0     [001]     0.100000: cpu_frequency:        state=500000 cpu_id=1
+          <idle>-0     [000]     0.200000: cpu_idle:             state=4294967295 cpu_id=0
+          <idle>-0     [000]     0.200010: sched_switch:         prev_comm=swapper/0 prev_pid=0 prev_prio=120 prev_state=0 next_comm=foo next_pid=10 next_prio=120
+             foo-10    [000]     0.300000: sched_switch:         prev_comm=foo prev_pid=10 prev_prio=120 prev_state=1 next_comm=swapper/0 next_pid=0 next_prio=120
+          <idle>-0     [000]     0.300010: cpu_idle:             state=0 cpu_id=0
+          <idle>-0     [001]     0.400000: cpu_idle:             state=4294967295 cpu_id=1
+          <idle>-0     [001]     0.400010: sched_switch:         prev_comm=swapper/1 prev_pid=0 prev_prio=120 prev_state=0 next_comm=bar next_pid=11 next_prio=120
+          <idle>-0     [000]     0.450000: cpu_frequency:        state=1000000 cpu_id=0
+          <idle>-0     [001]     0.450000: cpu_frequency:        state=1000000 cpu_id=1
+             bar-11    [001]     0.500000: sched_switch:         prev_comm=bar prev_pid=11 prev_prio=120 prev_state=1 next_comm=swapper/1 next_pid=0 next_prio=120
+          <idle>-0     [001]     0.500010: cpu_idle:             state=1 cpu_id=1
+"""
+
+    def _get_plat_info(self, domains):
+        return PlatformInfo({
+            'cpus-count': 2,
+            'freq-domains': domains,
+            'freqs': {cpu: [500000, 1000000] for cpu in range(2)},
+        })
+
+    def _make_wa_dir(self, job_ids, iterations):
+        """
+        Create a minimal WA3 output directory, with a trace for each job
+        iteration.
+        """
+        wa_dir = os.path.join(self.res_dir, 'wa_output')
+        os.makedirs(os.path.join(wa_dir, '__meta'))
+
+        with open(os.path.join(wa_dir, '__meta', 'target_info.json'), 'w') as f:
+            json.dump({'kernel_release': '4.14.0-g1234567'}, f)
+
+        jobs = []
+        rows = []
+        for job_id in job_ids:
+            for iteration in range(1, iterations + 1):
+                jobs.append({
+                    'id': job_id,
+                    'workload_name': 'idle',
+                    'classifiers': {'tag': 'sched'},
+                    'workload_parameters': {},
+                })
+                rows.append((job_id, 'idle', iteration, 'execution_time', iteration, 'seconds'))
+
+                job_dir = os.path.join(wa_dir, '{}-idle-{}'.format(job_id, iteration))
+                os.makedirs(job_dir)
+                with open(os.path.join(job_dir, 'trace.txt'), 'w') as f:
+                    f.write(self.TRACE)
+                with open(os.path.join(job_dir, 'result.json'), 'w') as f:
+                    json.dump({
+                        'status': 'OK',
+                        'artifacts': [{'name': 'trace-cmd-bin', 'path': 'trace.txt'}],
+                    }, f)
+
+        with open(os.path.join(wa_dir, '__meta', 'jobs.json'), 'w') as f:
+            json.dump({'jobs': jobs}, f)
+
+        with open(os.path.join(wa_dir, 'results.csv'), 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'workload', 'iteration', 'metric', 'value', 'units'])
+            writer.writerows(rows)
+
+        return wa_dir
+
+    def _collect(self, wa_dir, plat_info, **kwargs):
+        return WaResultsCollector(
+            wa_dirs=[wa_dir],
+            plat_info=plat_info,
+            display_charts=False,
+            **kwargs
+        )
+
+    def test_jobs(self):
+        wa_dir = self._make_wa_dir(['wk1', 'wk2'], iterations=2)
+        plat_info = self._get_plat_info([[0], [1]])
+
+        results_dfs = [
+            self._collect(wa_dir, plat_info, jobs=jobs, use_cached_trace_metrics=False).results_df
+            for jobs in (1, 2)
+        ]
+
+        df = results_dfs[0]
+        self.assertIn('cpu_time_total', df['metric'].values)
+        self.assertEqual(len(df[df['metric'] == 'cpu_time_total']), 4)
+        pd.testing.assert_frame_equal(*results_dfs)
+
+    def test_trace_metrics_cache(self):
+        wa_dir = self._make_wa_dir(['wk1'], iterations=1)
+        job_dir = os.path.join(wa_dir, 'wk1-idle-1')
+        trace_path = os.path.join(job_dir, 'trace.txt')
+
+        def check_cache(plat_info):
+            collector = self._collect(wa_dir, plat_info)
+            cache_path = collector._get_trace_metrics_cache_path(trace_path)
+            self.assertTrue(os.path.exists(cache_path))
+            return cache_path
+
+        plat_info = self._get_plat_info([[0], [1]])
+        cache_paths = [check_cache(plat_info)]
+        # Using the cache gives the same path
+        self.assertEqual(check_cache(plat_info), cache_paths[0])
+
+        with open(trace_path, 'a') as f:
+            f.write(
+                '          <idle>-0     [000]     0.600000: cpu_idle:             state=4294967295 cpu_id=0\n'
+            )
+        cache_paths.append(check_cache(plat_info))
+
+        cache_paths.append(check_cache(self._get_plat_info([[0, 1]])))
+
+        self.assertEqual(len(set(cache_paths)), 3)
+        self.assertEqual(
+            sorted(glob.glob(os.path.join(job_dir, 'lisa_trace_metrics-*.csv'))),
+            sorted(cache_paths),
+        )
+
+# vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab
@@ -0,0 +1,73 @@
+#! /usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Benchmark :meth:`lisa.energy_model.EnergyModel.get_optimal_placements` on
+the hikey620 energy model, with tasks of distinct utilizations.
+"""
+
+import argparse
+import copy
+import time
+
+import numpy as np
+
+from lisa.platforms import hikey620
+
+
+def make_tasks(nr_tasks, max_util, seed=0):
+    rng = np.random.RandomState(seed)
+    utils = rng.choice(np.arange(1, max_util), nr_tasks, replace=False)
+    return {
+        'task{}'.format(i): int(util)
+        for i, util in enumerate(utils)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tasks', type=int, default=10,
+        help='Number of tasks',
+    )
+    parser.add_argument('--max-util', type=int, default=200,
+        help='Maximum utilization of a task',
+    )
+    parser.add_argument('--iterations', type=int, default=5,
+        help='Number of task sets to place',
+    )
+    args = parser.parse_args()
+
+    for seed in range(args.iterations):
+        tasks = make_tasks(args.tasks, args.max_util, seed)
+        # Start from a fresh energy model, since the result is memoized
+        nrg_model = copy.deepcopy(hikey620.nrg_model)
+
+        start = time.monotonic()
+        placements = nrg_model.get_optimal_placements(tasks)
+        duration = time.monotonic() - start
+
+        print('{}: {} placements in {:.3f}s'.format(
+            sorted(tasks.values()), len(placements), duration))
+
+
+if __name__ == '__main__':
+    main()
+
+# vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab
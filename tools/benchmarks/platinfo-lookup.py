@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Benchmark :class:`lisa.platforms.platinfo.PlatformInfo` key lookups, with
+the default deep copies compared to read-only views (``frozen=True``).
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from lisa.platforms.platinfo import PlatformInfo
+
+KEYS = [
+    ['cpus-count'],
+    ['freq-domains'],
+    ['freqs'],
+    ['cpu-capacities'],
+    ['kernel', 'symbols-address'],
+]
+
+
+def make_plat_info(nr_symbols, nr_cpus=8):
+    freqs = list(range(500000, 2000000, 100000))
+    return PlatformInfo({
+        'cpus-count': nr_cpus,
+        'freq-domains': [list(range(nr_cpus // 2)), list(range(nr_cpus // 2, nr_cpus))],
+        'freqs': {cpu: freqs for cpu in range(nr_cpus)},
+        'cpu-capacities': {cpu: 1024 for cpu in range(nr_cpus)},
+        'kernel': {
+            'symbols-address': {
+                0xffff000008080000 + i * 0x40: 'func_{}'.format(i)
+                for i in range(nr_symbols)
+            },
+        },
+    }, src='bench')
+
+
+def measure(f, iterations):
+    start = time.monotonic()
+    for _ in range(iterations):
+        f()
+    return (time.monotonic() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=100000,
+        help='Number of entries in kernel/symbols-address',
+    )
+    parser.add_argument('--iterations', type=int, default=20,
+        help='Number of lookups of each key',
+    )
+    args = parser.parse_args()
+
+    plat_info = make_plat_info(args.symbols)
+
+    results = {}
+    for key in KEYS:
+        name = '/'.join(key)
+        results[name] = (
+            measure(lambda: plat_info.get_nested_key(key), args.iterations),
+            measure(lambda: plat_info.get_nested_key(key, frozen=True), args.iterations),
+        )
+        print('{}: copy={:.2e}s frozen={:.2e}s'.format(name, *results[name]))
+
+    df = pd.DataFrame.from_dict(results, orient='index', columns=['copy', 'frozen'])
+    df.index.name = 'key'
+    df['speedup'] = df['copy'] / df['frozen']
+    print(df)
+
+
+if __name__ == '__main__':
+    main()
+
+# vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab
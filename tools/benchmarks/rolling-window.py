@@ -0,0 +1,87 @@
+#! /usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Benchmark :func:`lisa.datautils.series_rolling_agg` against
+:func:`lisa.datautils.series_rolling_apply` with a Python callback, on a
+synthetic PELT-like signal.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from lisa.datautils import series_rolling_agg, series_rolling_apply
+
+AGGS = {
+    'mean': lambda s: s.mean(),
+    'sum': lambda s: s.sum(),
+    'min': lambda s: s.min(),
+    'max': lambda s: s.max(),
+    'count': lambda s: s.count(),
+}
+
+
+def make_signal(nr_samples, seed=0):
+    rng = np.random.RandomState(seed)
+    # Samples every ~1ms, like a PELT signal updated at every tick
+    index = 1000 + np.cumsum(rng.uniform(0.0005, 0.0015, nr_samples))
+    values = rng.randint(0, 1024, nr_samples)
+    return pd.Series(values, index=index)
+
+
+def measure(f):
+    start = time.monotonic()
+    f()
+    return time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=100000,
+        help='Number of samples of the synthetic signal',
+    )
+    parser.add_argument('--window', type=float, default=0.1,
+        help='Rolling window width in seconds',
+    )
+    args = parser.parse_args()
+
+    series = make_signal(args.samples)
+    window = args.window
+
+    results = {}
+    for agg, func in AGGS.items():
+        results[agg] = (
+            measure(lambda: series_rolling_apply(series, func, window, window_float_index=False)),
+            measure(lambda: series_rolling_agg(series, window, agg)),
+        )
+        print('{}: callback={:.3f}s agg={:.3f}s'.format(agg, *results[agg]))
+
+    df = pd.DataFrame.from_dict(results, orient='index', columns=['callback', 'agg'])
+    df.index.name = 'aggregation'
+    df['speedup'] = df['callback'] / df['agg']
+    print(df)
+
+
+if __name__ == '__main__':
+    main()
+
+# vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab
@@ -0,0 +1,101 @@
+#! /usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Benchmark the parsing of a synthetic text trace by :class:`lisa.trace.Trace`,
+with a varying number of parsing processes.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from lisa.trace import Trace
+
+EVENTS = ['sched_switch', 'sched_wakeup', 'cpu_idle']
+
+
+def make_trace(path, nr_lines, nr_cpus=8, seed=0):
+    rng = random.Random(seed)
+    timestamp = 1000.0
+    with open(path, 'w') as f:
+        f.write('version = 6\ncpus={}\n'.format(nr_cpus))
+        for i in range(nr_lines):
+            timestamp += rng.randint(1, 100) * 1e-6
+            cpu = rng.randrange(nr_cpus)
+            pid = rng.randint(1, 5000)
+            next_pid = rng.randint(1, 5000)
+            kind = i % 3
+            if kind == 0:
+                data = 'sched_switch: prev_comm=task{pid} prev_pid={pid} prev_prio=120 prev_state=1 next_comm=task{next_pid} next_pid={next_pid} next_prio=120'
+            elif kind == 1:
+                data = 'sched_wakeup: comm=task{next_pid} pid={next_pid} prio=120 success=1 target_cpu={cpu:03d}'
+            else:
+                data = 'cpu_idle: state={state} cpu_id={cpu}'
+
+            f.write('task{pid}-{pid} [{cpu:03d}] {timestamp:.6f}: {data}\n'.format(
+                pid=pid,
+                cpu=cpu,
+                timestamp=timestamp,
+                data=data.format(
+                    pid=pid,
+                    next_pid=next_pid,
+                    cpu=cpu,
+                    state=rng.choice([0, 1, 4294967295]),
+                ),
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=3000000,
+        help='Number of lines of the synthetic trace',
+    )
+    parser.add_argument('--jobs', type=int, nargs='+',
+        default=sorted({1, 2, 4, 8, os.cpu_count()}),
+        help='Number of processes to benchmark',
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'trace.txt')
+        print('Generating a trace with {} lines ...'.format(args.lines))
+        make_trace(path, args.lines)
+
+        results = {}
+        for jobs in args.jobs:
+            start = time.monotonic()
+            Trace(path, events=EVENTS, jobs=jobs)
+            results[jobs] = time.monotonic() - start
+            print('jobs={}: {:.2f}s'.format(jobs, results[jobs]))
+
+    df = pd.DataFrame.from_dict(results, orient='index', columns=['time'])
+    df.index.name = 'jobs'
+    df['speedup'] = df['time'].iloc[0] / df['time']
+    print(df)
+
+
+if __name__ == '__main__':
+    main()
+
+# vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab